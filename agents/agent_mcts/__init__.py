@@ -1 +1,4 @@
 from .mcts import generate_move_mcts as generate_move_mcts
+from .parallel import generate_move_mcts_parallel as generate_move_mcts_parallel
+from .threaded import generate_move_mcts_threaded as generate_move_mcts_threaded
+from .leaf_parallel import generate_move_mcts_leaf_parallel as generate_move_mcts_leaf_parallel
@@ -0,0 +1,117 @@
+"""
+Offline builder of the opening book (see agents/agent_mcts/opening_book.py).
+
+All positions of the first plies are enumerated (mirror images only once), each
+position is analysed with a deep search, and the best moves are written as a table
+sorted by position key.
+
+Usage: python -m agents.agent_mcts.build_opening_book [path] [plies] [iterations]
+"""
+
+import sys
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from game_utils import (
+    PLAYER1, PLAYER2, BOARD_CELLS, BOARD_COLS, Bitboard, BoardPiece, PlayerAction,
+    bitboard_apply_action, bitboard_canonical_key, bitboard_check_end_state, bitboard_mirror,
+    bitboard_valid_actions, GameState
+)
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import run_search, get_best_child
+from agents.agent_mcts.opening_book import BOOK_DTYPE
+
+DEFAULT_BOOK_PATH = "opening_book.npy"
+
+# analysis of a position: bitboard (position, mask) -> best move and its value for the player to move
+Analysis = Callable[[Bitboard, Bitboard], tuple[PlayerAction, float]]
+
+
+def player_to_move(mask: Bitboard) -> BoardPiece:
+    """Returns the player to move in a position (PLAYER1 moves first)."""
+    return PLAYER1 if mask.bit_count() % 2 == 0 else PLAYER2
+
+
+def enumerate_book_positions(plies: int) -> dict[int, tuple[Bitboard, Bitboard]]:
+    """
+    Returns all positions with less than the given number of pieces in which the game
+    is still going on, as a dict of canonical key to the bitboard (position, mask)
+    of the canonical orientation (mirror images are only included once).
+    """
+    positions = {}
+    level = [(0, 0)]
+    for _ in range(plies):
+        next_level = []
+        for position, mask in level:
+            key, mirrored = bitboard_canonical_key(position, mask)
+            if key in positions:
+                continue
+            positions[key] = (bitboard_mirror(position), bitboard_mirror(mask)) if mirrored else (position, mask)
+            player = player_to_move(mask)
+            for action in bitboard_valid_actions(mask):
+                child_position, child_mask = bitboard_apply_action(position, mask, action, player)
+                if bitboard_check_end_state(child_position, child_mask, player) == GameState.STILL_PLAYING:
+                    next_level.append((child_position, child_mask))
+        level = next_level
+    return positions
+
+
+def mcts_analysis(position: Bitboard, mask: Bitboard, iterations: int = 20000, max_depth=np.inf) -> tuple[PlayerAction, float]:
+    """
+    Analyse a position with a single deep MCTS search. Returns the most visited move
+    and its mean simulation result for the player to move.
+    """
+    tree = SearchTree(bitboard=(position, mask), player=BoardPiece(3 - player_to_move(mask)))
+    run_search(tree, iterations, max_depth=max_depth)
+    action, child = get_best_child(tree, tree.root)
+    return action, float(tree.value[child] / max(tree.visits[child], 1))
+
+
+def build_opening_book(path: str = DEFAULT_BOOK_PATH,
+                       plies: int = 4,
+                       analysis: Optional[Analysis] = None,
+                       verbose: bool = False) -> np.ndarray:
+    """
+    Build the opening book of all positions with less than the given number of pieces
+    and save it to path (.npy file of BOOK_DTYPE records sorted by key).
+
+    Parameters
+    ----------
+    path : str, optional
+        The file to write. Default is DEFAULT_BOOK_PATH.
+    plies : int, optional
+        The number of plies covered by the book. Default is 4.
+    analysis : Analysis, optional
+        Returns the best move and its value of a position. Default is mcts_analysis().
+    verbose : bool, optional
+        If True, the progress is printed. Default is False.
+
+    Returns
+    -------
+    np.ndarray
+        The table written to the file.
+    """
+    if not 0 <= plies <= BOARD_CELLS:
+        raise ValueError(f"plies has to be between 0 and {BOARD_CELLS}, got {plies}.")
+    analysis = analysis or mcts_analysis
+    positions = enumerate_book_positions(plies)
+    table = np.zeros(len(positions), dtype=BOOK_DTYPE)
+    t0 = time.perf_counter()
+    for idx, key in enumerate(sorted(positions)):
+        action, value = analysis(*positions[key])
+        if not 0 <= action < BOARD_COLS:
+            raise ValueError(f"Analysis returned invalid action {action}.")
+        table[idx] = (key, action, value)
+        if verbose:
+            print(f"{idx + 1}/{len(positions)} positions ({time.perf_counter() - t0:.0f}s)")
+    np.save(path, table)
+    return table
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BOOK_PATH
+    plies = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    build_opening_book(path, plies, analysis=lambda position, mask: mcts_analysis(position, mask, iterations), verbose=True)
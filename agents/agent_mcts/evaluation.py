@@ -0,0 +1,137 @@
+"""
+Static evaluation of Connect Four positions, used to score simulations stopped by the
+depth limit instead of counting them as draws.
+
+The score of a player is a weighted sum of
+- open windows: windows of four cells without opponent pieces that hold two (TWO_WEIGHT)
+  or three (THREE_WEIGHT) own pieces,
+- center control: own pieces in the center column (CENTER_WEIGHT),
+- threat parity: own winning cells (threats) on the rows that favour the player
+  (PARITY_WEIGHT). In the endgame, the first player (PLAYER1) gets to fill the odd
+  rows (1st, 3rd, 5th from the bottom) and the second player the even rows, so
+  a threat on a row of the own parity is likely to be won.
+
+The evaluation is the difference of the scores of both players squashed into (-1, 1)
+by tanh(difference / EVALUATION_SCALE), and 1 (-1) if the player (opponent) has won.
+It can be backpropagated like a fractional simulation result.
+
+evaluate_bitboard() evaluates a single position with bitboard operations, evaluate_batch()
+a stack of boards with NumPy operations; both return the same values.
+"""
+
+import math
+
+import numpy as np
+
+from game_utils import (
+    BITBOARD_HEIGHT, BOARD_CELLS, BOARD_COLS, BOARD_ROWS, COLUMN_MASKS, CELL_WINDOWS, PLAYER1, WINDOWS,
+    Bitboard, BoardPiece, bitboard_connected_four, bitboard_player_pieces, bitboard_winning_cells
+)
+
+TWO_WEIGHT = 1.0
+THREE_WEIGHT = 4.0
+CENTER_WEIGHT = 2.0
+PARITY_WEIGHT = 6.0
+EVALUATION_SCALE = 24.0  # difference of the scores that evaluates to tanh(1) ~ 0.76
+
+# windows of four cells as bitboards (bit = col * BITBOARD_HEIGHT + row)
+WINDOW_MASKS = tuple(
+    sum(1 << (cell % BOARD_COLS * BITBOARD_HEIGHT + cell // BOARD_COLS) for cell in window.tolist())
+    for window in WINDOWS
+)
+CENTER_MASK = COLUMN_MASKS[BOARD_COLS // 2]
+# cells of the rows that favour each player (row index 0 is the 1st row from the bottom)
+PARITY_MASKS = {
+    player: sum(1 << (col * BITBOARD_HEIGHT + row)
+                for col in range(BOARD_COLS) for row in range(BOARD_ROWS) if row % 2 == (player != PLAYER1))
+    for player in (PLAYER1, BoardPiece(3 - PLAYER1))
+}
+# the same as flat cell indices of a board (row_idx * BOARD_COLS + col_idx) for evaluate_batch()
+_CENTER_CELLS = np.arange(BOARD_COLS // 2, BOARD_CELLS, BOARD_COLS)
+_PARITY_CELLS = {
+    player: np.array([cell // BOARD_COLS % 2 == (player != PLAYER1) for cell in range(BOARD_CELLS)])
+    for player in PARITY_MASKS
+}
+
+
+def evaluate_bitboard(position: Bitboard, mask: Bitboard, player: BoardPiece) -> float:
+    """
+    Returns the static evaluation of a bitboard (position, mask) for the given player,
+    in [-1, 1] (1: the player has won, -1: the opponent has won).
+    """
+    return evaluate_pieces(bitboard_player_pieces(position, mask, player), mask, player)
+
+
+def evaluate_pieces(pieces: Bitboard, mask: Bitboard, player: BoardPiece) -> float:
+    """
+    Returns the static evaluation for the given player of the position with the player's
+    pieces and the mask of all pieces (see evaluate_bitboard()).
+    """
+    opponent = pieces ^ mask
+    if bitboard_connected_four(pieces):
+        return 1.0
+    if bitboard_connected_four(opponent):
+        return -1.0
+
+    own_counts, opponent_counts = [0] * 5, [0] * 5  # number of open windows by pieces in them
+    for window in WINDOW_MASKS:
+        own, other = window & pieces, window & opponent
+        if not other:
+            own_counts[own.bit_count()] += 1
+        elif not own:
+            opponent_counts[other.bit_count()] += 1
+    score = TWO_WEIGHT * (own_counts[2] - opponent_counts[2]) + THREE_WEIGHT * (own_counts[3] - opponent_counts[3])
+    score += CENTER_WEIGHT * ((pieces & CENTER_MASK).bit_count() - (opponent & CENTER_MASK).bit_count())
+
+    own_threats = bitboard_winning_cells(pieces, mask) & PARITY_MASKS[player]
+    opponent_threats = bitboard_winning_cells(opponent, mask) & PARITY_MASKS[BoardPiece(3 - player)]
+    score += PARITY_WEIGHT * (own_threats.bit_count() - opponent_threats.bit_count())
+    return math.tanh(score / EVALUATION_SCALE)
+
+
+def evaluate_batch(boards: np.ndarray, player: BoardPiece) -> np.ndarray:
+    """
+    Returns the static evaluation of each board of a stack of boards for the given player
+    (see evaluate_bitboard()).
+
+    Parameters
+    ----------
+    boards : np.ndarray
+        Stack of boards of shape (N, BOARD_ROWS, BOARD_COLS).
+    player : BoardPiece
+        The player the boards are evaluated for.
+
+    Returns
+    -------
+    np.ndarray
+        The evaluations in [-1, 1], shape (N,).
+    """
+    num_boards = boards.shape[0]
+    cells = boards.reshape(num_boards, BOARD_CELLS)
+    opponent = BoardPiece(3 - player)
+    own_pieces, opponent_pieces = cells == player, cells == opponent
+    own_windows = own_pieces[:, WINDOWS].sum(axis=2)  # (N, number of windows)
+    opponent_windows = opponent_pieces[:, WINDOWS].sum(axis=2)
+    own_open, opponent_open = opponent_windows == 0, own_windows == 0
+
+    def open_windows(count: int) -> np.ndarray:
+        """Difference of the numbers of open windows with count own and opponent pieces."""
+        return (np.count_nonzero(own_open & (own_windows == count), axis=1)
+                - np.count_nonzero(opponent_open & (opponent_windows == count), axis=1))
+
+    def parity_threats(pieces_in_windows: np.ndarray, is_open: np.ndarray, piece: BoardPiece) -> np.ndarray:
+        """Number of winning cells (empty cells of an open window with three pieces) on the rows of the piece's parity."""
+        threes = np.zeros((num_boards, len(WINDOWS) + 1), dtype=bool)  # extra padding window (see CELL_WINDOWS)
+        threes[:, :-1] = is_open & (pieces_in_windows == 3)
+        threats = threes[:, CELL_WINDOWS].any(axis=2) & (cells == 0)
+        return np.count_nonzero(threats & _PARITY_CELLS[piece], axis=1)
+
+    score = TWO_WEIGHT * open_windows(2) + THREE_WEIGHT * open_windows(3)
+    score += CENTER_WEIGHT * (np.count_nonzero(own_pieces[:, _CENTER_CELLS], axis=1)
+                              - np.count_nonzero(opponent_pieces[:, _CENTER_CELLS], axis=1))
+    score += PARITY_WEIGHT * (parity_threats(own_windows, own_open, player)
+                              - parity_threats(opponent_windows, opponent_open, opponent))
+    values = np.tanh(score / EVALUATION_SCALE)
+    values[(opponent_windows == 4).any(axis=1)] = -1.0
+    values[(own_windows == 4).any(axis=1)] = 1.0
+    return values
@@ -0,0 +1,342 @@
+"""
+Leaf-parallel MCTS: the main process selects and expands the tree, worker processes
+run many simulations for each expanded node (leaf) and return the win, draw, and loss
+counts for the backpropagation.
+
+The boards and the results are exchanged through a ring buffer of slots in shared
+memory (multiprocessing.shared_memory), only slot indices are sent through the queues.
+While the workers simulate, the main process keeps selecting and expanding further
+leaves, which get a virtual loss (see threaded.py) so that they are spread over the tree.
+"""
+
+import atexit
+import os
+import random
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from game_utils import BoardPiece, PlayerAction, SavedState, Bitboard, Board, zobrist_hash
+from agents.agent_mcts.tree import SearchTree, NOT_PROVEN, PROVEN_RESULTS
+from agents.agent_mcts.mcts import selection, expansion, simulation_from_bitboard, get_best_child, propagate_proof, split_results
+
+
+def generate_move_mcts_leaf_parallel(
+    board: np.ndarray,
+    player: BoardPiece,
+    saved_state: SavedState | None,
+    iterations=4000,
+    max_depth=np.inf,
+    playouts_per_leaf: int = 8,
+    num_workers: Optional[int] = None,
+    transpositions: bool = True
+) -> tuple[PlayerAction, SavedState]:
+    """
+    Perform leaf-parallel Monte Carlo Tree Search (MCTS) to determine the next action.
+
+    Parameters
+    ----------
+    board : np.ndarray
+        The current board state.
+    player : BoardPiece
+        The player making the move.
+    saved_state : SavedState or None
+        A saved state from a previous call, used to continue the search tree across turns.
+    iterations : int, optional
+        The number of MCTS iterations (expanded leaves). Default is 4000.
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf (no depth limit).
+    playouts_per_leaf : int, optional
+        The number of simulations run by a worker for each leaf. Default is 8.
+    num_workers : int, optional
+        The number of worker processes. Default is the number of CPU cores.
+    transpositions : bool, optional
+        If True, positions reached by different move orders share a single node. Default is True.
+
+    Returns
+    -------
+    tuple[PlayerAction, SavedState]
+        The chosen action and the updated saved state (see generate_move_mcts()).
+    """
+    if saved_state: tree = saved_state
+    else: tree = SearchTree(board, player=BoardPiece(3 - player), transpositions=transpositions)
+
+    pool = get_leaf_parallel_pool(num_workers)
+    run_leaf_parallel_search(tree, iterations, pool, max_depth=max_depth, playouts_per_leaf=playouts_per_leaf)
+    best_action = tree.move_root(*get_best_child(tree, tree.root))
+    return best_action, tree
+
+
+def run_leaf_parallel_search(tree: SearchTree,
+                             iterations: int,
+                             pool: "LeafParallelPool",
+                             max_depth=np.inf,
+                             playouts_per_leaf: int = 8,
+                             virtual_loss: int = 1) -> None:
+    """
+    Grow the search tree below its root, running the simulations of the
+    expanded leaves in the worker processes of the pool.
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The search tree (modified in place).
+    iterations : int
+        The number of iterations the root should have. Visits of a reused root
+        (saved state) count towards this number.
+    pool : LeafParallelPool
+        The pool of worker processes running the simulations.
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf (no depth limit).
+    playouts_per_leaf : int, optional
+        The number of simulations per leaf. Default is 8.
+    virtual_loss : int, optional
+        The virtual loss added to the nodes of the path of a leaf in simulation. Default is 1.
+    """
+    remaining_iterations = iterations - int(tree.visits[tree.root]) // playouts_per_leaf
+    pending_paths: dict[int, list[int]] = {}  # slot -> path from root to leaf
+
+    while remaining_iterations > 0 or pending_paths:
+        # keep selecting and expanding as long as there are free slots
+        while remaining_iterations > 0 and pool.has_free_slot() and tree.proven[tree.root] == NOT_PROVEN:
+            path = select_and_expand_path(tree, virtual_loss)
+            leaf = path[-1]
+            remaining_iterations -= 1
+            proof = tree.proven[leaf]
+            if proof != NOT_PROVEN:
+                # the result is known, no simulations needed
+                counts = [0, 0, 0]  # wins, draws, losses
+                counts[1 - PROVEN_RESULTS[proof]] = playouts_per_leaf
+                backpropagate_path(tree, path, *counts, virtual_loss)
+                propagate_proof(tree, path)
+                continue
+            slot = pool.submit(tree.bitboard(leaf), tree.player[leaf], playouts_per_leaf, max_depth,
+                               int(tree.hash[leaf]))
+            pending_paths[slot] = path
+
+        if not pending_paths:
+            break  # the root is proven
+        slot, (wins, draws, losses) = pool.get_result()
+        backpropagate_path(tree, pending_paths.pop(slot), wins, draws, losses, virtual_loss)
+
+
+def select_and_expand_path(tree: SearchTree, virtual_loss: int = 1) -> list[int]:
+    """
+    Select and expand a node (see selection() and expansion()) and return the path
+    from the root to the new node (or to a proven node). A virtual loss is added to 
+    every node of the path.
+    """
+    path = []
+    node = selection(tree, tree.root, path)
+    child = expansion(tree, node)
+    if child != node:
+        path.append(child)
+    tree.virtual_loss[path] += virtual_loss
+    return path
+
+
+def backpropagate_path(tree: SearchTree, 
+                       path: list[int], 
+                       wins: float, 
+                       draws: float, 
+                       losses: float, 
+                       virtual_loss: int = 1) -> None:
+    """
+    Update the nodes of the path with the results of a batch of simulations
+    (see backpropagation_batch()) and remove the virtual losses added during selection.
+    """
+    num_simulations = round(wins + draws + losses)
+    for node in reversed(path):
+        tree.visits[node] += num_simulations
+        tree.value[node] += wins - losses
+        tree.wins[node] += wins
+        tree.virtual_loss[node] -= virtual_loss
+        wins, losses = losses, wins  # flip player perspective at each level
+
+
+class LeafParallelPool:
+    """
+    Pool of persistent worker processes running simulations of leaves, with a ring
+    buffer of slots in shared memory for the boards and the results.
+
+    Each slot holds the bitboard and Zobrist hash of a leaf, the player who made the
+    move leading to the leaf, the number of simulations, the maximum simulation depth,
+    and the win, draw, and loss counts written by the worker.
+
+    Parameters
+    ----------
+    num_workers : int, optional
+        The number of worker processes. Default is the number of CPU cores.
+    num_slots : int, optional
+        The number of slots of the ring buffer, i.e. the maximum number of leaves in
+        simulation at the same time. Default is 4 slots per worker.
+    seed : int, optional
+        Seed from which the independent random streams of the workers are derived.
+    """
+    def __init__(self, num_workers: Optional[int] = None, num_slots: Optional[int] = None, seed: Optional[int] = None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.num_slots = num_slots or 4 * self.num_workers
+        self.memory = shared_memory.SharedMemory(create=True, size=_slot_buffer_size(self.num_slots))
+        self.slots = _slot_arrays(self.memory, self.num_slots)
+        self.free_slots = deque(range(self.num_slots))  # ring: slots are reused in order
+        self.tasks = mp.SimpleQueue()
+        self.results = mp.SimpleQueue()
+        worker_seeds = np.random.SeedSequence(seed).spawn(self.num_workers)
+        self.processes = [
+            mp.Process(
+                target=_leaf_parallel_worker,
+                args=(self.memory, self.num_slots, self.tasks, self.results, int(worker_seed.generate_state(1)[0])),
+                daemon=True
+            ) for worker_seed in worker_seeds
+        ]
+        for process in self.processes:
+            process.start()
+
+    def has_free_slot(self) -> bool:
+        """Returns True if a leaf can be submitted without waiting."""
+        return len(self.free_slots) > 0
+
+    def submit(self,
+               bitboard: tuple[Bitboard, Bitboard],
+               player: BoardPiece,
+               num_simulations: int,
+               max_depth=np.inf,
+               hash_value: Optional[int] = None) -> int:
+        """
+        Write a leaf into the next free slot and hand it to the workers.
+
+        Parameters
+        ----------
+        bitboard : tuple[Bitboard, Bitboard]
+            The bitboard (position, mask) of the leaf.
+        player : BoardPiece
+            The player who made the move leading to the leaf.
+        num_simulations : int
+            The number of simulations to run.
+        max_depth : float, optional
+            The maximum depth of the simulations. Default is np.inf.
+        hash_value : int, optional
+            The Zobrist hash of the leaf (the hash of its node), computed once here if not
+            given, so the simulations of the workers do not compute it again. Default is None.
+
+        Returns
+        -------
+        int
+            The slot of the leaf (returned again by get_result()).
+        """
+        slot = self.free_slots.popleft()
+        self.slots["bitboards"][slot] = bitboard
+        self.slots["hashes"][slot] = zobrist_hash(*bitboard) if hash_value is None else hash_value
+        self.slots["players"][slot] = player
+        self.slots["num_simulations"][slot] = num_simulations
+        self.slots["max_depths"][slot] = max_depth
+        self.tasks.put(slot)
+        return slot
+
+    def get_result(self) -> tuple[int, tuple[int, int, int]]:
+        """
+        Wait for the next finished leaf and free its slot.
+
+        Returns
+        -------
+        tuple[int, tuple[int, int, int]]
+            The slot of the leaf and the number of wins, draws, and losses from the
+            perspective of the player who made the move leading to the leaf.
+        """
+        slot = self.results.get()
+        wins, draws, losses = (float(count) for count in self.slots["results"][slot])
+        self.free_slots.append(slot)
+        return slot, (wins, draws, losses)
+
+    def close(self) -> None:
+        """Stop all worker processes and release the shared memory."""
+        for process in self.processes:
+            if process.is_alive():
+                self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=1)
+        self.processes = []
+        self.slots = {}
+        self.memory.close()
+        self.memory.unlink()
+
+
+_pool: Optional[LeafParallelPool] = None
+
+
+def get_leaf_parallel_pool(num_workers: Optional[int] = None) -> LeafParallelPool:
+    """
+    Returns the (module-wide) pool of worker processes, creating it on first use or
+    if a different number of workers is requested. The pool is closed at exit.
+    """
+    global _pool
+    if _pool is not None and num_workers is not None and _pool.num_workers != num_workers:
+        _pool.close()
+        _pool = None
+    if _pool is None:
+        _pool = LeafParallelPool(num_workers)
+    return _pool
+
+
+@atexit.register
+def close_leaf_parallel_pool() -> None:
+    """Close the (module-wide) pool of worker processes if it exists."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def _slot_buffer_size(num_slots: int) -> int:
+    """Returns the number of bytes of the shared memory holding num_slots slots."""
+    # bitboards (2 x uint64), hash (uint64), max. depth (float64), results (3 x float64), number of simulations
+    # (int64), player (int8)
+    return num_slots * (2 * 8 + 8 + 8 + 3 * 8 + 8 + 1)
+
+
+def _slot_arrays(memory: shared_memory.SharedMemory, num_slots: int) -> dict[str, np.ndarray]:
+    """Returns NumPy views of the slot fields in the shared memory."""
+    arrays = {}
+    offset = 0
+    # 8 byte fields first to keep all arrays aligned
+    for name, dtype, shape in (
+        ("bitboards", np.uint64, (num_slots, 2)),
+        ("hashes", np.uint64, (num_slots,)),
+        ("max_depths", np.float64, (num_slots,)),
+        ("results", np.float64, (num_slots, 3)),
+        ("num_simulations", np.int64, (num_slots,)),
+        ("players", np.int8, (num_slots,)),
+    ):
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+        offset += arrays[name].nbytes
+    return arrays
+
+
+def _leaf_parallel_worker(memory: shared_memory.SharedMemory,
+                          num_slots: int,
+                          tasks: mp.SimpleQueue,
+                          results: mp.SimpleQueue,
+                          seed: int) -> None:
+    """Main loop of a worker process: simulate the leaves of the received slots until None is received."""
+    random.seed(seed)
+    np.random.seed(seed)
+    slots = _slot_arrays(memory, num_slots)
+    scratch_board = Board()
+    while True:
+        slot = tasks.get()
+        if slot is None:
+            break
+        position, mask = (int(bits) for bits in slots["bitboards"][slot])
+        player = BoardPiece(slots["players"][slot])
+        max_depth = slots["max_depths"][slot]
+        hash_value = int(slots["hashes"][slot])
+        win_values = [simulation_from_bitboard(position, mask, player, max_depth, scratch_board, hash_value)[0]
+                      for _ in range(slots["num_simulations"][slot])]
+        slots["results"][slot] = split_results(np.array(win_values, dtype=np.float64))
+        results.put(slot)
+    # views have to be released before the shared memory can be closed
+    del slots
+    memory.close()
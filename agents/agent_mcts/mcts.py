@@ -1,16 +1,50 @@
+import random
+import time
 import numpy as np
-from game_utils import BoardPiece, SavedState, PlayerAction, GameState
-from game_utils import check_end_state, apply_player_action, get_lowest_empty_row, BOARD_COLS
-from agents.agent_mcts.tree import TreeNode
+from game_utils import BoardPiece, SavedState, PlayerAction, Bitboard, Board, board_to_bitboard
+from game_utils import (
+    get_lowest_empty_row, bitboard_apply_action,
+    bitboard_valid_actions, bitboard_valid_actions_mask, connected_four_batch, zobrist_update, BOARD_COLS, BOARD_ROWS, BOARD_SHAPE, BOARD_CELLS, NO_PLAYER,
+    BOTTOM_MASK, COLUMN_MASKS, CANONICAL_ACTIONS_MASK, MIRRORED_ACTIONS, bitboard_canonical, bitboard_mirror,
+    mirror_action, zobrist_hash
+)
+from agents.agent_mcts.tree import (
+    SearchTree, NO_NODE, NOT_PROVEN, PROVEN_WIN, PROVEN_DRAW, PROVEN_LOSS, PROVEN_RESULTS
+)
+from agents.agent_mcts.opening_book import load_opening_book
+from agents.agent_mcts.solver import solve_position
+from agents.agent_mcts.playout import RANDOM_POLICY, HEAVY_POLICY, PLAYOUT_POLICIES, simulation_heavy
+from agents.agent_mcts.evaluation import evaluate_batch, evaluate_bitboard
+from agents.agent_mcts.selection_policies import UCB1, UCB1_POLICY, SelectionPolicy, make_selection_policy
+from agents.agent_mcts.stats import SearchStats, SOURCE_BOOK, SOURCE_SOLVER
 from typing import Optional
 
+EARLY_STOP_INTERVAL = 32  # number of iterations between two checks of the early stop
+SOLVER_TIME_SHARE = 0.25  # share of the time limit given to the solver above the solver threshold
+SOLVER_MAX_EMPTY_CELLS = 30  # positions with more empty cells are never solved, even with a time limit
+RAVE_EQUIVALENCE = 3000  # visits of a node at which its mean result and its AMAF value are weighted equally
+DEFAULT_SELECTION_POLICY = UCB1()
 
-def generate_move_mcts(board: np.ndarray, 
-         player: BoardPiece, 
-         saved_state: SavedState | None, 
+
+def generate_move_mcts(board: np.ndarray,
+         player: BoardPiece,
+         saved_state: SavedState | None,
          iterations=4000,
-         max_depth = np.inf
-         ) -> tuple[PlayerAction, SavedState]: 
+         max_depth = np.inf,
+         playouts_per_leaf: int = 1,
+         transpositions: bool = True,
+         max_nodes: Optional[int] = None,
+         time_limit: Optional[float] = None,
+         early_stop: bool = True,
+         opening_book: Optional[str] = None,
+         solver_threshold: Optional[int] = 16,
+         playout_policy: str = RANDOM_POLICY,
+         rave: bool = False,
+         selection_policy: str = UCB1_POLICY,
+         exploration: Optional[float] = None,
+         symmetry: bool = True,
+         stats: Optional[SearchStats] = None
+         ) -> tuple[PlayerAction, SavedState]:
     """
     Perform Monte Carlo Tree Search (MCTS) to determine the next action for the given board state.
 
@@ -23,9 +57,57 @@ def generate_move_mcts(board: np.ndarray,
     saved_state : SavedState or None
         A saved state from a previous call to MCTS, used to continue the search tree across turns.
     iterations : int, optional
-        The number of MCTS iterations to perform. Default is 4000.
+        The number of MCTS iterations to perform (not used if a time_limit is given). Default is 4000.
     max_depth : float, optional
-        The maximum depth to explore in the tree. Default is np.inf (no depth limit).
+        The maximum depth of the simulations. Simulations stopped by the limit are scored 
+        by the static evaluation (see evaluation.py). Default is np.inf (no depth limit).
+    playouts_per_leaf : int, optional
+        The number of simulations per expanded node. If larger than 1, the simulations
+        are played in lockstep as one batch (see simulation_batch()). Default is 1.
+    time_limit : float, optional
+        Time budget of the move in seconds. If given, iterations are run until the time 
+        is up (anytime search) instead of a fixed number of iterations. Default is None.
+    early_stop : bool, optional
+        If True, the search stops as soon as the most visited child of the root can not 
+        be overtaken with the remaining iterations or time (see run_search()). Default is True.
+    transpositions : bool, optional
+        If True, positions reached by different move orders share a single node
+        (see SearchTree), so the search tree becomes a directed acyclic graph.
+        Default is True.
+    max_nodes : int, optional
+        The node budget of the search tree. When it is reached, the least visited leaves 
+        are evicted and their nodes reused, so the memory of the tree stays bounded 
+        (see SearchTree.evict()). Default is None (no limit).
+    opening_book : str, optional
+        Path of an opening book (see opening_book.py). While the position is in the book, 
+        the move of the book is played without a search. Default is None (no book).
+    solver_threshold : int, optional
+        Positions with at most this many empty cells are solved exactly (see solver.py) 
+        instead of searched. With a time limit, positions with up to SOLVER_MAX_EMPTY_CELLS 
+        empty cells are also tried, with SOLVER_TIME_SHARE of the time limit; if they are 
+        not proven in time, the search gets the rest. Default is 16, None never solves.
+    playout_policy : str, optional
+        The policy of the simulations, RANDOM_POLICY ("random") or HEAVY_POLICY ("heavy", 
+        plays and blocks immediate wins, see playout.py). Default is RANDOM_POLICY.
+    rave : bool, optional
+        If True, the selection blends the mean results of the children with their 
+        all-moves-as-first values (RAVE, see update_amaf()). Requires playouts_per_leaf 
+        to be 1. Default is False.
+    selection_policy : str, optional
+        The score of the children in the selection: "ucb1", "ucb1-tuned" or "puct" 
+        (see selection_policies.py). Default is "ucb1".
+    exploration : float, optional
+        The exploration constant of the selection policy. Default is None (the default 
+        of the policy, sqrt(2) for UCB1).
+    symmetry : bool, optional
+        If True, a new search tree stores canonical positions, so a position and its
+        mirror image share their statistics and the mirrored children of symmetric
+        positions (e.g. the empty board) are not searched twice (see SearchTree).
+        Default is True.
+    stats : SearchStats, optional
+        If given, it is filled with the statistics of the move: time per phase, iterations
+        and playouts per second, tree size and depth, reused visits and the visits and
+        values of the root children (see stats.py). Default is None (no instrumentation).
 
     Returns
     -------
@@ -33,182 +115,661 @@ def generate_move_mcts(board: np.ndarray,
         A tuple containing:
         - The chosen action (PlayerAction) to play.
         - The updated saved state (SavedState) to carry over to the next turn.
-    
+
     Notes
     -----
-    The MCTS algorithm balances exploration and exploitation using the UCT score, 
+    The MCTS algorithm balances exploration and exploitation using the UCT score,
     building a search tree to approximate the best action based on random simulations.
     """
 
+    if stats is not None:
+        stats.start_move()
+
+    if opening_book is not None:
+        entry = load_opening_book(opening_book).lookup(*board_to_bitboard(board))
+        if entry is not None:
+            if stats is not None:
+                stats.finish_move(entry.action, SOURCE_BOOK)
+            # a saved state from before the book move is moved along, so it can be reused later
+            return entry.action, saved_state.advance(entry.action) if saved_state else None
+
+    empty_cells = BOARD_CELLS - int(np.count_nonzero(board))
+    if solver_threshold is not None and (
+        empty_cells <= solver_threshold or time_limit is not None and empty_cells <= SOLVER_MAX_EMPTY_CELLS
+    ):
+        t0 = time.perf_counter()
+        solver_time = None if empty_cells <= solver_threshold else SOLVER_TIME_SHARE * time_limit
+        result = solve_position(*board_to_bitboard(board), player, time_limit=solver_time)
+        if result is not None and result.exact:
+            if stats is not None:
+                stats.finish_move(result.action, SOURCE_SOLVER)
+            return result.action, saved_state.advance(result.action) if saved_state else None
+        if time_limit is not None:
+            time_limit = max(time_limit - (time.perf_counter() - t0), 0)
+
     # player of root is the opponent
-    prev_player = BoardPiece(1 + (2 - player)) 
-    
-    if saved_state: root = saved_state
-    else: root = TreeNode(board, player=prev_player)
-    num_visits = root.visits 
-
-    for i in range(iterations-num_visits): # reduce number of iterations based on saved state visits
-        selected_node = selection(root)
-        expanded_node = expansion(selected_node)
-        # also returns move count, currently not used
-        simulation_results, _ = simulation(expanded_node, max_simulation_depth=max_depth)
-        backpropagation(expanded_node, simulation_results)
-    
-    # always select child if it leads to certain victory
-    for child in root.children:
-        if check_end_state(child.board, child.previous_action, player) == GameState.IS_WIN:
-            return child.previous_action, child
-        
-    # final selection based on number of visits
-    best_child = max(root.children, key=lambda c: c.visits)
-    
-    return best_child.previous_action, best_child
-
-
-def selection(node: TreeNode) -> TreeNode:
+    prev_player = BoardPiece(1 + (2 - player))
+
+    if saved_state: tree = saved_state
+    else: tree = SearchTree(board, player=prev_player, transpositions=transpositions, max_nodes=max_nodes,
+                            symmetry=symmetry)
+
+    run_search(tree, iterations, max_depth=max_depth, playouts_per_leaf=playouts_per_leaf, 
+               time_limit=time_limit, early_stop=early_stop, playout_policy=playout_policy, rave=rave,
+               selection_policy=selection_policy, exploration=exploration, stats=stats)
+    if stats is not None:
+        stats.record_tree(tree)
+    # the action of the root is mirrored back if the root stores the mirror image of the board
+    best_action = tree.move_root(*get_best_child(tree, tree.root))
+    if stats is not None:
+        stats.finish_move(best_action)
+
+    return best_action, tree
+
+
+def run_search(tree: SearchTree,
+               iterations: int,
+               max_depth=np.inf,
+               playouts_per_leaf: int = 1,
+               time_limit: Optional[float] = None,
+               early_stop: bool = False,
+               playout_policy: str = RANDOM_POLICY,
+               rave: bool = False,
+               selection_policy: str = UCB1_POLICY,
+               exploration: Optional[float] = None,
+               stats: Optional[SearchStats] = None) -> int:
+    """
+    Grow the search tree below its root by running MCTS iterations
+    (selection, expansion, simulation, backpropagation).
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The search tree (modified in place).
+    iterations : int
+        The number of MCTS iterations the root should have. Visits of a reused root
+        (saved state) count towards this number. Not used if a time_limit is given. Both
+        limits apply only once all actions of the root are expanded.
+    max_depth : float, optional
+        The maximum depth of the simulations, stopped simulations are scored by the
+        static evaluation. Default is np.inf (no depth limit).
+    playouts_per_leaf : int, optional
+        The number of (batched) simulations per expanded node. Default is 1.
+    time_limit : float, optional
+        If given, iterations are run until this number of seconds has passed. Default is None.
+    early_stop : bool, optional
+        If True, the search stops as soon as the most visited child of the root leads 
+        the second by more visits than the remaining iterations can add (for a time limit, 
+        the remaining iterations are estimated from the iterations per second so far). 
+        Default is False.
+    playout_policy : str, optional
+        The policy of the simulations (see playout.py). Default is RANDOM_POLICY.
+    rave : bool, optional
+        If True, the all-moves-as-first statistics are updated with the moves of each 
+        iteration (see update_amaf()) and blended into the selection. Default is False.
+    selection_policy : str, optional
+        The selection policy (see selection_policies.py). Default is "ucb1".
+    exploration : float, optional
+        The exploration constant of the selection policy. Default is None (policy default).
+    stats : SearchStats, optional
+        If given, the time of each phase, the iterations, playouts and depths are added
+        to it. Default is None (only a flag is checked between the phases).
+
+    Returns
+    -------
+    int
+        The number of iterations run. The search always ends as soon as the result 
+        of the root is proven (see update_proof()).
+    """
+    if playout_policy not in PLAYOUT_POLICIES:
+        raise ValueError(f"Unknown playout policy {playout_policy!r}, expected one of {PLAYOUT_POLICIES}.")
+    if rave and playouts_per_leaf > 1:
+        raise ValueError("RAVE needs the moves of each simulation, playouts_per_leaf has to be 1.")
+    policy = make_selection_policy(selection_policy, exploration, RAVE_EQUIVALENCE if rave else None)
+    start_time = time.perf_counter()
+    root = tree.root
+    if time_limit is None:
+        num_iterations = iterations - int(tree.visits[root]) // playouts_per_leaf # reduce number of iterations based on saved state visits
+        tree.reserve(num_iterations) # at most one new node per iteration
+    else:
+        deadline = start_time + time_limit
+        num_iterations = None
+    scratch_board = Board() # reused by all simulations instead of allocating a board per iteration
+    timed = stats is not None
+    if timed:
+        clock = time.perf_counter
+        stats.reused_visits += int(tree.visits[root])
+
+    # each iteration expands a child of the root until it is fully expanded, the limits of
+    # the search only apply afterwards, so there is always a move to choose (even for time_limit=0)
+    root_expansions = tree.actions_mask(root).bit_count() - len(tree.child_nodes(root))
+    i = 0
+    while num_iterations is None or i < num_iterations or i < root_expansions:
+        if tree.proven.item(root) != NOT_PROVEN:
+            break  # the best move is certain
+        if num_iterations is None and time.perf_counter() >= deadline and i >= root_expansions:
+            break
+        if early_stop and i % EARLY_STOP_INTERVAL == 0 and i > 0:
+            if num_iterations is None:
+                now = time.perf_counter()
+                remaining_iterations = i / (now - start_time) * (deadline - now)
+            else:
+                remaining_iterations = num_iterations - i
+            if get_root_lead(tree) > remaining_iterations * playouts_per_leaf:
+                break
+        i += 1
+
+        # nodes can have several parents, so the path taken is recorded for the backpropagation
+        path = []
+        if timed: t_start = clock()
+        selected_node = selection(tree, root, path, policy)
+        if timed: t_selected = clock()
+        expanded_node = expansion(tree, selected_node)
+        if timed: t_expanded = clock()
+        if expanded_node != selected_node:
+            path.append(expanded_node)
+        if playouts_per_leaf > 1:
+            wins, draws, losses = simulation_leaf_batch(tree, expanded_node, playouts_per_leaf, max_depth, playout_policy)
+            if timed: t_simulated = clock()
+            backpropagation_batch(tree, expanded_node, wins, draws, losses, path)
+        else:
+            # also returns move count, currently not used
+            playout_moves = [] if rave else None
+            simulation_results, _ = simulation(tree, expanded_node, max_depth, scratch_board, playout_policy, playout_moves)
+            if timed: t_simulated = clock()
+            backpropagation(tree, expanded_node, simulation_results, path)
+            if rave:
+                update_amaf(tree, path, playout_moves, simulation_results)
+        # the node arrays may have been resized by the expansion
+        proven = tree.proven.item(expanded_node) != NOT_PROVEN
+        if proven:
+            propagate_proof(tree, path)
+        if timed:
+            # proven nodes are not simulated
+            stats.record_iteration(t_start, t_selected, t_expanded, t_simulated, clock(),
+                                   len(path) - 1, 0 if proven else playouts_per_leaf)
+
+    if timed:
+        stats.iterations += i
+        stats.search_time += time.perf_counter() - start_time
+    return i
+
+
+def get_root_lead(tree: SearchTree) -> float:
+    """
+    Returns the number of visits by which the most visited child of the root leads 
+    the second most visited child (unexpanded actions count as children without visits), 
+    or np.inf if there is only one valid action.
+    """
+    root = tree.root
+    num_actions = tree.actions_mask(root).bit_count()
+    if num_actions <= 1:
+        return np.inf
+    visits = sorted(tree.visits[tree.child_nodes(root)].tolist())
+    visits = [0] * (num_actions - len(visits)) + visits
+    return visits[-1] - visits[-2]
+
+
+def get_best_child(tree: SearchTree, node: int) -> tuple[PlayerAction, int]:
+    """
+    Returns the action to be played and the child of the node it leads to: a child
+    leading to certain victory if there is one, otherwise the most visited child that
+    is not a proven loss (unless all children are).
+    """
+    actions = tree.expanded_actions(node)
+    children = [tree.get_child(node, action) for action in actions]
+    proofs = tree.proven[children]
+
+    # always select child if it leads to certain victory (immediate or proven)
+    for action, child, proof in zip(actions, children, proofs.tolist()):
+        if proof == PROVEN_WIN:
+            return PlayerAction(action), child
+
+    # final selection based on number of visits, avoiding certain defeat
+    visits = np.where(proofs == PROVEN_LOSS, -1, tree.visits[children])
+    best = int(visits.argmax())
+    return PlayerAction(actions[best]), children[best]
+
+
+def get_principal_variation(tree: SearchTree, max_length: int = BOARD_CELLS) -> list[PlayerAction]:
+    """
+    Returns the principal variation of the search: the actions of the board (mirrored back
+    from the canonical positions of the tree) obtained by following get_best_child() from
+    the root until a node without expanded children, at most max_length actions.
+    """
+    variation = []
+    node, mirrored = tree.root, tree.root_mirrored
+    while len(variation) < max_length and tree.expanded_actions(node):
+        action, child = get_best_child(tree, node)
+        variation.append(mirror_action(action) if mirrored else action)
+        mirrored ^= tree.is_mirrored_child(node, action, child)
+        node = child
+    return variation
+
+
+def selection(tree: SearchTree,
+              node: int,
+              path: Optional[list[int]] = None,
+              policy: Optional[SelectionPolicy] = None) -> int:
     """
     Select a node to be expanded in the Monte Carlo Tree Search (MCTS).
 
     The selection phase of MCTS works as follows:
-    1) If the current node is not fully expanded (i.e., not all possible moves have been visited), 
+    1) If the current node is not fully expanded (i.e., not all possible moves have been visited),
        return it for expansion.
-    2) If the node is fully expanded, select the child with the highest UCT score 
+    2) If the node is fully expanded, select the child with the highest UCT score
        and repeat until a non-fully-expanded node is found.
+    3) A proven node (e.g. the end of the game) is returned as it is, its result is known.
 
     Parameters
     ----------
-    node : TreeNode
+    tree : SearchTree
+        The search tree.
+    node : int
         The root node of the current MCTS search subtree.
+    path : list[int], optional
+        If given, the nodes visited from the root to the selected node are appended to it.
+    policy : SelectionPolicy, optional
+        Scores the children of fully expanded nodes (see selection_policies.py). 
+        Default is UCB1 with c = sqrt(2).
 
     Returns
     -------
-    TreeNode
-        The selected node to expand further in the MCTS.
+    int
+        The selected node to expand further in the MCTS, or a proven node.
     """
+    select = (policy or DEFAULT_SELECTION_POLICY).select
+    num_children, masks, proven, symmetric = tree.num_children.item, tree.mask.item, tree.proven.item, tree.symmetric.item
     while True:
-        all_valid_actions_count=len(get_all_valid_actions(node.board))
+        if path is not None:
+            path.append(node)
+        if proven(node) != NOT_PROVEN:
+            return node
+        valid_actions = bitboard_valid_actions_mask(masks(node))
+        if symmetric(node):  # the mirrored actions lead to the same children
+            valid_actions &= CANONICAL_ACTIONS_MASK
+        all_valid_actions_count = valid_actions.bit_count()
         # fully expand nodes, i.e. visit each (possible) child at least once
-        if node.is_fully_expanded(all_valid_actions_count):
-            if node.children:
-                node = get_child_node_with_highest_UCT(node)
-            else: return node
+        if num_children(node) >= all_valid_actions_count:
+            child = select(tree, node)
+            if child == NO_NODE:
+                # all children are proven losses, which the node did not know yet (transpositions)
+                update_proof(tree, node)
+                return node
+            node = child
         else: return node
 
 
-def get_child_node_with_highest_UCT(node: TreeNode, 
-                                     explore_param=np.sqrt(2)) -> TreeNode:
+def get_child_node_with_highest_UCT(tree: SearchTree,
+                                     node: int,
+                                     explore_param=np.sqrt(2),
+                                     rave_equivalence: Optional[float] = None) -> int:
     """
     Select the child node of the given node with the highest UCT (Upper Confidence Bound for Trees) score.
 
-    The UCT score balances exploitation (average reward) and exploration (encouraging 
-    visiting less-visited nodes). If a child node has not been visited, it is immediately 
-    returned to ensure that every node is visited at least once.
+    The UCT score balances exploitation (average reward) and exploration (encouraging
+    visiting less-visited nodes). If a child node has not been visited, it is immediately
+    returned to ensure that every node is visited at least once. Virtual losses (of
+    searches of other threads in progress) count as visits without a win.
+    This is the UCB1 selection policy (see selection_policies.py).
 
     Parameters
     ----------
-    node : TreeNode
+    tree : SearchTree
+        The search tree.
+    node : int
         The current node whose children are to be evaluated.
     explore_param : float, optional
-        The exploration parameter that controls the balance between exploration and 
+        The exploration parameter that controls the balance between exploration and
         exploitation. Defaults to sqrt(2).
+    rave_equivalence : float, optional
+        If given, the exploitation term blends in the AMAF value of the children
+        (see SelectionPolicy). Defaults to None (plain UCT).
 
     Returns
     -------
-    TreeNode
+    int
         The child node with the highest UCT score, or an unvisited child if available.
+        Children that are proven losses (for the player moving there) are never selected,
+        NO_NODE is returned if all children are.
     """
-    highest_uct_value = -np.inf # ensures that any uct value is larger 
-    return_child = None
-    for child in node.children:
-        if child.visits == 0: # prioritize unvisited nodes
-            return child
-        else:
-            exploitation_term = child.wins/child.visits
-            exploration_term = explore_param*np.sqrt(np.log(node.visits)/child.visits)
-            uct_value = exploitation_term + exploration_term
-            if uct_value > highest_uct_value:
-                highest_uct_value = uct_value
-                return_child = child
-    return return_child
+    return UCB1(explore_param, rave_equivalence).select(tree, node)
 
 
-def expansion(node: TreeNode) -> TreeNode:
+def expansion(tree: SearchTree, node: int) -> int:
     """
     Expand the given node by creating a new (unexplored) child node.
 
+    With a transposition table, the child is linked to the existing node if its
+    position has already been reached by a different move order. With symmetry, the
+    child stores the canonical form of its position (so it is also linked to the node of
+    its mirror image), and a symmetric node is only expanded with the actions that are
+    not mirror images of others.
+
     Parameters
     ----------
-    node : TreeNode
+    tree : SearchTree
+        The search tree.
+    node : int
         The node to be expanded.
 
     Returns
     -------
-    TreeNode
-        The newly created child node representing an unexplored action.
+    int
+        The (newly created or shared) child node representing an unexplored action,
+        or the node itself if it is proven (the end of the game has no children).
     """
-    board = node.board.copy()
+    if tree.proven.item(node) != NOT_PROVEN:
+        return node
+
     # determine child player based on parent player
-    child_player = BoardPiece(3 - node.player)   
-
-    action = generate_random_move(
-        board, 
-        excluded_actions = node.expanded_actions # to get different actions/child nodes at each expansion
-    )
-    node.expanded_actions.append(action)
-    apply_player_action(board, action, child_player)
-    child = TreeNode(board, parent=node, player=child_player, previous_action=action) 
-    node.add_child(child)
+    child_player = BoardPiece(3 - tree.player[node])
+
+    position, mask = tree.bitboard(node)
+    excluded_actions = tree.expanded_actions(node) # to get different actions/child nodes at each expansion
+    if tree.symmetric.item(node):
+        excluded_actions.extend(MIRRORED_ACTIONS)
+    action = generate_random_bitboard_move(mask, excluded_actions)
+    child_position, child_mask = bitboard_apply_action(position, mask, action, child_player)
+    mirrored = False
+    if tree.symmetry:
+        child_position, child_mask, mirrored = bitboard_canonical(child_position, child_mask)
+    if mirrored:
+        hash_value = zobrist_hash(child_position, child_mask)
+    else:
+        # the new piece is the only bit that differs between the masks
+        hash_value = zobrist_update(int(tree.hash[node]), child_mask ^ mask, child_player)
+    child = tree.lookup(hash_value, child_position, child_mask)
+    if child == NO_NODE:
+        child = tree.add_node(child_position, child_mask, hash_value, node, child_player, action)
+    tree.add_child(node, action, child)
     return child
 
 
-def simulation(node: TreeNode, max_simulation_depth=np.inf) -> tuple[int,int]:
+def simulation(tree: SearchTree,
+               node: int,
+               max_simulation_depth=np.inf,
+               board: Optional[Board] = None,
+               policy: str = RANDOM_POLICY,
+               moves: Optional[list[PlayerAction]] = None) -> tuple[float,int]:
     """
-    Perform a random simulation from the given node until the game ends or a depth limit is reached.
+    Perform a random simulation from the given node until the game ends or a depth
+    limit is reached (see simulation_from_bitboard()).
 
     Parameters
     ----------
-    node : TreeNode
+    tree : SearchTree
+        The search tree.
+    node : int
         Starting node for the simulation.
-        
+    max_simulation_depth : float, optional
+        Maximum number of moves to simulate before stopping. Defaults to np.inf.
+    board : Board, optional
+        Scratch board the simulation is played on. A new board is created if not given.
+    policy : str, optional
+        The playout policy (see playout.py). Default is RANDOM_POLICY.
+    moves : list[PlayerAction], optional
+        If given, the actions played in the simulation are appended to it.
+
+    Returns
+    -------
+    tuple[float, int]
+        The outcome of the simulation from the perspective of the node's player
+        and the number of moves (see simulation_from_bitboard()). The result of a proven
+        node is returned without playing any moves.
+    """
+    proof = tree.proven.item(node)
+    if proof != NOT_PROVEN:
+        return PROVEN_RESULTS[proof], 0
+    position, mask = tree.bitboard(node)
+    return simulation_from_bitboard(position, mask, BoardPiece(tree.player[node]),
+                                    max_simulation_depth, board, int(tree.hash[node]), policy, moves)
+
+
+def simulation_from_bitboard(position: Bitboard,
+                             mask: Bitboard,
+                             player: BoardPiece,
+                             max_simulation_depth=np.inf,
+                             board: Optional[Board] = None,
+                             hash_value: Optional[int] = None,
+                             policy: str = RANDOM_POLICY,
+                             moves: Optional[list[PlayerAction]] = None) -> tuple[float,int]:
+    """
+    Perform a random simulation from the given bitboard until the game ends or a depth limit is reached.
+
+    The simulation starts with the opponent of the given player (the player who made the
+    move leading to the bitboard). If the bitboard itself already ends the game, its result
+    is returned without playing any moves.
+
+    Parameters
+    ----------
+    position, mask : Bitboard
+        Starting game state of the simulation.
+
+    player : BoardPiece
+        The player who made the move leading to the starting game state.
+
     max_simulation_depth : float, optional
         Maximum number of moves to simulate before stopping. Defaults to np.inf,
-        which means no depth limit (simulate until game ends).
+        which means no depth limit (simulate until game ends). A simulation stopped
+        by the limit is scored by the static evaluation of its last position
+        (see evaluate_bitboard()).
+
+    board : Board, optional
+        Scratch board the simulation is played on. It is set to the starting position,
+        the moves are made in place and rolled back afterwards, so a single board can
+        be reused for all simulations of a search. A new board is created if not given.
+
+    hash_value : int, optional
+        Zobrist hash of the starting game state (computed if not given).
+
+    policy : str, optional
+        The playout policy: RANDOM_POLICY plays uniformly random moves, HEAVY_POLICY
+        plays and blocks immediate wins (see simulation_heavy(), which does not use
+        the scratch board). Default is RANDOM_POLICY.
+
+    moves : list[PlayerAction], optional
+        If given, the actions played in the simulation are appended to it
+        (the first one by the opponent of the given player).
 
     Returns
     -------
-    win_value : int
+    win_value : float
         The outcome of the simulation from the starting player's perspective:
-        1 for a win, -1 for a loss, and 0 for a draw.
+        1 for a win, -1 for a loss, and 0 for a draw, or the evaluation in (-1, 1)
+        if the simulation was stopped by the depth limit.
 
     move_count : int
         The number of moves it took to reach the end of the game during the simulation.
     """
-    
-    starting_player = current_player = node.player
-    board = node.board.copy()
+    if policy == HEAVY_POLICY:
+        return simulation_heavy(position, mask, player, max_simulation_depth, moves)
+    if board is None:
+        board = Board.__new__(Board)
+    # it is the opponent's turn
+    board.set_bitboard(position, mask, BoardPiece(3 - player), hash_value)
     move_count = 0
     win_value = 0  # 0: draw, 1: win, -1: loss
 
-    while move_count < max_simulation_depth:
-        action = generate_random_move(board)
-        apply_player_action(board, action, current_player)
-        end_state = check_end_state(board, action, current_player)
+    # the starting game state might already end the game (terminal node)
+    if board.is_win():
+        return 1, move_count
 
-        if end_state != GameState.STILL_PLAYING:
-            if end_state == GameState.IS_DRAW:
-                win_value = 0
-            else:
-                # determine win or loss from starting player's perspective
-                win_value = 1 if current_player == starting_player else -1
+    choice = random.choice
+    while move_count < max_simulation_depth:
+        if board.is_full():
+            break  # draw
+        board.play(choice(board.valid_actions()))
+        if board.is_win():
+            # determine win or loss from starting player's perspective (mover is the opponent of the player to move)
+            win_value = 1 if board.player != player else -1
             break
-        # change player before next move
-        current_player = BoardPiece(3-current_player)
         move_count += 1
+    else:
+        # depth limit reached: score the position instead of counting it as a draw
+        if not board.is_full():
+            win_value = evaluate_bitboard(board.position, board.mask, player)
+
+    if moves is not None:
+        moves.extend(board.history)
+    # roll back the scratch board to the starting position
+    for _ in range(len(board.history)):
+        board.undo()
 
     return win_value, move_count
 
 
-def backpropagation(node: TreeNode, simulation_result: float) -> None:
+def simulation_batch(
+    boards: np.ndarray,
+    player: BoardPiece,
+    max_simulation_depth=np.inf,
+    evaluate: bool = False
+) -> tuple[np.ndarray, ...]:
+    """
+    Perform random simulations of many games at once, until every game has ended
+    or a depth limit is reached.
+
+    All games are advanced in lockstep using NumPy operations on the whole stack
+    of boards: a random valid column is chosen for each game, the pieces are dropped,
+    and finished games (win or full board) are masked out for the following moves.
+
+    Parameters
+    ----------
+    boards : np.ndarray
+        Stack of boards of shape (N, BOARD_ROWS, BOARD_COLS). The boards are not modified.
+        None of the games should already be won.
+    player : BoardPiece
+        The player whose turn it is in all games.
+    max_simulation_depth : float, optional
+        Maximum number of moves to simulate per game before stopping. Defaults to np.inf,
+        which means no depth limit (simulate until all games end).
+    evaluate : bool, optional
+        If True, the result of each game for the given player is returned as well, with
+        games stopped by the depth limit scored by the static evaluation of their
+        last position (see evaluate_batch()). Default is False.
+
+    Returns
+    -------
+    winners : np.ndarray
+        The winner of each game (PLAYER1 or PLAYER2), NO_PLAYER for draws and for
+        games stopped by the depth limit. Shape (N,).
+    move_counts : np.ndarray
+        The number of moves played in each game. Shape (N,).
+    results : np.ndarray
+        Only returned if evaluate is True: 1 for a win, -1 for a loss, 0 for a draw
+        of the given player, or the evaluation of a stopped game. Shape (N,).
+    """
+    boards = boards.copy()
+    num_games = boards.shape[0]
+    heights = np.count_nonzero(boards, axis=1)  # lowest empty row of each column
+    winners = np.full(num_games, NO_PLAYER, dtype=BoardPiece)
+    move_counts = np.zeros(num_games, dtype=np.int64)
+    active = np.flatnonzero(heights.sum(axis=1) < BOARD_CELLS)  # full boards are draws
+    current_player = player
+    depth = 0
+
+    while active.size > 0 and depth < max_simulation_depth:
+        active_heights = heights[active]
+        # random valid column: column with the largest random key (full columns get -1)
+        keys = np.random.random(active_heights.shape)
+        keys[active_heights >= BOARD_ROWS] = -1
+        actions = keys.argmax(axis=1)
+        rows = active_heights[np.arange(active.size), actions]
+
+        boards[active, rows, actions] = current_player
+        heights[active, actions] += 1
+        move_counts[active] += 1
+
+        # checking all windows is faster than gathering the windows through the new pieces
+        won = connected_four_batch(boards[active], current_player)
+        winners[active[won]] = current_player
+        full = heights[active].sum(axis=1) == BOARD_CELLS
+        active = active[~(won | full)]
+
+        # change player before next move
+        current_player = BoardPiece(3 - current_player)
+        depth += 1
+
+    if not evaluate:
+        return winners, move_counts
+    results = np.where(winners == player, 1.0, np.where(winners == NO_PLAYER, 0.0, -1.0))
+    if active.size > 0:
+        # games stopped by the depth limit
+        results[active] = evaluate_batch(boards[active], player)
+    return winners, move_counts, results
+
+
+def simulation_leaf_batch(
+    tree: SearchTree,
+    node: int,
+    num_simulations: int,
+    max_simulation_depth=np.inf,
+    policy: str = RANDOM_POLICY
+) -> tuple[int, int, int]:
+    """
+    Perform a batch of simulations from the given node: random simulations are played
+    in lockstep (see simulation_batch()), heavy ones one after another (see simulation_heavy()).
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The search tree.
+    node : int
+        Starting node for the simulations.
+    num_simulations : int
+        The number of simulations to play.
+    max_simulation_depth : float, optional
+        Maximum number of moves to simulate before stopping. Defaults to np.inf.
+    policy : str, optional
+        The playout policy (see playout.py). Default is RANDOM_POLICY.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        The number of wins, draws, and losses from the perspective of the node's player
+        (the player who made the move leading to the node). A simulation stopped by the 
+        depth limit adds its evaluation as fractions (see split_results()).
+    """
+    # the result of a proven node (e.g. the end of the game) is known
+    proof = tree.proven.item(node)
+    if proof != NOT_PROVEN:
+        counts = [0, 0, 0]  # wins, draws, losses
+        counts[1 - PROVEN_RESULTS[proof]] = num_simulations
+        return tuple(counts)
+
+    player = BoardPiece(tree.player[node])
+    if policy == HEAVY_POLICY:
+        position, mask = tree.bitboard(node)
+        results = [simulation_heavy(position, mask, player, max_simulation_depth)[0] for _ in range(num_simulations)]
+        return split_results(np.array(results, dtype=np.float64))
+
+    boards = np.broadcast_to(tree.board(node), (num_simulations, *BOARD_SHAPE))
+    if max_simulation_depth >= BOARD_CELLS:
+        # no game is stopped, counting the winners is enough
+        winners, _ = simulation_batch(boards, BoardPiece(3 - player), max_simulation_depth)
+        wins = int(np.count_nonzero(winners == player))
+        losses = int(np.count_nonzero(winners == 3 - player))
+        return wins, num_simulations - wins - losses, losses
+    # results of the player to move, negated for the node's player
+    _, _, results = simulation_batch(boards, BoardPiece(3 - player), max_simulation_depth, evaluate=True)
+    return split_results(-results)
+
+
+def split_results(results: np.ndarray) -> tuple[float, float, float]:
+    """
+    Returns the number of wins, draws, and losses of the (fractional) simulation results. 
+    A result r in [-1, 1] counts as max(r, 0) wins, max(-r, 0) losses and 1 - |r| draws, 
+    so wins - losses is the sum of the results and wins + draws + losses their number.
+    """
+    wins = float(np.maximum(results, 0).sum())
+    losses = float(np.maximum(-results, 0).sum())
+    return wins, results.size - wins - losses, losses
+
+
+def backpropagation(tree: SearchTree,
+                    node: int,
+                    simulation_result: float,
+                    path: Optional[list[int]] = None) -> None:
     """
     Update the node and all its ancestors with the result of a simulation.
 
@@ -219,22 +780,169 @@ def backpropagation(node: TreeNode, simulation_result: float) -> None:
 
     Parameters
     ----------
-    node : TreeNode
+    tree : SearchTree
+        The search tree.
+
+    node : int
         The node to start backpropagation from.
-    
+
     simulation_result : float
         The simulation result from the perspective of the simulation-starting player:
-        1 for a win, -1 for a loss, 0 for a draw.
-    """
-    while node:
-        node.visits += 1
-        node.value += simulation_result
-        if simulation_result == 1:
-            node.wins += 1  # increment wins only if player won
-        node = node.parent
+        1 for a win, -1 for a loss, 0 for a draw, or an evaluation in between. A fractional 
+        result r counts as max(r, 0) wins.
+
+    path : list[int], optional
+        The path from the root to the node taken in the selection. If given, the nodes
+        of the path are updated instead of the parents (a node shared through the
+        transposition table has several parents).
+    """
+    visits, values, wins = tree.visits, tree.value, tree.wins
+    for node in _path_to_root(tree, node, path):
+        visits[node] += 1
+        values[node] += simulation_result
+        if simulation_result > 0:
+            wins[node] += simulation_result  # increment wins only if player won (or is ahead)
         simulation_result *= -1  # flip player perspective at each level
 
 
+def backpropagation_batch(tree: SearchTree,
+                          node: int,
+                          wins: int,
+                          draws: int,
+                          losses: int,
+                          path: Optional[list[int]] = None) -> None:
+    """
+    Update the node and all its ancestors with the results of a batch of simulations
+    (see backpropagation()).
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The search tree.
+    node : int
+        The node to start backpropagation from.
+    wins, draws, losses : float
+        The number of simulations won, drawn, and lost from the perspective of
+        the simulation-starting player (fractional for evaluated simulations, see split_results()).
+    path : list[int], optional
+        The path from the root to the node taken in the selection (see backpropagation()).
+    """
+    num_simulations = round(wins + draws + losses)
+    for node in _path_to_root(tree, node, path):
+        tree.visits[node] += num_simulations
+        tree.value[node] += wins - losses
+        tree.wins[node] += wins
+        wins, losses = losses, wins  # flip player perspective at each level
+
+
+
+def update_amaf(tree: SearchTree,
+                path: list[int],
+                playout_moves: list[PlayerAction],
+                simulation_result: float) -> None:
+    """
+    Update the all-moves-as-first (AMAF) statistics of the children of the nodes of the path
+    with the result of a simulation (RAVE). A child gets the result if its player put a piece
+    on the cell of the child's move at any time after the node, further down the path or in
+    the simulation, not only as the move directly from the node. With symmetry, the cells
+    are mirrored along the path wherever a node stores the mirror image of the position
+    its parent's action leads to.
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The search tree.
+    path : list[int]
+        The path from the root to the node the simulation started from.
+    playout_moves : list[PlayerAction]
+        The actions of the simulation, the first one played by the opponent of the
+        player of the last node of the path.
+    simulation_result : float
+        The simulation result from the perspective of the player of the last node of the path.
+    """
+    leaf = path[-1]
+    leaf_player = tree.player.item(leaf)
+    position, mask = tree.bitboard(leaf)
+    mover = BoardPiece(3 - leaf_player)
+    for action in playout_moves:
+        position, mask = bitboard_apply_action(position, mask, action, mover)
+        mover = BoardPiece(3 - mover)
+    # pieces of each player at the end of the simulation, indexed by player
+    final_pieces = (0, position, position ^ mask)
+
+    updated, results = [], []
+    masks, players, symmetric = tree.mask.item, tree.player.item, tree.symmetric.item
+    next_node = NO_NODE
+    # from the leaf to the root, so the final pieces can be mirrored into the frame of each node
+    for node in reversed(path):
+        if tree.symmetry and next_node != NO_NODE:
+            action = tree.children[node].tolist().index(next_node)
+            if tree.is_mirrored_child(node, action, next_node):
+                final_pieces = tuple(bitboard_mirror(pieces) for pieces in final_pieces)
+        next_node = node
+        child_player = 3 - players(node)
+        node_mask = masks(node)
+        # cells of the moves from the node that the child's player occupied later on
+        played = (node_mask + BOTTOM_MASK) & final_pieces[child_player]
+        if symmetric(node):  # the children of the mirrored actions are those of the actions
+            played |= bitboard_mirror(played)
+        if not played:
+            continue
+        result = max(simulation_result if child_player == leaf_player else -simulation_result, 0)
+        for action, child in enumerate(tree.children[node].tolist()):
+            if child != NO_NODE and played & COLUMN_MASKS[action]:
+                updated.append(child)
+                results.append(result)
+    # a node shared through the transposition table may be updated more than once
+    np.add.at(tree.amaf_visits, updated, 1)
+    np.add.at(tree.amaf_wins, updated, results)
+
+
+def update_proof(tree: SearchTree, node: int) -> bool:
+    """
+    Prove the result of the node from its children if possible (MCTS-Solver). The children 
+    are played by the opponent of the node's player, so the node is
+    - a proven loss if any child is a proven win,
+    - a proven win if all valid actions are expanded and all children are proven losses,
+    - a proven draw if all children are proven, none is a win and at least one is a draw.
+
+    Returns
+    -------
+    bool
+        True if the node is proven (before or now).
+    """
+    if tree.proven.item(node) != NOT_PROVEN:
+        return True
+    proofs = [tree.proven.item(child) for child in tree.child_nodes(node)]
+    if PROVEN_WIN in proofs:
+        tree.proven[node] = PROVEN_LOSS
+    elif NOT_PROVEN in proofs or len(proofs) < tree.actions_mask(node).bit_count():
+        return False
+    else:
+        tree.proven[node] = PROVEN_DRAW if PROVEN_DRAW in proofs else PROVEN_WIN
+    return True
+
+
+def propagate_proof(tree: SearchTree, path: list[int]) -> None:
+    """
+    After the last node of the path has been proven, prove its ancestors on the path 
+    (see update_proof()), up to the first one that can not be proven yet.
+    """
+    for node in reversed(path[:-1]):
+        if not update_proof(tree, node):
+            break
+
+
+def _path_to_root(tree: SearchTree, node: int, path: Optional[list[int]] = None):
+    """Yields the nodes of the path (ending at node) backwards, or the node and its parents if no path is given."""
+    if path is not None:
+        yield from reversed(path)
+        return
+    while node != NO_NODE:
+        yield node
+        node = int(tree.parent[node])
+
+
 def generate_random_move(
     board: np.ndarray, 
     excluded_actions: list[PlayerAction] | None = None
@@ -268,6 +976,24 @@ def generate_random_move(
     return action
 
 
+def generate_random_bitboard_move(
+    mask: Bitboard, 
+    excluded_actions: list[PlayerAction] | None = None
+) -> Optional[PlayerAction]:
+    """
+    Randomly select a valid action from the bitboard (given by its mask) that is 
+    not in the excluded actions. Returns None if no valid actions remain.
+    """
+    available_actions = bitboard_valid_actions(mask)
+    if excluded_actions:
+        available_actions = [action for action in available_actions if action not in excluded_actions]
+
+    if not available_actions:
+        return None
+
+    return PlayerAction(random.choice(available_actions))
+
+
 def get_all_valid_actions(board: np.ndarray) -> list[PlayerAction]:
     """
     Return all valid actions for the given board, i.e. columns that are not yet full.
@@ -0,0 +1,67 @@
+"""
+Opening book of the MCTS agent: a precomputed table of the best move of the positions
+of the first plies, stored as an array of records sorted by position key.
+
+The table is memory-mapped, so only the pages touched by the binary search are read
+from disk and all processes using the same book share them. A position and its mirror
+image share one entry (see bitboard_canonical_key()), the move stored for the canonical
+position is mirrored back when the position is the mirror image.
+
+The book is built offline with agents/agent_mcts/build_opening_book.py.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from game_utils import BOARD_COLS, Bitboard, PlayerAction, bitboard_canonical_key
+
+# position key (see bitboard_key()), best move, and value (mean result for the player to move, -1 to 1)
+BOOK_DTYPE = np.dtype([("key", "<u8"), ("action", "i1"), ("value", "<f4")])
+
+
+class BookEntry(NamedTuple):
+    """Best move of a position in the opening book and its value for the player to move (-1 to 1)."""
+    action: PlayerAction
+    value: float
+
+
+class OpeningBook:
+    """
+    Read-only opening book, memory-mapped from a .npy file of BOOK_DTYPE records sorted by key.
+
+    Parameters
+    ----------
+    path : str
+        Path of the book file (see build_opening_book()).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.table = np.load(path, mmap_mode="r")
+        if self.table.dtype != BOOK_DTYPE:
+            raise ValueError(f"{path} is not an opening book, expected dtype {BOOK_DTYPE}, got {self.table.dtype}.")
+        self.keys = self.table["key"]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def lookup(self, position: Bitboard, mask: Bitboard) -> Optional[BookEntry]:
+        """
+        Returns the book entry of a bitboard (position, mask), or None if the position
+        is not in the book.
+        """
+        key, mirrored = bitboard_canonical_key(position, mask)
+        idx = int(np.searchsorted(self.keys, np.uint64(key)))
+        if idx == len(self.keys) or self.keys[idx] != key:
+            return None
+        action, value = int(self.table["action"][idx]), float(self.table["value"][idx])
+        if mirrored:
+            action = BOARD_COLS - 1 - action
+        return BookEntry(PlayerAction(action), value)
+
+
+@lru_cache(maxsize=None)
+def load_opening_book(path: str) -> OpeningBook:
+    """Returns the opening book of the given path, memory-mapped on first use and then reused."""
+    return OpeningBook(path)
@@ -0,0 +1,228 @@
+"""
+Root-parallel MCTS: several worker processes build independent search trees from
+the same root (each with its own random number stream). The visit and win counts
+of the root children are merged before the final choice of the action, together with
+the proofs of the children (a worker stops searching as soon as its root is proven, so a
+proven move can have few visits).
+
+The worker processes are kept alive across moves and games (see get_root_parallel_pool()),
+and every worker keeps its own search tree to reuse it for the next move of the same player.
+"""
+
+import atexit
+import os
+import random
+import multiprocessing as mp
+from multiprocessing.connection import Connection
+from typing import Optional
+
+import numpy as np
+
+from game_utils import (
+    BoardPiece, PlayerAction, SavedState, Bitboard,
+    board_to_bitboard, bitboard_apply_action, bitboard_connected_four, bitboard_player_pieces, bitboard_valid_actions
+)
+from agents.agent_mcts.tree import SearchTree, NO_NODE, NOT_PROVEN, PROVEN_WIN, PROVEN_LOSS
+from agents.agent_mcts.mcts import run_search
+
+# merged statistics of the root children: action -> (visits, wins, proof)
+RootStatistics = dict[int, tuple[int, float, int]]
+
+
+def generate_move_mcts_parallel(
+    board: np.ndarray,
+    player: BoardPiece,
+    saved_state: SavedState | None,
+    iterations=4000,
+    max_depth=np.inf,
+    playouts_per_leaf: int = 1,
+    num_workers: Optional[int] = None
+) -> tuple[PlayerAction, SavedState]:
+    """
+    Perform root-parallel Monte Carlo Tree Search (MCTS) to determine the next action.
+
+    Parameters
+    ----------
+    board : np.ndarray
+        The current board state.
+    player : BoardPiece
+        The player making the move.
+    saved_state : SavedState or None
+        Not used, the workers keep their search trees themselves.
+    iterations : int, optional
+        The number of MCTS iterations performed by each worker. Default is 4000.
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf (no depth limit).
+    playouts_per_leaf : int, optional
+        The number of (batched) simulations per expanded node. Default is 1.
+    num_workers : int, optional
+        The number of worker processes. Default is the number of CPU cores.
+
+    Returns
+    -------
+    tuple[PlayerAction, SavedState]
+        The chosen action and None (as the search trees stay in the worker processes).
+    """
+    pool = get_root_parallel_pool(num_workers)
+    statistics = pool.search(board, player, iterations, max_depth=max_depth, playouts_per_leaf=playouts_per_leaf)
+    action = select_action_from_statistics(board_to_bitboard(board), player, statistics)
+    return PlayerAction(action), None
+
+
+def select_action_from_statistics(
+    bitboard: tuple[Bitboard, Bitboard],
+    player: BoardPiece,
+    statistics: RootStatistics
+) -> int:
+    """
+    Returns an action leading to certain victory (immediate or proven by a worker) if there
+    is one, otherwise the action with the most (merged) visits that is not a proven loss
+    (unless all actions are), as get_best_child().
+    """
+    position, mask = bitboard
+    for action in bitboard_valid_actions(mask):
+        new_position, new_mask = bitboard_apply_action(position, mask, action, player)
+        if bitboard_connected_four(bitboard_player_pieces(new_position, new_mask, player)):
+            return action
+    for action, (_, _, proof) in statistics.items():
+        if proof == PROVEN_WIN:
+            return action
+    return max(statistics, key=lambda action: -1 if statistics[action][2] == PROVEN_LOSS else statistics[action][0])
+
+
+def merge_root_statistics(all_statistics: list[RootStatistics]) -> RootStatistics:
+    """
+    Sum the visits and wins of the root children over the statistics of all workers. A
+    child proven by any worker is proven (proofs are exact, so the workers agree on them).
+    """
+    merged: RootStatistics = {}
+    for statistics in all_statistics:
+        for action, (visits, wins, proof) in statistics.items():
+            merged_visits, merged_wins, merged_proof = merged.get(action, (0, 0, NOT_PROVEN))
+            if proof != NOT_PROVEN:
+                merged_proof = proof
+            merged[action] = (merged_visits + visits, merged_wins + wins, merged_proof)
+    return merged
+
+
+class RootParallelPool:
+    """
+    Pool of persistent worker processes for root-parallel MCTS.
+
+    Each worker receives the current board, runs an independent search and sends
+    back the visits, wins and proofs of the root children. Requests and replies are small
+    tuples, the search trees never leave the workers.
+
+    Parameters
+    ----------
+    num_workers : int, optional
+        The number of worker processes. Default is the number of CPU cores.
+    seed : int, optional
+        Seed from which the independent random streams of the workers are derived.
+    """
+    def __init__(self, num_workers: Optional[int] = None, seed: Optional[int] = None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        worker_seeds = np.random.SeedSequence(seed).spawn(self.num_workers)
+        self.connections: list[Connection] = []
+        self.processes: list[mp.Process] = []
+        for worker_seed in worker_seeds:
+            parent_connection, child_connection = mp.Pipe()
+            process = mp.Process(
+                target=_root_parallel_worker,
+                args=(child_connection, int(worker_seed.generate_state(1)[0])),
+                daemon=True
+            )
+            process.start()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    def search(self,
+               board: np.ndarray,
+               player: BoardPiece,
+               iterations: int,
+               max_depth=np.inf,
+               playouts_per_leaf: int = 1) -> RootStatistics:
+        """Run the search in all workers and return the merged statistics of the root children."""
+        request = (board_to_bitboard(board), int(player), iterations, max_depth, playouts_per_leaf)
+        for connection in self.connections:
+            connection.send(request)
+        return merge_root_statistics([connection.recv() for connection in self.connections])
+
+    def close(self) -> None:
+        """Stop all worker processes."""
+        for connection, process in zip(self.connections, self.processes):
+            if process.is_alive():
+                connection.send(None)
+            process.join(timeout=1)
+            connection.close()
+        self.connections, self.processes = [], []
+
+
+_pool: Optional[RootParallelPool] = None
+
+
+def get_root_parallel_pool(num_workers: Optional[int] = None) -> RootParallelPool:
+    """
+    Returns the (module-wide) pool of worker processes, creating it on first use or
+    if a different number of workers is requested. The pool is closed at exit.
+    """
+    global _pool
+    if _pool is not None and num_workers is not None and _pool.num_workers != num_workers:
+        _pool.close()
+        _pool = None
+    if _pool is None:
+        _pool = RootParallelPool(num_workers)
+    return _pool
+
+
+@atexit.register
+def close_root_parallel_pool() -> None:
+    """Close the (module-wide) pool of worker processes if it exists."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def _root_parallel_worker(connection: Connection, seed: int) -> None:
+    """Main loop of a worker process: search on request until None is received."""
+    random.seed(seed)
+    np.random.seed(seed)
+    trees: dict[int, SearchTree] = {}  # search tree of each player
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        bitboard, player, iterations, max_depth, playouts_per_leaf = request
+        # reuse the subtree of the previous search if the game continued from it
+        tree = trees.get(player)
+        root = NO_NODE
+        if tree is not None:
+            root = _find_descendant(tree, tree.root, bitboard)
+        if root == NO_NODE:
+            tree = trees[player] = SearchTree(bitboard=bitboard, player=BoardPiece(3 - player))
+        else:
+            tree.reroot(root)  # release the rest of the previous tree
+
+        run_search(tree, iterations, max_depth=max_depth, playouts_per_leaf=playouts_per_leaf)
+        statistics: RootStatistics = {}
+        for action in tree.expanded_actions(tree.root):
+            child = tree.get_child(tree.root, action)
+            statistics[action] = (int(tree.visits[child]), float(tree.wins[child]), int(tree.proven[child]))
+        connection.send(statistics)
+
+
+def _find_descendant(tree: SearchTree, node: int, bitboard: tuple[Bitboard, Bitboard], max_depth: int = 2) -> int:
+    """
+    Returns the node (or one of its descendants up to max_depth levels below) with the
+    given bitboard, or NO_NODE if there is no such node.
+    """
+    if tree.bitboard(node) == bitboard:
+        return node
+    if max_depth == 0:
+        return NO_NODE
+    for child in tree.child_nodes(node):
+        descendant = _find_descendant(tree, child, bitboard, max_depth - 1)
+        if descendant != NO_NODE:
+            return descendant
+    return NO_NODE
@@ -0,0 +1,86 @@
+"""
+Playout (simulation) policies of the MCTS agent.
+
+- RANDOM_POLICY: every move is a uniformly random valid column (see simulation_from_bitboard()).
+- HEAVY_POLICY: the player to move plays a winning move if there is one, otherwise blocks
+  an immediate win of the opponent, otherwise plays a random move that does not put a
+  piece directly below a winning cell of the opponent (the opponent would win on top of it).
+
+The heavy policy works on threat masks (bitboard_winning_cells()), i.e. a few shifts and
+ANDs on the bitboards per move instead of trying and undoing moves. The threats of the
+opponent computed for a move are the own threats of the next move, so only one threat
+mask is computed per move.
+"""
+
+import random
+from typing import Optional
+
+import numpy as np
+
+from game_utils import (
+    BOARD_COLS, BOARD_MASK, BOTTOM_MASK, COLUMN_MASKS, Bitboard, BoardPiece, PlayerAction,
+    bitboard_connected_four, bitboard_player_pieces, bitboard_winning_cells
+)
+from agents.agent_mcts.evaluation import evaluate_pieces
+
+RANDOM_POLICY = "random"
+HEAVY_POLICY = "heavy"
+PLAYOUT_POLICIES = (RANDOM_POLICY, HEAVY_POLICY)
+
+
+def heavy_policy_moves(current: Bitboard, mask: Bitboard, opponent_threats: Bitboard) -> Bitboard:
+    """
+    Returns the cells the heavy policy chooses from, if the player to move (pieces current)
+    has no winning move: the blocks of the opponent's immediate wins if there are any,
+    otherwise the moves not directly below a winning cell of the opponent (all valid moves
+    if there are none).
+    """
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    blocks = possible & opponent_threats
+    if blocks:
+        return blocks
+    return (possible & ~(opponent_threats >> 1)) or possible
+
+
+def simulation_heavy(position: Bitboard,
+                     mask: Bitboard,
+                     player: BoardPiece,
+                     max_simulation_depth=np.inf,
+                     moves: Optional[list[PlayerAction]] = None) -> tuple[float, int]:
+    """
+    Perform a simulation with the heavy policy from the given bitboard until the game ends
+    or a depth limit is reached (see simulation_from_bitboard() for the parameters and results,
+    a simulation stopped by the depth limit is scored by the static evaluation).
+    """
+    # the starting game state might already end the game (terminal node)
+    if bitboard_connected_four(bitboard_player_pieces(position, mask, player)):
+        return 1, 0
+
+    # pieces and threats of the player to move, the opponent of the given player moves first
+    current = bitboard_player_pieces(position, mask, BoardPiece(3 - player))
+    threats = bitboard_winning_cells(current, mask)
+    start_player_to_move = False
+    choice = random.choice
+    move_count = 0
+    while move_count < max_simulation_depth:
+        if mask == BOARD_MASK:
+            return 0, move_count  # draw
+        if threats & (mask + BOTTOM_MASK):
+            # the player to move has a winning move
+            return (1 if start_player_to_move else -1), move_count
+        opponent = current ^ mask
+        opponent_threats = bitboard_winning_cells(opponent, mask)
+        candidates = heavy_policy_moves(current, mask, opponent_threats)
+        action = choice([col for col in range(BOARD_COLS) if candidates & COLUMN_MASKS[col]])
+        if moves is not None:
+            moves.append(action)
+        bit = candidates & COLUMN_MASKS[action]
+        mask |= bit
+        current, threats = opponent, opponent_threats & ~bit
+        start_player_to_move = not start_player_to_move
+        move_count += 1
+    if mask == BOARD_MASK:
+        return 0, move_count
+    # depth limit reached: static evaluation of the position for the starting player
+    value = evaluate_pieces(current, mask, player if start_player_to_move else BoardPiece(3 - player))
+    return (value if start_player_to_move else -value), move_count
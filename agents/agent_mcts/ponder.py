@@ -0,0 +1,142 @@
+"""
+Pondering: keep growing the search tree of an agent in a background thread while
+the opponent is thinking about its move.
+
+After the agent has made its move, the root of its saved state is the position the
+opponent has to move in, so the search below the root explores the opponent's replies.
+When the opponent's move arrives, the pondering is stopped (the thread finishes the
+iteration in progress and exits) before the saved state is moved to the new position,
+so the agent's own search starts with the visits gathered during the opponent's turn.
+
+The tree is owned by the pondering thread between start() and stop(), the caller must
+not use it in between. The thread holds the GIL while it searches, so it slows down an
+opponent searching in the same process, while a human user waiting in input() is not
+affected.
+"""
+
+import inspect
+import threading
+from typing import Optional
+
+import numpy as np
+
+from game_utils import GenMove, bitboard_valid_actions
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import run_search
+from agents.agent_mcts.playout import RANDOM_POLICY
+from agents.agent_mcts.selection_policies import UCB1_POLICY
+
+PONDER_CHUNK_ITERATIONS = 32  # iterations between two checks of the stop event
+# arguments of the move generators that change how the tree is grown (passed on to run_search())
+SEARCH_KWARGS = ("max_depth", "playouts_per_leaf", "playout_policy", "rave", "selection_policy", "exploration")
+
+
+def search_kwargs(gen_move: GenMove, args: tuple = (), kwargs: Optional[dict] = None) -> dict:
+    """
+    Returns the search settings (SEARCH_KWARGS) of a move generator called with the given
+    additional positional and keyword arguments (after board, player and saved state), with
+    the defaults of the move generator for the settings not given. Settings the move
+    generator does not have are left out.
+    """
+    signature = inspect.signature(gen_move)
+    bound = signature.bind_partial(None, None, None, *args, **(kwargs or {}))
+    bound.apply_defaults()
+    return {name: value for name, value in bound.arguments.items() if name in SEARCH_KWARGS}
+
+
+class Ponderer:
+    """
+    Runs MCTS iterations on a search tree in a background thread until it is stopped.
+
+    The search settings should be those of the agent that owns the tree (see search_kwargs()),
+    so the statistics gathered while pondering match those of the agent's own search.
+
+    Parameters
+    ----------
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf (no depth limit).
+    max_iterations : int, optional
+        If given, the pondering stops by itself once the root has this many visits
+        (limits the memory used while waiting for a slow opponent). Default is None.
+    playouts_per_leaf, playout_policy, rave, selection_policy, exploration : optional
+        The settings of the search, as in generate_move_mcts() (see run_search()).
+
+    Attributes
+    ----------
+    iterations : int
+        The number of iterations run by the last (or current) pondering.
+    """
+    def __init__(self,
+                 max_depth=np.inf,
+                 max_iterations: Optional[int] = None,
+                 playouts_per_leaf: int = 1,
+                 playout_policy: str = RANDOM_POLICY,
+                 rave: bool = False,
+                 selection_policy: str = UCB1_POLICY,
+                 exploration: Optional[float] = None):
+        self.max_depth = max_depth
+        self.max_iterations = max_iterations
+        self.search_kwargs = dict(playouts_per_leaf=playouts_per_leaf, playout_policy=playout_policy, rave=rave,
+                                  selection_policy=selection_policy, exploration=exploration)
+        self.iterations = 0
+        self._tree: Optional[SearchTree] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def pondering(self) -> bool:
+        """True between start() and stop()."""
+        return self._thread is not None
+
+    def start(self, tree: SearchTree) -> None:
+        """
+        Start pondering on the given tree, i.e. growing it below its root in a background thread.
+        Nothing is done if the position of the root has no valid actions.
+        """
+        if self.pondering:
+            raise RuntimeError("Ponderer is already pondering, stop() it first.")
+        self.iterations = 0
+        if not bitboard_valid_actions(int(tree.mask[tree.root])):
+            return
+        self._tree = tree
+        self._error = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Optional[SearchTree]:
+        """
+        Stop pondering and wait for the thread to finish the iteration in progress.
+
+        Returns
+        -------
+        SearchTree or None
+            The tree that was pondered on, or None if the ponderer was not pondering.
+        """
+        if not self.pondering:
+            return None
+        self._stop_event.set()
+        self._thread.join()
+        tree = self._tree
+        self._thread = None
+        self._tree = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return tree
+
+    def _run(self) -> None:
+        """Main loop of the pondering thread."""
+        tree = self._tree
+        try:
+            while not self._stop_event.is_set():
+                iterations = int(tree.visits[tree.root]) + PONDER_CHUNK_ITERATIONS
+                if self.max_iterations is not None:
+                    iterations = min(iterations, self.max_iterations)
+                num_iterations = run_search(tree, iterations, max_depth=self.max_depth, **self.search_kwargs)
+                self.iterations += num_iterations
+                if num_iterations < PONDER_CHUNK_ITERATIONS:
+                    break  # reached max_iterations
+        except BaseException as error:  # raised again by stop() in the thread of the caller
+            self._error = error
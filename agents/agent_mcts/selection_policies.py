@@ -0,0 +1,219 @@
+"""
+Selection policies of the MCTS agent: the scores of the children of a node in the
+selection phase (see mcts.selection()), the child with the highest score is visited.
+
+- UCB1 ("ucb1"): mean result + c * sqrt(ln N / n), the classic UCT score.
+- UCB1-Tuned ("ucb1-tuned"): mean result + c * sqrt(ln N / n * min(1/4, V)) with the
+  variance bound V = variance + sqrt(2 ln N / n), so children with consistent results
+  are explored less.
+- PUCT ("puct"): mean result + c * P * sqrt(N) / (1 + n) with the prior P of the move
+  (by default the share of the windows of four through the cell of the move, see
+  window_priors()), so promising moves are explored first.
+
+N is the number of visits of the node, n those of the child, and the mean result is the
+share of simulations won by the child's player (blended with the AMAF value for RAVE).
+
+The square roots and logarithms of visit counts are read from tables precomputed up to
+TABLE_SIZE visits (computed for larger counts). A node has at most BOARD_COLS children,
+so NumPy operations on the child statistics cost more (about 1us per call) than the
+scores themselves: the statistics are read with item() and the scores of all children
+are computed in a single pass.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from game_utils import (
+    BITBOARD_HEIGHT, BOARD_COLS, BOARD_MASK, BOTTOM_MASK, CELL_WINDOWS, COLUMN_MASKS, WINDOWS, Bitboard
+)
+from agents.agent_mcts.tree import SearchTree, NO_NODE, PROVEN_LOSS
+
+UCB1_POLICY = "ucb1"
+UCB1_TUNED_POLICY = "ucb1-tuned"
+PUCT_POLICY = "puct"
+
+TABLE_SIZE = 1 << 15  # visit counts covered by the lookup tables
+SQRT_TABLE = np.sqrt(np.arange(TABLE_SIZE)).tolist()
+SQRT_LOG_TABLE = [0.0] + np.sqrt(np.log(np.arange(1, TABLE_SIZE))).tolist()
+INV_SQRT_TABLE = [0.0] + (1 / np.sqrt(np.arange(1, TABLE_SIZE))).tolist()
+
+# number of windows of four through each cell, indexed by bit (col * BITBOARD_HEIGHT + row)
+_CELL_WINDOW_COUNTS = [0] * (BOARD_COLS * BITBOARD_HEIGHT)
+for _cell, _cell_windows in enumerate(CELL_WINDOWS.tolist()):
+    _CELL_WINDOW_COUNTS[_cell % BOARD_COLS * BITBOARD_HEIGHT + _cell // BOARD_COLS] = sum(
+        window < len(WINDOWS) for window in _cell_windows
+    )
+
+# prior of the move of each action (column) in a position: mask -> priors indexed by action
+Prior = Callable[[Bitboard], Sequence[float]]
+
+
+@lru_cache(maxsize=1 << 16)
+def window_priors(mask: Bitboard) -> tuple[float, ...]:
+    """
+    Returns the prior of each action (0 for full columns): the number of windows of four
+    through the cell the piece would land on, normalized over the valid actions.
+    """
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    counts = []
+    for action in range(BOARD_COLS):
+        move = possible & COLUMN_MASKS[action]
+        counts.append(_CELL_WINDOW_COUNTS[move.bit_length() - 1] if move else 0)
+    total = sum(counts)
+    return tuple(count / total for count in counts) if total else (0.0,) * BOARD_COLS
+
+
+def sqrt_log(visits: int) -> float:
+    """Returns sqrt(ln(visits)) (0 for 0 visits)."""
+    return SQRT_LOG_TABLE[visits] if visits < TABLE_SIZE else math.sqrt(math.log(visits))
+
+
+class SelectionPolicy(ABC):
+    """
+    Abstract base class of the selection policies. Subclasses implement score(), the score
+    of a child, and can prepare the terms shared by all children of a node in node_terms().
+
+    Parameters
+    ----------
+    exploration : float, optional
+        The exploration constant c. Default is the default_exploration of the policy.
+    rave_equivalence : float, optional
+        If given (k), the mean result of a child is blended with its AMAF value (RAVE):
+        (1 - beta) * mean result + beta * AMAF value with beta = sqrt(k / (3 * n + k)),
+        so the AMAF value dominates while a child has few visits (equal weights at k visits).
+        Default is None (no blending).
+    """
+    name = ""
+    default_exploration = 1.0
+
+    def __init__(self, exploration: Optional[float] = None, rave_equivalence: Optional[float] = None):
+        self.exploration = self.default_exploration if exploration is None else exploration
+        self.rave_equivalence = rave_equivalence
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(exploration={self.exploration}, rave_equivalence={self.rave_equivalence})"
+
+    def node_terms(self, tree: SearchTree, node: int, node_visits: int):
+        """Returns the terms of the scores shared by all children of the node (with node_visits visits)."""
+        return node_visits
+
+    @abstractmethod
+    def score(self, terms, action: int, visits: int, mean: float) -> float:
+        """Returns the score of the child reached by the action with the given visits (at least 1) and mean result."""
+
+    def select(self, tree: SearchTree, node: int) -> int:
+        """
+        Returns the child of the node with the highest score. An unvisited child is
+        returned right away. Virtual losses (of searches of other threads in progress)
+        count as visits without a win. Children that are proven losses (for the player
+        moving there) are never selected, NO_NODE is returned if all children are.
+        """
+        # reading single values with item() is faster than NumPy operations on at most 7 children
+        visits, wins, virtual_loss, proven = tree.visits.item, tree.wins.item, tree.virtual_loss.item, tree.proven.item
+        rave_equivalence = self.rave_equivalence
+        score = self.score
+        # at least 1 in case the statistics of the node were not updated (yet)
+        terms = self.node_terms(tree, node, max(visits(node) + virtual_loss(node), 1))
+        highest_score = -math.inf
+        selected_child = NO_NODE
+        for action, child in enumerate(tree.children[node].tolist()):
+            if child == NO_NODE or proven(child) == PROVEN_LOSS:
+                continue
+            child_visits = visits(child) + virtual_loss(child)
+            if child_visits == 0:  # prioritize unvisited nodes
+                return child
+            mean = wins(child) / child_visits
+            if rave_equivalence is not None:
+                amaf_visits = tree.amaf_visits.item(child)
+                if amaf_visits > 0:
+                    beta = math.sqrt(rave_equivalence / (3 * child_visits + rave_equivalence))
+                    mean = (1 - beta) * mean + beta * tree.amaf_wins.item(child) / amaf_visits
+            child_score = score(terms, action, child_visits, mean)
+            if child_score > highest_score:
+                highest_score = child_score
+                selected_child = child
+        return selected_child
+
+
+class UCB1(SelectionPolicy):
+    """UCB1 (UCT) selection: mean result + c * sqrt(ln N / n), c = sqrt(2) by default."""
+    name = UCB1_POLICY
+    default_exploration = math.sqrt(2)
+
+    def node_terms(self, tree, node, node_visits):
+        return self.exploration * sqrt_log(node_visits)
+
+    def score(self, terms, action, visits, mean):
+        return mean + terms * (INV_SQRT_TABLE[visits] if visits < TABLE_SIZE else 1 / math.sqrt(visits))
+
+
+class UCB1Tuned(SelectionPolicy):
+    """
+    UCB1-Tuned selection: mean result + c * sqrt(ln N / n * min(1/4, V)), c = 1 by default.
+    The results counted as wins are in [0, 1], so the variance of a child is bounded by
+    mean - mean^2 (exact for results that are either wins or not).
+    """
+    name = UCB1_TUNED_POLICY
+    default_exploration = 1.0
+
+    def node_terms(self, tree, node, node_visits):
+        return math.log(node_visits)
+
+    def score(self, terms, action, visits, mean):
+        log_ratio = terms / visits
+        variance_bound = mean - mean * mean + math.sqrt(2 * log_ratio)
+        return mean + self.exploration * math.sqrt(log_ratio * min(0.25, variance_bound))
+
+
+class PUCT(SelectionPolicy):
+    """
+    PUCT selection: mean result + c * P * sqrt(N) / (1 + n), c = 1 by default.
+
+    Parameters
+    ----------
+    exploration : float, optional
+        The exploration constant c. Default is 1.
+    rave_equivalence : float, optional
+        See SelectionPolicy. Default is None.
+    prior : Prior, optional
+        Returns the priors of the actions of a position (mask of all pieces).
+        Default is window_priors().
+    """
+    name = PUCT_POLICY
+    default_exploration = 1.0
+
+    def __init__(self,
+                 exploration: Optional[float] = None,
+                 rave_equivalence: Optional[float] = None,
+                 prior: Prior = window_priors):
+        super().__init__(exploration, rave_equivalence)
+        self.prior = prior
+
+    def node_terms(self, tree, node, node_visits):
+        sqrt_visits = SQRT_TABLE[node_visits] if node_visits < TABLE_SIZE else math.sqrt(node_visits)
+        return self.exploration * sqrt_visits, self.prior(tree.mask.item(node))
+
+    def score(self, terms, action, visits, mean):
+        scale, priors = terms
+        return mean + scale * priors[action] / (1 + visits)
+
+
+SELECTION_POLICIES: dict[str, type[SelectionPolicy]] = {
+    policy.name: policy for policy in (UCB1, UCB1Tuned, PUCT)
+}
+
+
+def make_selection_policy(name: str = UCB1_POLICY,
+                          exploration: Optional[float] = None,
+                          rave_equivalence: Optional[float] = None) -> SelectionPolicy:
+    """
+    Returns the selection policy of the given name (see SELECTION_POLICIES) with the given
+    exploration constant (the default of the policy if None) and RAVE blending.
+    """
+    if name not in SELECTION_POLICIES:
+        raise ValueError(f"Unknown selection policy {name!r}, expected one of {tuple(SELECTION_POLICIES)}.")
+    return SELECTION_POLICIES[name](exploration, rave_equivalence)
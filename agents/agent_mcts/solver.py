@@ -0,0 +1,267 @@
+"""
+Exact solver of Connect Four positions: negamax with alpha-beta pruning.
+
+The solver proves whether the player to move wins, draws, or loses with perfect play.
+Scores follow the number of moves to the end of the game: a win with the k-th own move
+from now scores (BOARD_CELLS + 1 - ply_of_win) // 2 (faster wins score higher), a draw
+scores 0, and losses are the negated scores of the opponent's wins.
+
+To keep the tree small, the solver
+- never plays a move that lets the opponent win immediately (non-losing moves),
+- tries the center columns first (center-first move ordering, more connected fours),
+- stores score bounds and best moves in a bounded transposition table (one slot per
+  key modulo the size, a new entry replaces the old one),
+- deepens iteratively, so that a time limited solve still returns the result of the
+  deepest completed iteration and each iteration starts with the best moves found by
+  the previous one.
+
+The search works on the pieces of the player to move (current) and the mask of all
+pieces, so the same code serves both players.
+"""
+
+import time
+from typing import NamedTuple, Optional
+
+from game_utils import (
+    BOARD_CELLS, BOARD_COLS, BOARD_MASK, BOTTOM_MASK, COLUMN_MASKS, Bitboard, BoardPiece, PlayerAction,
+    PLAYER1, bitboard_connected_four, bitboard_player_pieces, bitboard_winning_cells
+)
+
+CENTER_FIRST_ORDER = tuple(sorted(range(BOARD_COLS), key=lambda col: abs(col - BOARD_COLS // 2)))
+DEFAULT_TABLE_SIZE = 2**20 + 7  # number of transposition table slots (odd, so keys spread over all slots)
+DEADLINE_CHECK_INTERVAL = 1024  # number of nodes between two checks of the deadline
+
+_LOWER, _UPPER = 0, 1  # type of the bound stored in the transposition table
+
+
+class SolverResult(NamedTuple):
+    """
+    Result of a solve: best move, score for the player to move (> 0 win, 0 draw, < 0 loss),
+    and whether the score is exact (proven). A depth limited result is not exact.
+    """
+    action: PlayerAction
+    score: int
+    exact: bool
+
+
+class SolverTimeout(Exception):
+    """Raised inside the search when the deadline of the solve has passed."""
+
+
+class TranspositionTable:
+    """
+    Bounded transposition table: a fixed number of slots indexed by key modulo the size.
+    Each slot holds (key, depth, bound type, score, best move) of the last position stored in it.
+
+    Parameters
+    ----------
+    size : int, optional
+        The number of slots. Default is DEFAULT_TABLE_SIZE.
+    """
+    def __init__(self, size: int = DEFAULT_TABLE_SIZE):
+        self.size = size
+        self.slots: list[Optional[tuple[int, int, int, int, int]]] = [None] * size
+
+    def get(self, key: int) -> Optional[tuple[int, int, int, int, int]]:
+        """Returns the entry of the key, or None if its slot holds a different position."""
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key: int, depth: int, bound: int, score: int, action: int) -> None:
+        """Store an entry, replacing whatever is stored in the slot of the key."""
+        self.slots[key % self.size] = (key, depth, bound, score, action)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.slots = [None] * self.size
+
+
+def non_losing_moves(current: Bitboard, mask: Bitboard) -> Bitboard:
+    """
+    Returns the cells the player to move can play without letting the opponent win with
+    the next move (0 if the opponent wins whatever is played). The player to move must
+    not have a winning move (checked before).
+    """
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    opponent_wins = bitboard_winning_cells(current ^ mask, mask)
+    forced = possible & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            return 0  # the opponent has two winning cells, only one can be blocked
+        possible = forced
+    # never play directly below a winning cell of the opponent
+    return possible & ~(opponent_wins >> 1)
+
+
+class Solver:
+    """
+    Negamax solver with alpha-beta pruning, center-first move ordering, a bounded
+    transposition table and iterative deepening. The table is kept between solves,
+    so positions of the same game are solved faster one after another.
+
+    Parameters
+    ----------
+    table_size : int, optional
+        The number of slots of the transposition table. Default is DEFAULT_TABLE_SIZE.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of positions searched by the last solve.
+    """
+    def __init__(self, table_size: int = DEFAULT_TABLE_SIZE):
+        self.table = TranspositionTable(table_size)
+        self.nodes = 0
+        self._deadline: Optional[float] = None
+
+    def solve(self,
+              position: Bitboard,
+              mask: Bitboard,
+              player: BoardPiece,
+              time_limit: Optional[float] = None,
+              max_depth: Optional[int] = None) -> Optional[SolverResult]:
+        """
+        Solve the position of a bitboard for the player to move.
+
+        Parameters
+        ----------
+        position, mask : Bitboard
+            The game state (PLAYER1 pieces, all pieces), which must not be over.
+        player : BoardPiece
+            The player to move.
+        time_limit : float, optional
+            If given, the solve is stopped after this number of seconds. Default is None.
+        max_depth : int, optional
+            The maximum number of plies to search. Default is None (until the end of the game).
+
+        Returns
+        -------
+        SolverResult or None
+            The best move and its score. If the time is up before the position is proven,
+            the result of the deepest completed iteration (not exact), or None if no
+            iteration was completed.
+        """
+        current = bitboard_player_pieces(position, mask, player)
+        ply = mask.bit_count()
+        remaining = BOARD_CELLS - ply
+        max_depth = remaining if max_depth is None else min(max_depth, remaining)
+        self.nodes = 0
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        # a winning move is played right away
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        for action in CENTER_FIRST_ORDER:
+            move = possible & COLUMN_MASKS[action]
+            if move and bitboard_connected_four(current | move):
+                return SolverResult(PlayerAction(action), (BOARD_CELLS + 1 - ply) // 2, True)
+
+        result = None
+        for depth in range(1, max_depth + 1):
+            try:
+                action, score = self._search_root(current, mask, ply, depth)
+            except SolverTimeout:
+                break
+            # wins and losses are only scored at the end of a line, so they are proven at any depth
+            result = SolverResult(PlayerAction(action), score, score != 0 or depth == remaining)
+            if result.exact:
+                break
+        return result
+
+    def _search_root(self, current: Bitboard, mask: Bitboard, ply: int, depth: int) -> tuple[int, int]:
+        """Returns the best move and its score of a depth limited search from the root."""
+        moves = non_losing_moves(current, mask)
+        if not moves:
+            # every move loses, play any valid one
+            possible = (mask + BOTTOM_MASK) & BOARD_MASK
+            action = next(col for col in CENTER_FIRST_ORDER if possible & COLUMN_MASKS[col])
+            return action, -((BOARD_CELLS - ply) // 2)
+        best_action, best_score = -1, -BOARD_CELLS
+        alpha, beta = -BOARD_CELLS, BOARD_CELLS
+        for action in self._ordered_actions(current, mask, moves):
+            move = moves & COLUMN_MASKS[action]
+            new_mask = mask | move
+            score = -self._negamax(current ^ mask, new_mask, ply + 1, -beta, -alpha, depth - 1)
+            if score > best_score:
+                best_action, best_score = action, score
+            alpha = max(alpha, score)
+        self.table.put(current + mask, depth, _LOWER, best_score, best_action)
+        return best_action, best_score
+
+    def _ordered_actions(self, current: Bitboard, mask: Bitboard, moves: Bitboard) -> list[int]:
+        """Returns the columns of the moves, the best move stored in the table first, then center first."""
+        actions = [col for col in CENTER_FIRST_ORDER if moves & COLUMN_MASKS[col]]
+        entry = self.table.get(current + mask)
+        if entry is not None and entry[4] in actions and entry[4] != actions[0]:
+            actions.remove(entry[4])
+            actions.insert(0, entry[4])
+        return actions
+
+    def _negamax(self, current: Bitboard, mask: Bitboard, ply: int, alpha: int, beta: int, depth: int) -> int:
+        """
+        Returns the score of the position for the player to move (pieces current), searched
+        depth plies deep (0 at the depth limit). The player to move has no winning move.
+        """
+        self.nodes += 1
+        if self._deadline is not None and self.nodes % DEADLINE_CHECK_INTERVAL == 0:
+            if time.perf_counter() > self._deadline:
+                raise SolverTimeout()
+
+        moves = non_losing_moves(current, mask)
+        if not moves:
+            return -((BOARD_CELLS - ply) // 2)  # the opponent wins with the next move
+        if ply >= BOARD_CELLS - 2:
+            return 0  # the last two moves can not win any more
+        if depth <= 0:
+            return 0  # depth limit: unknown, scored as a draw
+
+        # a win is possible at the earliest with the own move after next
+        lowest = -((BOARD_CELLS - 2 - ply) // 2)
+        highest = (BOARD_CELLS - 1 - ply) // 2
+        key = current + mask
+        entry = self.table.get(key)
+        if entry is not None and entry[1] >= depth:
+            if entry[2] == _LOWER: lowest = max(lowest, entry[3])
+            else: highest = min(highest, entry[3])
+        alpha, beta = max(alpha, lowest), min(beta, highest)
+        if alpha >= beta:
+            return alpha
+
+        original_alpha = alpha
+        best_action, best_score = -1, -BOARD_CELLS
+        opponent = current ^ mask
+        for action in self._ordered_actions(current, mask, moves):
+            new_mask = mask | (moves & COLUMN_MASKS[action])
+            score = -self._negamax(opponent, new_mask, ply + 1, -beta, -alpha, depth - 1)
+            if score > best_score:
+                best_action, best_score = action, score
+            if score >= beta:
+                self.table.put(key, depth, _LOWER, score, action)
+                return score
+            alpha = max(alpha, score)
+        if best_score <= original_alpha:
+            self.table.put(key, depth, _UPPER, best_score, best_action)
+        else:
+            # exact score, stored as lower bound (an upper bound equal to it is implied by the search)
+            self.table.put(key, depth, _LOWER, best_score, best_action)
+        return best_score
+
+
+_solver: Optional[Solver] = None
+
+
+def get_solver() -> Solver:
+    """Returns the (module-wide) solver, so the transposition table is reused across moves."""
+    global _solver
+    if _solver is None:
+        _solver = Solver()
+    return _solver
+
+
+def solve_position(position: Bitboard,
+                   mask: Bitboard,
+                   player: BoardPiece = PLAYER1,
+                   time_limit: Optional[float] = None) -> Optional[SolverResult]:
+    """Solve the position of a bitboard for the player to move with the module-wide solver (see Solver.solve())."""
+    return get_solver().solve(position, mask, player, time_limit=time_limit)
@@ -0,0 +1,138 @@
+"""
+Instrumentation of the MCTS agent: a SearchStats record is filled by generate_move_mcts()
+and run_search() if it is passed as stats. Without it, the search only checks a flag
+per phase, so the instrumentation costs nothing measurable when disabled.
+"""
+
+import time
+from typing import Optional
+
+from agents.agent_mcts.tree import SearchTree
+
+PHASES = ("selection", "expansion", "simulation", "backpropagation")
+# how the move was found
+SOURCE_SEARCH, SOURCE_BOOK, SOURCE_SOLVER = "search", "book", "solver"
+
+
+class SearchStats:
+    """
+    Statistics of a move of the MCTS agent. Pass a new record per move, the counters of
+    several searches with the same record add up.
+
+    Attributes
+    ----------
+    phase_times : dict[str, float]
+        Cumulative time in seconds of each phase of the iterations (PHASES). The
+        backpropagation includes the AMAF updates and the propagation of proofs.
+    iterations : int
+        The number of iterations run.
+    playouts : int
+        The number of simulations played (none for proven nodes, playouts_per_leaf per iteration otherwise).
+    search_time : float
+        The time of the searches in seconds (including the checks between iterations).
+    move_time : float
+        The time of the whole move in seconds (set by finish_move()).
+    max_depth, total_depth : int
+        The maximum and the sum of the depths of the nodes the simulations started from
+        (the root has depth 0).
+    reused_visits : int
+        The visits of the root before the search (reused from the saved state).
+    num_nodes : int
+        The number of nodes of the search tree after the search.
+    root_visits, root_values : dict[int, float]
+        The visits and mean results (game scores for the player to move: 1 win, 0.5 draw,
+        0 loss, see SearchTree.mean_result()) of the children of the root, indexed by the
+        action of the board.
+    action : Optional[int]
+        The action played.
+    source : str
+        SOURCE_SEARCH, SOURCE_BOOK (opening book) or SOURCE_SOLVER (endgame solver).
+    """
+    def __init__(self):
+        self.phase_times = dict.fromkeys(PHASES, 0.0)
+        self.iterations = 0
+        self.playouts = 0
+        self.search_time = 0.0
+        self.move_time = 0.0
+        self.max_depth = 0
+        self.total_depth = 0
+        self.reused_visits = 0
+        self.num_nodes = 0
+        self.root_visits: dict[int, int] = {}
+        self.root_values: dict[int, float] = {}
+        self.action: Optional[int] = None
+        self.source = SOURCE_SEARCH
+        self._move_start = time.perf_counter()
+
+    @property
+    def iterations_per_second(self) -> float:
+        """The iterations per second of the searches."""
+        return self.iterations / self.search_time if self.search_time else 0.0
+
+    @property
+    def playouts_per_second(self) -> float:
+        """The simulations per second of the searches."""
+        return self.playouts / self.search_time if self.search_time else 0.0
+
+    @property
+    def mean_depth(self) -> float:
+        """The mean depth of the nodes the simulations started from."""
+        return self.total_depth / self.iterations if self.iterations else 0.0
+
+    def start_move(self) -> None:
+        """Start the clock of the move."""
+        self._move_start = time.perf_counter()
+
+    def finish_move(self, action: int, source: str = SOURCE_SEARCH) -> None:
+        """Record the action played and how it was found, and stop the clock of the move."""
+        self.action = int(action)
+        self.source = source
+        self.move_time = time.perf_counter() - self._move_start
+
+    def record_iteration(self,
+                         start: float,
+                         selected: float,
+                         expanded: float,
+                         simulated: float,
+                         end: float,
+                         depth: int,
+                         playouts: int) -> None:
+        """Add the times of the phases of an iteration (given by the clock between the phases)."""
+        phase_times = self.phase_times
+        phase_times["selection"] += selected - start
+        phase_times["expansion"] += expanded - selected
+        phase_times["simulation"] += simulated - expanded
+        phase_times["backpropagation"] += end - simulated
+        self.total_depth += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self.playouts += playouts
+
+    def record_tree(self, tree: SearchTree) -> None:
+        """Record the size of the tree and the statistics of the children of its root (before the root is moved)."""
+        self.num_nodes = len(tree)
+        self.root_visits, self.root_values = {}, {}
+        for action in tree.expanded_actions(tree.root):
+            child = tree.get_child(tree.root, action)
+            board_action = int(tree.root_action(action))
+            self.root_visits[board_action] = int(tree.visits[child])
+            self.root_values[board_action] = tree.mean_result(child)
+
+    def summary(self) -> str:
+        """Returns a report of the statistics in a few lines."""
+        if self.source != SOURCE_SEARCH:
+            return f"Move {self.action} from the {self.source} in {self.move_time:.3f}s"
+        phase_total = sum(self.phase_times.values()) or 1.0
+        phases = ", ".join(
+            f"{phase} {phase_time / phase_total:.0%} ({phase_time:.3f}s)" for phase, phase_time in self.phase_times.items()
+        )
+        root = ", ".join(
+            f"{action}: {visits} ({self.root_values[action]:.2f})" for action, visits in sorted(self.root_visits.items())
+        )
+        return "\n".join((
+            f"Search: {self.iterations} iterations in {self.search_time:.3f}s ({self.iterations_per_second:.0f} it/s, "
+            f"{self.playouts_per_second:.0f} playouts/s), {self.num_nodes} nodes, depth max {self.max_depth} / "
+            f"mean {self.mean_depth:.1f}, {self.reused_visits} visits reused",
+            f"Phases: {phases}",
+            f"Root children (visits, mean result): {root}",
+        ))
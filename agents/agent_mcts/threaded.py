@@ -0,0 +1,200 @@
+"""
+Multithreaded MCTS on a single shared search tree (tree parallelism).
+
+Several threads descend the same tree at the same time. A thread adds a virtual
+loss to every node it selects, which lowers the UCT score of that branch for the
+other threads until the simulation result is backpropagated, so the threads spread
+across different branches. Expansion and the updates of a node are protected by
+a lock of the node (striped locks, i.e. a fixed set of locks shared by all nodes),
+so the search is correct on standard CPython as well as on free-threaded builds.
+New nodes are added to the tree under a separate lock, and the node arrays are
+reserved before the threads start, so they are never resized during the search.
+"""
+
+import threading
+
+import numpy as np
+
+from game_utils import BoardPiece, PlayerAction, SavedState, Board
+from agents.agent_mcts.tree import SearchTree, NO_NODE, NOT_PROVEN
+from agents.agent_mcts.mcts import (
+    get_child_node_with_highest_UCT, expansion, simulation, get_best_child, update_proof, propagate_proof
+)
+
+NUM_NODE_LOCKS = 256  # number of striped locks shared by the nodes of a tree
+
+
+def generate_move_mcts_threaded(
+    board: np.ndarray,
+    player: BoardPiece,
+    saved_state: SavedState | None,
+    iterations=4000,
+    max_depth=np.inf,
+    num_threads: int = 4,
+    virtual_loss: int = 1,
+    transpositions: bool = True
+) -> tuple[PlayerAction, SavedState]:
+    """
+    Perform multithreaded Monte Carlo Tree Search (MCTS) on a shared search tree.
+
+    Parameters
+    ----------
+    board : np.ndarray
+        The current board state.
+    player : BoardPiece
+        The player making the move.
+    saved_state : SavedState or None
+        A saved state from a previous call, used to continue the search tree across turns.
+    iterations : int, optional
+        The number of MCTS iterations performed by all threads together. Default is 4000.
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf (no depth limit).
+    num_threads : int, optional
+        The number of search threads. Default is 4.
+    virtual_loss : int, optional
+        The virtual loss added to each node on the path of a search in progress. Default is 1.
+    transpositions : bool, optional
+        If True, positions reached by different move orders share a single node. Default is True.
+
+    Returns
+    -------
+    tuple[PlayerAction, SavedState]
+        The chosen action and the updated saved state (see generate_move_mcts()).
+    """
+    if saved_state: tree = saved_state
+    else: tree = SearchTree(board, player=BoardPiece(3 - player), transpositions=transpositions)
+
+    run_threaded_search(tree, iterations, num_threads, max_depth=max_depth, virtual_loss=virtual_loss)
+    best_action = tree.move_root(*get_best_child(tree, tree.root))
+    return best_action, tree
+
+
+def run_threaded_search(tree: SearchTree,
+                        iterations: int,
+                        num_threads: int,
+                        max_depth=np.inf,
+                        virtual_loss: int = 1) -> None:
+    """
+    Grow the search tree below its root with several threads (see run_search()).
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The search tree (modified in place).
+    iterations : int
+        The number of MCTS iterations the root should have (including visits of a reused root).
+    num_threads : int
+        The number of search threads.
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf (no depth limit).
+    virtual_loss : int, optional
+        The virtual loss added to each node on the path of a search in progress. Default is 1.
+    """
+    search = SharedTreeSearch(tree, iterations - int(tree.visits[tree.root]), max_depth=max_depth, virtual_loss=virtual_loss)
+    threads = [threading.Thread(target=search.run) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class SharedTreeSearch:
+    """
+    State shared by the threads searching the same tree: the tree, the number of
+    remaining iterations, and the locks.
+
+    Parameters
+    ----------
+    tree : SearchTree
+        The shared search tree.
+    iterations : int
+        The number of iterations to run (by all threads together).
+    max_depth : float, optional
+        The maximum depth of the simulations. Default is np.inf.
+    virtual_loss : int, optional
+        The virtual loss added to each node on the path of a search in progress. Default is 1.
+    """
+    def __init__(self, tree: SearchTree, iterations: int, max_depth=np.inf, virtual_loss: int = 1):
+        self.tree = tree
+        tree.reserve(max(iterations, 0))  # at most one new node per iteration, the arrays must not be resized
+        self.remaining_iterations = iterations
+        self.max_depth = max_depth
+        self.virtual_loss = virtual_loss
+        self.iterations_lock = threading.Lock()
+        self.expansion_lock = threading.Lock()  # protects adding nodes and the transposition table
+        self.node_locks = [threading.Lock() for _ in range(NUM_NODE_LOCKS)]
+
+    def node_lock(self, node: int) -> threading.Lock:
+        """Returns the lock protecting the given node."""
+        return self.node_locks[node % NUM_NODE_LOCKS]
+
+    def claim_iteration(self) -> bool:
+        """Reserve one of the remaining iterations, returns False if none are left."""
+        with self.iterations_lock:
+            if self.remaining_iterations <= 0:
+                return False
+            self.remaining_iterations -= 1
+            return True
+
+    def run(self) -> None:
+        """Main loop of a search thread."""
+        scratch_board = Board()  # one scratch board per thread
+        while self.tree.proven[self.tree.root] == NOT_PROVEN and self.claim_iteration():
+            path = self.select_and_expand()
+            simulation_result, _ = simulation(self.tree, path[-1], max_simulation_depth=self.max_depth, board=scratch_board)
+            self.backpropagate(path, simulation_result)
+            if self.tree.proven[path[-1]] != NOT_PROVEN:
+                with self.expansion_lock:  # proofs are only changed under the expansion lock
+                    propagate_proof(self.tree, path)
+
+    def select_and_expand(self) -> list[int]:
+        """
+        Descend from the root to a node to expand (see selection()), expand it and
+        return the path from the root to the new node (or to a proven node). A virtual 
+        loss is added to every node of the path.
+        """
+        tree = self.tree
+        node = tree.root
+        with self.node_lock(node):
+            tree.virtual_loss[node] += self.virtual_loss
+        path = [node]
+        while True:
+            with self.node_lock(node):
+                if tree.proven[node] != NOT_PROVEN:
+                    return path  # the result is known, nothing to expand
+                num_children = tree.num_children[node]
+                expanded = num_children < tree.actions_mask(node).bit_count()
+                if expanded:
+                    # the node lock makes sure that no other thread expands the same action,
+                    # the expansion lock that no other thread adds a node at the same time
+                    with self.expansion_lock:
+                        child = expansion(tree, node)
+                else:
+                    child = get_child_node_with_highest_UCT(tree, node)
+                    if child == NO_NODE:
+                        # all children are proven losses (see selection())
+                        with self.expansion_lock:
+                            update_proof(tree, node)
+                        return path
+            # node locks are never nested (a node and its child may share the same striped lock)
+            with self.node_lock(child):
+                tree.virtual_loss[child] += self.virtual_loss
+            path.append(child)
+            if expanded:
+                return path
+            node = child
+
+    def backpropagate(self, path: list[int], simulation_result: float) -> None:
+        """
+        Update the nodes of the path with the simulation result (see backpropagation())
+        and remove the virtual losses added during selection.
+        """
+        tree = self.tree
+        for node in reversed(path):
+            with self.node_lock(node):
+                tree.visits[node] += 1
+                tree.value[node] += simulation_result
+                if simulation_result > 0:
+                    tree.wins[node] += simulation_result
+                tree.virtual_loss[node] -= self.virtual_loss
+            simulation_result *= -1  # flip player perspective at each level
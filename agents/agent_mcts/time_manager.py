@@ -0,0 +1,95 @@
+"""
+Time management for games with a total time budget (game clock) per player.
+
+The TimeManager splits the remaining time of a player across the player's remaining
+moves. Positions in which the search is uncertain about the best move (the visits of
+the root children are spread out) get more time than clear positions.
+"""
+
+from typing import Optional
+
+from game_utils import BOARD_CELLS
+from agents.agent_mcts.tree import SearchTree
+
+# budget of a move in seconds when the clock is (almost) spent, the move still has to be searched
+MIN_TIME_LIMIT = 0.001
+
+
+class TimeManager:
+    """
+    Splits the total time of a player across the moves of a game.
+
+    Parameters
+    ----------
+    total_time : float
+        The time budget of the player for the whole game in seconds.
+    min_move_time : float, optional
+        The minimum time of a move in seconds (as long as there is time left). Default is 0.05.
+    max_share : float, optional
+        The maximum share of the remaining time that can be used for a single move. Default is 0.25.
+    expected_game_share : float, optional
+        The expected share of the remaining empty cells that are played before the game
+        ends (most games end before the board is full). Default is 0.7.
+
+    Attributes
+    ----------
+    remaining_time : float
+        The time left on the player's clock in seconds.
+    """
+    def __init__(self,
+                 total_time: float,
+                 min_move_time: float = 0.05,
+                 max_share: float = 0.25,
+                 expected_game_share: float = 0.7):
+        self.remaining_time = total_time
+        self.min_move_time = min_move_time
+        self.max_share = max_share
+        self.expected_game_share = expected_game_share
+
+    def move_time(self, ply: int, uncertainty: float = 0.5) -> float:
+        """
+        Returns the time budget of the next move in seconds, at least MIN_TIME_LIMIT (also
+        when the clock is spent, as the move still has to be made).
+
+        The remaining time is split evenly across the expected remaining moves of the
+        player and scaled by the uncertainty of the position (from 0.5 times the even
+        share for a clear position to 1.5 times for a completely uncertain one).
+
+        Parameters
+        ----------
+        ply : int
+            The number of pieces on the board.
+        uncertainty : float, optional
+            The uncertainty of the position between 0 (clear) and 1 (uncertain),
+            see position_uncertainty(). Default is 0.5.
+        """
+        if self.remaining_time <= 0:
+            return MIN_TIME_LIMIT
+        # each player makes every second move of the remaining ones
+        expected_moves = max(self.expected_game_share * (BOARD_CELLS - ply) / 2, 1)
+        move_time = self.remaining_time / expected_moves * (0.5 + uncertainty)
+        move_time = min(move_time, self.max_share * self.remaining_time)
+        return max(min(max(move_time, self.min_move_time), self.remaining_time), MIN_TIME_LIMIT)
+
+    def update(self, elapsed_time: float) -> None:
+        """Subtract the time used by a move from the remaining time."""
+        self.remaining_time -= elapsed_time
+
+
+def position_uncertainty(tree: Optional[SearchTree]) -> float:
+    """
+    Returns how uncertain the search is about the best move of the root of the tree:
+    0 if all visits went to one child, 1 if the visits are spread evenly over all
+    children, and 0.5 if there is no tree or its root has no visited children.
+    """
+    if tree is None:
+        return 0.5
+    visits = tree.visits[tree.child_nodes(tree.root)]
+    total_visits = visits.sum()
+    if total_visits == 0:
+        return 0.5
+    if visits.size == 1:
+        return 0.0
+    best_share = visits.max() / total_visits
+    # normalize: the best share is at least 1 / number of children
+    return float((1 - best_share) / (1 - 1 / visits.size))
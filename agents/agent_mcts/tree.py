@@ -1,62 +1,464 @@
 """
-TreeNode class inspired by:
-https://medium.com/pythoneers/getting-started-with-trees-in-python-a-beginners-guide-4e68818e7c05
+Array-backed search tree of the MCTS agent.
+
+The nodes are stored as a struct of arrays: every node is an index into preallocated
+NumPy arrays (one array per field), which grow by doubling when they are full. A node
+needs less than 100 bytes instead of a Python object with its own attribute dict and
+lists, and the search reads and writes plain values without any attribute lookups.
 """
 
+import sys
 import numpy as np
-from typing import Optional, List, TYPE_CHECKING
+from typing import NamedTuple, Optional, TYPE_CHECKING
+from game_utils import (
+    Bitboard, BOARD_COLS, BOARD_CELLS, CANONICAL_ACTIONS_MASK, MIRRORED_ACTIONS,
+    board_to_bitboard, bitboard_to_board, zobrist_hash, bitboard_connected_four, bitboard_player_pieces,
+    bitboard_is_full, bitboard_apply_action, bitboard_canonical, bitboard_is_symmetric,
+    bitboard_valid_actions_mask, mirror_action
+)
 
 if TYPE_CHECKING:
     from game_utils import PlayerAction, BoardPiece
 
-class TreeNode:
+NO_NODE = -1  # index of a missing node (no parent, action not expanded)
+
+# proven game result of a node for the player who made the move leading to it
+NOT_PROVEN, PROVEN_WIN, PROVEN_DRAW, PROVEN_LOSS = 0, 1, 2, 3
+PROVEN_RESULTS = (0, 1, 0, -1)  # simulation result of a proven node, indexed by its proof
+
+# name, dtype and shape (per node) of the node arrays
+NODE_FIELDS = (
+    ("position", np.uint64, ()),
+    ("mask", np.uint64, ()),
+    ("hash", np.uint64, ()),
+    ("parent", np.int32, ()),
+    ("player", np.int8, ()),
+    ("previous_action", np.int8, ()),
+    ("visits", np.int64, ()),
+    ("wins", np.float64, ()),
+    ("value", np.float64, ()),
+    ("amaf_visits", np.int64, ()),
+    ("amaf_wins", np.float64, ()),
+    ("virtual_loss", np.int32, ()),
+    ("proven", np.int8, ()),
+    ("symmetric", np.bool_, ()),
+    ("num_children", np.int8, ()),
+    ("children", np.int32, (BOARD_COLS,)),
+)
+NODE_BYTES = sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for _, dtype, shape in NODE_FIELDS)
+# estimated size of a transposition table entry: 64-bit hash and node index (int objects), dict slot
+TABLE_ENTRY_BYTES = sys.getsizeof(2**63) + sys.getsizeof(2**20) + 3 * 8
+MIN_CAPACITY = 1024  # the node arrays are not shrunk below this capacity
+MIN_MAX_NODES = 2 * BOARD_CELLS  # smallest node budget, a larger tree always has a leaf to evict
+EVICTION_FRACTION = 16  # 1/EVICTION_FRACTION of the node budget is evicted at once
+
+
+class TreeMemory(NamedTuple):
+    """Size of a search tree: number of nodes, allocated nodes, allocated bytes, and evicted nodes."""
+    num_nodes: int
+    capacity: int
+    num_bytes: int
+    num_evictions: int
+
+
+class RerootReport(NamedTuple):
+    """Number of nodes and bytes kept and released when moving the root of a search tree."""
+    retained_nodes: int
+    freed_nodes: int
+    retained_bytes: int
+    freed_bytes: int
+
+
+class SearchTree:
     """
-    Represents a node in the Monte Carlo Tree Search (MCTS) tree.
+    Monte Carlo search tree stored as a struct of arrays, indexed by node.
+
+    A node is an int (index of the arrays). The game state of a node is stored as its
+    bitboard (position, mask) and its Zobrist hash, the children as a table with one
+    slot per action (column), holding the index of the child or NO_NODE if the action
+    has not been expanded yet. With transpositions, positions reached by different
+    move orders share a single node, so a node can be the child of several nodes
+    (the tree becomes a directed acyclic graph); parent is the node that created it.
+
+    The tree is also the saved state of the agent between moves: the root is moved
+    to the node of the current game state (see advance()), and all nodes that can not
+    be reached from the new root any more are released (see reroot()).
+
+    With symmetry, every node stores the canonical form of its position (see
+    bitboard_canonical()), so a position and its mirror image share a node through the
+    transposition table, and the actions of a node refer to its stored (possibly mirrored)
+    bitboard. Only the root has to know its orientation (root_mirrored): actions are
+    translated between the game and the root with root_action(). A symmetric node only
+    gets children for the actions that are not mirror images of others (see actions_mask()).
+
+    With a node budget (max_nodes), the node arrays never grow beyond the budget. 
+    When the budget is reached, the least visited leaves are evicted: they are unlinked 
+    from their parents (which can expand them again later) and their indices are put 
+    on a free list, from which the following new nodes are taken.
 
     Attributes
     ----------
-    board : np.ndarray
-        The game state at this node.
-    previous_action : Optional[PlayerAction]
-        The action taken to reach this node from its parent.
-    parent : Optional[TreeNode]
-        The parent node in the tree.
-    player : Optional[BoardPiece]
-        The player whose turn it is at this node.
-    children : List[TreeNode]
-        List of child nodes (possible next moves).
-    value : float
-        The cumulative value of this node based on simulations.
-    wins : int
-        The number of simulation wins from this node's perspective.
-    visits : int
-        The number of times this node has been visited.
-    uct_score : float
-        The calculated UCT (Upper Confidence Bound) score for this node.
-    expanded_actions : List[PlayerAction]
-        The list of actions already expanded from this node.
+    root : int
+        The node of the current game state.
+    root_mirrored : bool
+        Whether the root stores the mirror image of the current game state (with symmetry).
+    symmetry : bool
+        Whether the nodes store canonical positions.
+    table : Optional[dict[int, int]]
+        Transposition table mapping the Zobrist hash of a position to its node, None if
+        transpositions are not used.
+    position, mask, hash : np.ndarray
+        Bitboard (PLAYER1 pieces, all pieces) and Zobrist hash of each node.
+    parent : np.ndarray
+        The (first) parent of each node, NO_NODE for the first root.
+    player : np.ndarray
+        The player who made the move leading to each node (the opponent moves next).
+    previous_action : np.ndarray
+        The action leading from the parent to each node (-1 for the first root).
+    visits, wins, value : np.ndarray
+        Number of visits, simulation wins (from the node's player's perspective, fractional
+        for evaluated simulations) and cumulative simulation value of each node.
+    amaf_visits, amaf_wins : np.ndarray
+        All-moves-as-first statistics of each node (RAVE): number of simulations in which
+        the node's player played the node's action later on (from the parent), and the
+        wins among them.
+    virtual_loss : np.ndarray
+        Number of pending (virtual) losses of searches currently passing through each
+        node, used by the parallel searches to spread across branches.
+    proven : np.ndarray
+        The proven game result of each node for its player (PROVEN_WIN, PROVEN_DRAW, 
+        PROVEN_LOSS), or NOT_PROVEN. Terminal nodes are proven when they are added, 
+        other nodes when their children are proven (see update_proof() in mcts.py).
+    symmetric : np.ndarray
+        Whether each node is its own mirror image (only set with symmetry).
+    num_children : np.ndarray
+        Number of expanded actions of each node.
+    children : np.ndarray
+        Child table of shape (capacity, BOARD_COLS): children[node, action] is the child
+        reached by the action, or NO_NODE if the action has not been expanded.
+    last_reroot : Optional[RerootReport]
+        The nodes and bytes retained and freed by the last call of reroot().
+    max_nodes : Optional[int]
+        The node budget, None if the tree can grow without bound.
+    free_nodes : list[int]
+        Indices of evicted nodes that can be reused.
+    num_evictions : int
+        The total number of evicted nodes.
+
+    Parameters
+    ----------
+    board : np.ndarray, optional
+        The game state of the root. Either board or bitboard has to be given.
+    player : BoardPiece, optional
+        The player who made the move leading to the root.
+    bitboard : tuple[Bitboard, Bitboard], optional
+        The game state of the root as bitboard (position, mask).
+    transpositions : bool, optional
+        If True, a transposition table is kept (see expansion()). Default is True.
+    symmetry : bool, optional
+        If True, the nodes store canonical positions, so mirror images share a node and
+        symmetric nodes only get the children of distinct actions. Default is False.
+    capacity : int, optional
+        The number of nodes to allocate initially. Default is 1024.
+    max_nodes : int, optional
+        The maximum number of nodes (at least MIN_MAX_NODES). Default is None (no limit).
+    """
+    def __init__(self,
+                 board: Optional[np.ndarray] = None,
+                 player: Optional["BoardPiece"] = None,
+                 bitboard: Optional[tuple[Bitboard, Bitboard]] = None,
+                 transpositions: bool = True,
+                 capacity: int = 1024,
+                 max_nodes: Optional[int] = None,
+                 symmetry: bool = False):
+        if max_nodes is not None and max_nodes < MIN_MAX_NODES:
+            raise ValueError(f"max_nodes has to be at least {MIN_MAX_NODES}, got {max_nodes}.")
+        self.size = 0
+        self.capacity = 0
+        self.max_nodes = max_nodes
+        self.free_nodes: list[int] = []
+        self.num_evictions = 0
+        self.table: Optional[dict[int, int]] = {} if transpositions else None
+        self.last_reroot: Optional[RerootReport] = None
+        self.symmetry = symmetry
+        self.root_mirrored = False
+        self._allocate(self._limit_capacity(max(capacity, 1)))
+        if bitboard is None:
+            bitboard = board_to_bitboard(board)
+        if symmetry:
+            *bitboard, self.root_mirrored = bitboard_canonical(*bitboard)
+        self.root = self.add_node(*bitboard, zobrist_hash(*bitboard), NO_NODE, player or 0, -1)
+
+    def __len__(self) -> int:
+        """Returns the number of nodes of the tree."""
+        return self.size - len(self.free_nodes)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes allocated by the node arrays."""
+        return self.capacity * NODE_BYTES
+
+    def memory(self) -> TreeMemory:
+        """
+        Returns the number of nodes, the capacity and the allocated bytes (node arrays 
+        and estimated size of the transposition table) of the tree in O(1).
+        """
+        num_bytes = self.nbytes
+        if self.table is not None:
+            num_bytes += len(self.table) * TABLE_ENTRY_BYTES
+        return TreeMemory(len(self), self.capacity, num_bytes, self.num_evictions)
+
+    def _limit_capacity(self, capacity: int) -> int:
+        """Returns the capacity limited to the node budget."""
+        return capacity if self.max_nodes is None else min(capacity, self.max_nodes)
+
+    def _allocate(self, capacity: int) -> None:
+        """Resize the node arrays to the given capacity, keeping the existing nodes."""
+        for name, dtype, shape in NODE_FIELDS:
+            array = np.zeros((capacity, *shape), dtype=dtype)
+            if name == "children":
+                array.fill(NO_NODE)
+            if self.size:
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def reserve(self, num_nodes: int) -> None:
+        """Make sure that num_nodes more nodes can be added without resizing the arrays."""
+        if self.size + num_nodes > self.capacity:
+            self._allocate(self._limit_capacity(max(2 * self.capacity, self.size + num_nodes)))
+
+    def add_node(self,
+                 position: Bitboard,
+                 mask: Bitboard,
+                 hash_value: int,
+                 parent: int,
+                 player: "BoardPiece",
+                 previous_action: int) -> int:
+        """
+        Add a node (without linking it to its parent, see add_child()) and return its index.
+        The node is stored in the transposition table if there is one. If the node budget 
+        is reached, leaves are evicted first (see evict()), the parent is never evicted.
+        """
+        if not self.free_nodes and self.size == self.capacity:
+            if self.max_nodes is not None and self.capacity >= self.max_nodes:
+                self.evict(protected=parent)
+            else:
+                self._allocate(self._limit_capacity(2 * self.capacity))  # amortized O(1)
+        if self.free_nodes:
+            node = self.free_nodes.pop()
+        else:
+            node = self.size
+            self.size += 1
+        self.position[node] = position
+        self.mask[node] = mask
+        self.hash[node] = hash_value
+        self.parent[node] = parent
+        self.player[node] = player
+        self.previous_action[node] = previous_action
+        self.proven[node] = terminal_proof(position, mask, player)
+        self.symmetric[node] = self.symmetry and bitboard_is_symmetric(position, mask)
+        if self.table is not None:
+            self.table[hash_value] = node
+        return node
+
+    def evict(self, protected: int = NO_NODE) -> int:
+        """
+        Evict the least visited leaves (at most 1/EVICTION_FRACTION of the node budget, 
+        at least one): unlink them from all nodes they are a child of, remove them from 
+        the transposition table, and put them on the free list. The root, the protected 
+        node, and nodes on the path of a search in progress (virtual loss) are not evicted.
+
+        Returns
+        -------
+        int
+            The number of evicted nodes.
+        """
+        size = self.size
+        candidates = np.flatnonzero((self.num_children[:size] == 0) & (self.virtual_loss[:size] == 0))
+        candidates = candidates[(candidates != protected) & (candidates != self.root)]
+        if candidates.size == 0:
+            raise MemoryError(f"No node can be evicted from the search tree ({len(self)} nodes).")
+        num_victims = min(candidates.size, max(1, (self.max_nodes or size) // EVICTION_FRACTION))
+        victims = candidates[np.argpartition(self.visits[candidates], num_victims - 1)[:num_victims]]
+
+        # with transpositions a node can be the child of several nodes, so the whole table is searched
+        links = np.isin(self.children[:size], victims)
+        self.num_children[:size] -= links.sum(axis=1, dtype=np.int8)
+        self.children[:size][links] = NO_NODE
+        self.parent[:size][np.isin(self.parent[:size], victims)] = NO_NODE
+        if self.table is not None:
+            for victim, hash_value in zip(victims.tolist(), self.hash[victims].tolist()):
+                if self.table.get(hash_value) == victim:
+                    del self.table[hash_value]
+        # reset the statistics for the reuse of the nodes
+        for name in ("visits", "wins", "value", "amaf_visits", "amaf_wins", "virtual_loss"):
+            getattr(self, name)[victims] = 0
+
+        self.free_nodes.extend(victims.tolist())
+        self.num_evictions += num_victims
+        return num_victims
+
+    def add_child(self, node: int, action: "PlayerAction", child: int) -> None:
+        """Link the child to the node as the node reached by the given action."""
+        self.children[node, action] = child
+        self.num_children[node] += 1
+
+    def lookup(self, hash_value: int, position: Bitboard, mask: Bitboard) -> int:
+        """
+        Returns the node of the given game state from the transposition table, or NO_NODE
+        if it is not in the table. The bitboard is compared as well, so hash collisions
+        can not link a wrong node.
+        """
+        if self.table is None:
+            return NO_NODE
+        node = self.table.get(hash_value, NO_NODE)
+        if node != NO_NODE and (self.position[node] != position or self.mask[node] != mask):
+            return NO_NODE
+        return node
+
+    def actions_mask(self, node: int) -> Bitboard:
+        """
+        Returns the bits of the cells of the actions the node can be expanded with: all
+        valid actions, except the mirror images of others if the node is symmetric.
+        """
+        actions = bitboard_valid_actions_mask(self.mask.item(node))
+        return actions & CANONICAL_ACTIONS_MASK if self.symmetric.item(node) else actions
+
+    def is_mirrored_child(self, node: int, action: "PlayerAction", child: int) -> bool:
+        """
+        Returns True if the child reached from the node by the action stores the mirror
+        image of the position the action leads to (only possible with symmetry).
+        """
+        if not self.symmetry:
+            return False
+        position, mask = bitboard_apply_action(*self.bitboard(node), action, self.player.item(child))
+        return self.position.item(child) != position or self.mask.item(child) != mask
+
+    def root_action(self, action: "PlayerAction") -> "PlayerAction":
+        """
+        Translates an action of the current game state into the action of the root and
+        back (the actions are mirrored if the root stores the mirror image).
+        """
+        return mirror_action(action) if self.root_mirrored else action
+
+    def move_root(self, action: "PlayerAction", child: int) -> "PlayerAction":
+        """
+        Make the child reached from the root by the action (of the root) the root, without
+        releasing any nodes. Returns the action of the current game state to be played.
+        """
+        game_action = self.root_action(action)
+        self.root_mirrored ^= self.is_mirrored_child(self.root, action, child)
+        self.root = child
+        return game_action
+
+    def bitboard(self, node: int) -> tuple[Bitboard, Bitboard]:
+        """Returns the bitboard (position, mask) of the node."""
+        return self.position.item(node), self.mask.item(node)
+
+    def board(self, node: int) -> np.ndarray:
+        """Returns the game state of the node as np.ndarray."""
+        return bitboard_to_board(*self.bitboard(node))
+
+    def get_child(self, node: int, action: "PlayerAction") -> int:
+        """Returns the child reached by the given action, or NO_NODE if it is not expanded."""
+        return int(self.children[node, action])
+
+    def expanded_actions(self, node: int) -> list["PlayerAction"]:
+        """Returns the actions already expanded from the node."""
+        return np.flatnonzero(self.children[node] != NO_NODE).tolist()
+
+    def child_nodes(self, node: int) -> list[int]:
+        """Returns the children of the node (in the order of the actions)."""
+        children = self.children[node]
+        return children[children != NO_NODE].tolist()
+
+    def mean_result(self, node: int) -> float:
+        """
+        Returns the mean simulation result of the node for its player as a game score
+        (1 win, 0.5 draw, 0 loss, evaluated simulations in between), 0.5 without visits.
+        Unlike wins / visits (the win rate), draws count as half a win.
+        """
+        visits = self.visits.item(node)
+        return 0.5 * (1 + self.value.item(node) / visits) if visits else 0.5
+
+    def advance(self, action: "PlayerAction") -> Optional["SearchTree"]:
+        """
+        Move the root to the child reached by the given action and release the rest of
+        the tree (see reroot()). Returns the tree, or None if the action has not been
+        expanded (the tree can not be reused).
+        """
+        action = self.root_action(action)
+        mirrored = False
+        if self.symmetric.item(self.root) and action in MIRRORED_ACTIONS:
+            # the mirror image of the position is reached by the mirrored action
+            action, mirrored = mirror_action(action), True
+        child = self.get_child(self.root, action)
+        if child == NO_NODE:
+            return None
+        self.root_mirrored ^= mirrored ^ self.is_mirrored_child(self.root, action, child)
+        self.reroot(child)
+        return self
+
+    def reroot(self, node: int) -> RerootReport:
+        """
+        Make the given node the root and release all nodes that can not be reached 
+        from it (the siblings and ancestors of the node and their subtrees).
+
+        The reachable nodes are copied into new (smaller) node arrays in their current 
+        order, the old arrays are released. The cost is linear in the number of nodes.
+
+        Returns
+        -------
+        RerootReport
+            The number of nodes and bytes retained and freed (also kept as last_reroot).
+        """
+        memory_before = self.memory()
+        # mark all nodes reachable from the node, one level of the tree at a time
+        reachable = np.zeros(self.size, dtype=bool)
+        reachable[node] = True
+        frontier = np.array([node])
+        while frontier.size:
+            children = self.children[frontier].ravel()
+            children = children[children != NO_NODE]
+            frontier = np.unique(children[~reachable[children]])
+            reachable[frontier] = True
+
+        kept = np.flatnonzero(reachable)
+        new_index = np.full(self.size + 1, NO_NODE, dtype=np.int32)  # new_index[NO_NODE] stays NO_NODE
+        new_index[kept] = np.arange(kept.size, dtype=np.int32)
+
+        old_arrays = {name: getattr(self, name)[kept] for name, _, _ in NODE_FIELDS}
+        old_arrays["children"] = new_index[old_arrays["children"]]
+        old_arrays["parent"] = new_index[old_arrays["parent"]]  # parents that are released become NO_NODE
+        self.size = 0
+        self.free_nodes = []  # free nodes are not reachable
+        self._allocate(min(self.capacity, max(2 * kept.size, MIN_CAPACITY)))
+        for name, array in old_arrays.items():
+            getattr(self, name)[:kept.size] = array
+        self.size = kept.size
+        self.root = int(new_index[node])
+        self.parent[self.root] = NO_NODE
+        if self.table is not None:
+            self.table = dict(zip(self.hash[:self.size].tolist(), range(self.size)))
+
+        memory_after = self.memory()
+        self.last_reroot = RerootReport(
+            retained_nodes=memory_after.num_nodes,
+            freed_nodes=memory_before.num_nodes - memory_after.num_nodes,
+            retained_bytes=memory_after.num_bytes,
+            freed_bytes=memory_before.num_bytes - memory_after.num_bytes,
+        )
+        return self.last_reroot
+
+
+def terminal_proof(position: Bitboard, mask: Bitboard, player: "BoardPiece") -> int:
+    """
+    Returns PROVEN_WIN if the player who made the last move has connected four, PROVEN_DRAW
+    if the board is full, and NOT_PROVEN if the game is still going on.
     """
-    def __init__(self, 
-                 board: np.ndarray,
-                 previous_action: Optional["PlayerAction"] = None,
-                 parent: Optional["TreeNode"] = None,
-                 player: Optional["BoardPiece"] = None):
-        self.board: np.ndarray = board
-        self.previous_action: Optional["PlayerAction"] = previous_action
-        self.parent: Optional["TreeNode"] = parent
-        self.player: Optional["BoardPiece"] = player
-
-        self.children: List["TreeNode"] = []
-        self.value: int = 0.0
-        self.wins: int = 0
-        self.visits: int = 0
-        self.uct_score: float = 0.0
-        self.expanded_actions: List["PlayerAction"] = []
-
-    def add_child(self, child: "TreeNode") -> None:
-        """Adds a child node to the current node."""
-        self.children.append(child)
-
-    def is_fully_expanded(self, all_valid_actions_count: int) -> bool:
-        """Returns True if this node has expanded all valid actions."""
-        return len(self.expanded_actions) >= all_valid_actions_count
+    if player and bitboard_connected_four(bitboard_player_pieces(position, mask, player)):
+        return PROVEN_WIN
+    if bitboard_is_full(mask):
+        return PROVEN_DRAW
+    return NOT_PROVEN
@@ -0,0 +1,444 @@
+"""
+Headless arena: matches of many games between two agents (any GenMove, e.g.
+generate_move_mcts with different settings or generate_move_random), played
+without any output across a pool of worker processes.
+
+The agents alternate who moves first. Every move is timed, and the match reports the
+score of the first agent, its Elo difference to the second agent with a confidence
+interval, and the latency percentiles of both agents. With an SPRT (sequential
+probability ratio test), the match stops as soon as the first agent is shown to be
+stronger (Elo difference at least elo1) or not (at most elo0).
+
+Usage: python arena.py AGENT_1 AGENT_2 [--games N] [--workers N] [--sprt ELO0 ELO1] [--seed N]
+
+An agent is given as name[:key=value,...] with a name of AGENTS and keyword arguments
+of its move generator, e.g.
+
+    python arena.py mcts:iterations=1000,rave=True mcts:iterations=1000 --games 200
+    python arena.py mcts:iterations=500 random --games 20 --workers 1
+    python arena.py mcts:playout_policy=heavy mcts --sprt 0 30
+
+The process-parallel agents (mcts-parallel, mcts-leaf-parallel) start worker processes
+themselves, so their matches are played in this process (--workers 1).
+"""
+
+import argparse
+import ast
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from functools import partial
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from game_utils import PLAYER1, PLAYER2, Board, GameState, GenMove, update_saved_state
+from agents.agent_random import generate_move_random
+from agents.agent_mcts import (
+    generate_move_mcts, generate_move_mcts_parallel, generate_move_mcts_threaded, generate_move_mcts_leaf_parallel
+)
+
+# move generators that can be selected by name on the command line
+AGENTS: dict[str, GenMove] = {
+    "mcts": generate_move_mcts,
+    "mcts-parallel": generate_move_mcts_parallel,
+    "mcts-threaded": generate_move_mcts_threaded,
+    "mcts-leaf-parallel": generate_move_mcts_leaf_parallel,
+    "random": generate_move_random,
+}
+# move generators that start worker processes themselves, which the daemonic workers of a
+# match pool can not do, so their matches are played in this process
+PROCESS_AGENTS = (generate_move_mcts_parallel, generate_move_mcts_leaf_parallel)
+LATENCY_PERCENTILES = (50, 90, 99, 100)  # percentiles of the move times reported by a match
+CONFIDENCE_Z = 1.959964  # z-score of the 95% confidence interval of the Elo difference
+ACCEPT_H0, ACCEPT_H1 = "H0", "H1"  # decisions of an SPRT: Elo difference elo0 (not stronger) / elo1 (stronger)
+
+
+class GameRecord(NamedTuple):
+    """
+    Result of a game of a match: the score of the first agent of the match (1 win, 0.5 draw,
+    0 loss), whether it moved first, the number of moves, whether the game was lost by an
+    illegal move, and the move times in seconds of both agents of the match.
+    """
+    score: float
+    agent_1_first: bool
+    num_moves: int
+    illegal_move: bool
+    move_times: tuple[list[float], list[float]]
+
+
+class EloEstimate(NamedTuple):
+    """Elo difference of the first agent to the second with the bounds of its confidence interval."""
+    elo: float
+    lower: float
+    upper: float
+
+
+class MatchResult(NamedTuple):
+    """
+    Result of a match from the perspective of the first agent.
+
+    Attributes
+    ----------
+    wins, draws, losses : int
+        The games won, drawn and lost by the first agent.
+    elo : EloEstimate
+        The Elo difference of the first agent to the second (95% confidence interval).
+    latencies : tuple[dict[float, float], dict[float, float]]
+        The move time percentiles in seconds (LATENCY_PERCENTILES) of both agents.
+    illegal_moves : int
+        The number of games lost by an illegal move.
+    llr : Optional[float]
+        The log-likelihood ratio of the SPRT, None without SPRT.
+    decision : Optional[str]
+        ACCEPT_H0 or ACCEPT_H1 if the SPRT stopped the match, otherwise None.
+    elapsed : float
+        The wall-clock time of the match in seconds.
+    """
+    wins: int
+    draws: int
+    losses: int
+    elo: EloEstimate
+    latencies: tuple[dict[float, float], dict[float, float]]
+    illegal_moves: int
+    llr: Optional[float]
+    decision: Optional[str]
+    elapsed: float
+
+    @property
+    def num_games(self) -> int:
+        """The number of games played."""
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        """The mean score of the first agent (1 win, 0.5 draw, 0 loss)."""
+        return (self.wins + 0.5 * self.draws) / self.num_games if self.num_games else 0.5
+
+
+class SPRT(NamedTuple):
+    """
+    Sequential probability ratio test of the hypotheses H0: the Elo difference of the first
+    agent is elo0, and H1: it is elo1 (elo1 > elo0), with the error rates alpha (accepting H1
+    when H0 is true) and beta (accepting H0 when H1 is true).
+
+    The log-likelihood ratio uses the normal approximation of the mean game score
+    (the generalized SPRT used by engine testing frameworks), so draws are taken into account.
+    """
+    elo0: float = 0.0
+    elo1: float = 30.0
+    alpha: float = 0.05
+    beta: float = 0.05
+
+    def bounds(self) -> tuple[float, float]:
+        """Returns the bounds of the log-likelihood ratio below which H0 and above which H1 is accepted."""
+        return math.log(self.beta / (1 - self.alpha)), math.log((1 - self.beta) / self.alpha)
+
+    def llr(self, wins: int, draws: int, losses: int) -> float:
+        """Returns the log-likelihood ratio of H1 to H0 after the given games."""
+        num_games = wins + draws + losses
+        if num_games == 0:
+            return 0.0
+        num_games, score, variance = regularized_score_statistics(wins, draws, losses)
+        score0, score1 = elo_to_score(self.elo0), elo_to_score(self.elo1)
+        return num_games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+    def decision(self, wins: int, draws: int, losses: int) -> Optional[str]:
+        """Returns ACCEPT_H0 or ACCEPT_H1 if the test is decided after the given games, otherwise None."""
+        lower, upper = self.bounds()
+        llr = self.llr(wins, draws, losses)
+        if llr >= upper:
+            return ACCEPT_H1
+        if llr <= lower:
+            return ACCEPT_H0
+        return None
+
+
+def elo_to_score(elo: float) -> float:
+    """Returns the expected score of an Elo difference (logistic model)."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score: float) -> float:
+    """Returns the Elo difference of an expected score (+-inf for a score of 1 or 0)."""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return 400 * math.log10(score / (1 - score))
+
+
+def score_statistics(wins: int, draws: int, losses: int) -> tuple[float, float]:
+    """Returns the mean and the variance of the score of a single game."""
+    num_games = wins + draws + losses
+    score = (wins + 0.5 * draws) / num_games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / num_games
+    return score, variance
+
+
+def regularized_score_statistics(wins: int, draws: int, losses: int) -> tuple[int, float, float]:
+    """
+    Returns the number of games and the mean and variance of the score of a single game
+    (see score_statistics()). If all games ended the same way, pseudo-games are added so
+    the spread of the scores is not zero and a perfect score is not an infinite Elo
+    difference: a draw if all games were won or lost, a win and a loss if all were drawn.
+    """
+    num_games = wins + draws + losses
+    score, variance = score_statistics(wins, draws, losses)
+    if variance == 0:
+        if draws == num_games:
+            wins, losses, num_games = wins + 1, losses + 1, num_games + 2
+        else:
+            draws, num_games = draws + 1, num_games + 1
+        score, variance = score_statistics(wins, draws, losses)
+    return num_games, score, variance
+
+
+def elo_estimate(wins: int, draws: int, losses: int, z: float = CONFIDENCE_Z) -> EloEstimate:
+    """
+    Returns the Elo difference of the given results with the confidence interval of the
+    mean score (z standard errors on both sides) converted to Elo. If all games ended the
+    same way (e.g. all won), a draw is added (see regularized_score_statistics()), so the
+    estimate and one bound of the interval are finite, the other bound is +-inf.
+    """
+    if wins + draws + losses == 0:
+        return EloEstimate(0.0, -math.inf, math.inf)
+    num_games, score, variance = regularized_score_statistics(wins, draws, losses)
+    margin = z * math.sqrt(variance / num_games)
+    return EloEstimate(score_to_elo(score), score_to_elo(score - margin), score_to_elo(score + margin))
+
+
+def latency_percentiles(move_times: list[float], percentiles=LATENCY_PERCENTILES) -> dict[float, float]:
+    """Returns the given percentiles (100 is the maximum) of the move times."""
+    if not move_times:
+        return {percentile: math.nan for percentile in percentiles}
+    values = np.percentile(move_times, percentiles)
+    return dict(zip(percentiles, values.tolist()))
+
+
+def play_game(agent_1: GenMove, agent_2: GenMove) -> tuple[float, int, bool, tuple[list[float], list[float]]]:
+    """
+    Play a game without any output, agent_1 moves first. The saved state of each agent is
+    advanced by the action of the opponent (see update_saved_state()), an illegal move
+    loses the game.
+
+    Returns
+    -------
+    tuple[float, int, bool, tuple[list[float], list[float]]]
+        The score of agent_1, the number of moves, whether the game was lost by an illegal
+        move, and the move times of both agents in seconds.
+    """
+    board = Board()
+    agents = (agent_1, agent_2)
+    saved_states = [None, None]
+    move_times: tuple[list[float], list[float]] = ([], [])
+    action = None
+    while True:
+        for idx, player in enumerate((PLAYER1, PLAYER2)):
+            if saved_states[idx] and action is not None:
+                saved_states[idx] = update_saved_state(saved_states[idx], action)
+            t0 = time.perf_counter()
+            action, saved_states[idx] = agents[idx](board.to_array(), player, saved_states[idx])
+            move_times[idx].append(time.perf_counter() - t0)
+            action = int(action)
+            if not 0 <= action < len(board.heights) or not board.can_play(action):
+                return 0.0 if idx == 0 else 1.0, board.ply, True, move_times
+            board.play(action)
+            end_state = board.check_end_state()
+            if end_state == GameState.IS_WIN:
+                return 1.0 if idx == 0 else 0.0, board.ply, False, move_times
+            if end_state == GameState.IS_DRAW:
+                return 0.5, board.ply, False, move_times
+
+
+def _play_match_game(agents: tuple[GenMove, GenMove], game: tuple[int, int]) -> GameRecord:
+    """
+    Play a game of a match in a worker process. The game index decides who moves first
+    (the first agent in even games), the seed makes the random streams of the game reproducible.
+    """
+    game_idx, seed = game
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    agent_1_first = game_idx % 2 == 0
+    if agent_1_first:
+        score, num_moves, illegal_move, move_times = play_game(*agents)
+    else:
+        score, num_moves, illegal_move, move_times = play_game(agents[1], agents[0])
+        score, move_times = 1 - score, move_times[::-1]
+    return GameRecord(score, agent_1_first, num_moves, illegal_move, move_times)
+
+
+def starts_processes(agent: GenMove) -> bool:
+    """Returns True if the move generator (or the function of a partial) is one of PROCESS_AGENTS."""
+    while isinstance(agent, partial):
+        agent = agent.func
+    return agent in PROCESS_AGENTS
+
+
+def match_workers(agent_1: GenMove, agent_2: GenMove, num_games: int, num_workers: Optional[int] = None) -> int:
+    """
+    Returns the number of worker processes of a match: num_workers (default: number of CPU
+    cores), at most one per game. With one of PROCESS_AGENTS the match is played in this
+    process (default 1 worker), a ValueError is raised if more workers are requested.
+    """
+    if starts_processes(agent_1) or starts_processes(agent_2):
+        if num_workers is not None and num_workers > 1 and num_games > 1:
+            raise ValueError("Process-parallel agents (mcts-parallel, mcts-leaf-parallel) start worker processes "
+                             "themselves and can not play in the match pool, use num_workers=1 (--workers 1).")
+        return 1
+    return min(num_workers or os.cpu_count() or 1, max(num_games, 1))
+
+
+def play_games(agent_1: GenMove,
+               agent_2: GenMove,
+               num_games: int,
+               num_workers: Optional[int] = None,
+               seed: Optional[int] = None) -> Iterator[GameRecord]:
+    """
+    Yields the records of the games of a match as soon as they are finished (not in the
+    order of the games). The games are played by a pool of num_workers processes (default:
+    number of CPU cores), or in this process if num_workers is 1 (see match_workers()).
+    The pool is terminated when the generator is closed, so a match can be stopped early.
+    """
+    num_workers = match_workers(agent_1, agent_2, num_games, num_workers)
+    seeds = np.random.SeedSequence(seed).generate_state(num_games, dtype=np.uint64).tolist()
+    games = list(enumerate(seeds))
+    play = partial(_play_match_game, (agent_1, agent_2))
+    if num_workers == 1:
+        yield from map(play, games)
+        return
+    pool = mp.Pool(num_workers)
+    try:
+        yield from pool.imap_unordered(play, games)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def run_match(agent_1: GenMove,
+              agent_2: GenMove,
+              num_games: int = 100,
+              num_workers: Optional[int] = None,
+              sprt: Optional[SPRT] = None,
+              seed: Optional[int] = None) -> MatchResult:
+    """
+    Play a match between two agents, alternating who moves first.
+
+    Parameters
+    ----------
+    agent_1, agent_2 : GenMove
+        The move generators, e.g. functools.partial(generate_move_mcts, iterations=1000).
+        They have to be picklable (module-level functions or partials of them) for a pool.
+    num_games : int, optional
+        The number of games, the maximum number of games with an SPRT. Default is 100.
+    num_workers : int, optional
+        The number of worker processes. Default is the number of CPU cores, 1 plays in this process.
+        Matches of PROCESS_AGENTS are always played in this process (ValueError for more workers).
+    sprt : SPRT, optional
+        If given, the match stops as soon as the SPRT accepts one of its hypotheses.
+    seed : int, optional
+        Seed from which the random streams of the games are derived.
+
+    Returns
+    -------
+    MatchResult
+        The results, Elo difference and move time percentiles from the first agent's perspective.
+    """
+    t0 = time.perf_counter()
+    wins = draws = losses = illegal_moves = 0
+    move_times: tuple[list[float], list[float]] = ([], [])
+    decision = None
+    match_workers(agent_1, agent_2, num_games, num_workers)  # rejects invalid workers before any game
+    games = play_games(agent_1, agent_2, num_games, num_workers, seed)
+    try:
+        for record in games:
+            wins += record.score == 1
+            draws += record.score == 0.5
+            losses += record.score == 0
+            illegal_moves += record.illegal_move
+            move_times[0].extend(record.move_times[0])
+            move_times[1].extend(record.move_times[1])
+            if sprt is not None:
+                decision = sprt.decision(wins, draws, losses)
+                if decision is not None:
+                    break
+    finally:
+        games.close()  # stops the workers of an early stopped match
+    return MatchResult(
+        wins=wins,
+        draws=draws,
+        losses=losses,
+        elo=elo_estimate(wins, draws, losses),
+        latencies=(latency_percentiles(move_times[0]), latency_percentiles(move_times[1])),
+        illegal_moves=illegal_moves,
+        llr=None if sprt is None else sprt.llr(wins, draws, losses),
+        decision=decision,
+        elapsed=time.perf_counter() - t0,
+    )
+
+
+def parse_agent(spec: str) -> GenMove:
+    """
+    Returns the move generator of an agent given as name[:key=value,...] (see AGENTS).
+    Values are Python literals (e.g. 1000, 0.5, True, None), anything else is a string.
+    """
+    name, _, arguments = spec.partition(":")
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent {name!r}, expected one of {tuple(AGENTS)}.")
+    kwargs = {}
+    for argument in filter(None, arguments.split(",")):
+        key, separator, value = argument.partition("=")
+        if not separator:
+            raise ValueError(f"Argument {argument!r} of agent {spec!r} is not of the form key=value.")
+        try:
+            kwargs[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            kwargs[key.strip()] = value.strip()
+    return partial(AGENTS[name], **kwargs) if kwargs else AGENTS[name]
+
+
+def format_match_result(result: MatchResult, names: tuple[str, str]) -> str:
+    """Returns a report of the match result."""
+    elo = result.elo
+    lines = [
+        f"{names[0]} vs. {names[1]}: {result.num_games} games in {result.elapsed:.1f}s",
+        f"wins {result.wins}, draws {result.draws}, losses {result.losses} (score {result.score:.3f}"
+        + (f", {result.illegal_moves} illegal moves)" if result.illegal_moves else ")"),
+        f"Elo {elo.elo:+.1f} (95% interval {elo.lower:+.1f} to {elo.upper:+.1f})",
+    ]
+    if result.llr is not None:
+        lines.append(f"SPRT: LLR {result.llr:.2f}, " + {
+            ACCEPT_H1: "H1 accepted (stronger)", ACCEPT_H0: "H0 accepted (not stronger)", None: "undecided",
+        }[result.decision])
+    header = " | ".join(f"p{percentile:g}" if percentile < 100 else "max" for percentile in LATENCY_PERCENTILES)
+    lines.append(f"move time [s] | {header}")
+    for name, latencies in zip(names, result.latencies):
+        lines.append(f"{name} | " + " | ".join(f"{value:.3f}" for value in latencies.values()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a headless match between two agents.")
+    parser.add_argument("agent_1", help="first agent, name[:key=value,...], e.g. mcts:iterations=1000")
+    parser.add_argument("agent_2", help="second agent")
+    parser.add_argument("--games", type=int, default=100, help="number of games (maximum with --sprt)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU cores)")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), default=None,
+                        help="stop as soon as the SPRT of elo0 against elo1 is decided")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        result = run_match(
+            parse_agent(args.agent_1),
+            parse_agent(args.agent_2),
+            num_games=args.games,
+            num_workers=args.workers,
+            sprt=None if args.sprt is None else SPRT(*args.sprt),
+            seed=args.seed,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    print(format_match_result(result, (args.agent_1, args.agent_2)))
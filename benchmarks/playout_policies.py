@@ -0,0 +1,110 @@
+"""
+Benchmark of the playout policies (agents/agent_mcts/playout.py): cost of a playout
+against the strength of the search using it.
+
+Usage: python benchmarks/playout_policies.py [games per match] [iterations of the random policy agent]
+
+1. Playouts per second of each policy from the empty board.
+2. Tactics: share of searches that block the opponent's three in a column
+   (tests/test_mcts.py::test_avoid_certain_defeat) for a growing number of iterations.
+3. Matches: the heavy policy agent with a fraction of the iterations against the random
+   policy agent (colors alternate, the endgame solver is disabled for both).
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game_utils import PLAYER1, PLAYER2, Board, GameState, initialize_game_state
+from agents.agent_mcts.mcts import generate_move_mcts, simulation_from_bitboard
+from agents.agent_mcts.playout import PLAYOUT_POLICIES, RANDOM_POLICY, HEAVY_POLICY
+
+
+def playouts_per_second(policy: str, num_playouts: int = 5000) -> float:
+    """Returns the playouts per second of the policy from the empty board."""
+    scratch_board = Board()
+    t0 = time.perf_counter()
+    for _ in range(num_playouts):
+        simulation_from_bitboard(0, 0, PLAYER2, board=scratch_board, policy=policy)
+    return num_playouts / (time.perf_counter() - t0)
+
+
+def block_rate(policy: str, iterations: int, num_trials: int = 20) -> float:
+    """Returns the share of searches that block the opponent's three in a column."""
+    board = initialize_game_state()
+    board[0:3, 3] = PLAYER1
+    board[0, 0] = board[0, 6] = PLAYER2  # PLAYER2 to move
+    blocks = 0
+    for _ in range(num_trials):
+        action, _ = generate_move_mcts(board, PLAYER2, None, iterations, solver_threshold=None, playout_policy=policy)
+        blocks += action == 3
+    return blocks / num_trials
+
+
+def play_game(agent_1, agent_2) -> tuple[GameState, int, dict[int, float]]:
+    """
+    Play a game between two agents (agent_1 moves first). Returns the end state, the player
+    who made the last move and the mean move time of each agent.
+    """
+    board = Board()
+    move_times = {PLAYER1: [], PLAYER2: []}
+    while True:
+        for player, agent in ((PLAYER1, agent_1), (PLAYER2, agent_2)):
+            t0 = time.perf_counter()
+            action, _ = agent(board.to_array(), player, None)
+            move_times[player].append(time.perf_counter() - t0)
+            board.play(int(action))
+            end_state = board.check_end_state()
+            if end_state != GameState.STILL_PLAYING:
+                return end_state, player, {p: float(np.mean(t)) for p, t in move_times.items()}
+
+
+def match(heavy_iterations: int, random_iterations: int, num_games: int) -> tuple[int, int, int, float, float]:
+    """
+    Play a match of the heavy policy agent against the random policy agent.
+    Returns wins, draws, losses of the heavy agent and the mean move times of both agents.
+    """
+    heavy = partial(generate_move_mcts, iterations=heavy_iterations, solver_threshold=None, playout_policy=HEAVY_POLICY)
+    light = partial(generate_move_mcts, iterations=random_iterations, solver_threshold=None, playout_policy=RANDOM_POLICY)
+    wins = draws = losses = 0
+    heavy_times, light_times = [], []
+    for game in range(num_games):
+        heavy_first = game % 2 == 0
+        agents = (heavy, light) if heavy_first else (light, heavy)
+        end_state, last_player, move_times = play_game(*agents)
+        heavy_player, light_player = (PLAYER1, PLAYER2) if heavy_first else (PLAYER2, PLAYER1)
+        heavy_times.append(move_times[heavy_player])
+        light_times.append(move_times[light_player])
+        if end_state == GameState.IS_DRAW:
+            draws += 1
+        elif last_player == heavy_player:
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses, float(np.mean(heavy_times)), float(np.mean(light_times))
+
+
+if __name__ == "__main__":
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    random_iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print("policy | playouts/s")
+    for policy in PLAYOUT_POLICIES:
+        print(f"{policy:>6} | {playouts_per_second(policy):10.0f}")
+
+    print("\niterations | " + " | ".join(f"{policy} block rate" for policy in PLAYOUT_POLICIES))
+    for iterations in (25, 50, 100, 200, 400):
+        rates = " | ".join(f"{block_rate(policy, iterations):17.2f}" for policy in PLAYOUT_POLICIES)
+        print(f"{iterations:10d} | {rates}")
+
+    print(f"\nheavy iterations vs. random {random_iterations} | wins draws losses | move time heavy / random")
+    for fraction in (1 / 8, 1 / 4, 1 / 2):
+        heavy_iterations = int(random_iterations * fraction)
+        wins, draws, losses, heavy_time, light_time = match(heavy_iterations, random_iterations, num_games)
+        print(f"{heavy_iterations:>31d} | {wins:4d} {draws:5d} {losses:6d} | {heavy_time:.3f}s / {light_time:.3f}s")
@@ -0,0 +1,90 @@
+"""
+Benchmark of RAVE (rapid action value estimation, generate_move_mcts(..., rave=True)):
+strength per iteration against the default search.
+
+Usage: python benchmarks/rave.py [games per match] [iterations of the default agent]
+
+1. Iterations per second of a search from the empty board with and without RAVE.
+2. Tactics: share of searches that block the opponent's three in a column for a growing
+   number of iterations.
+3. Matches: the RAVE agent with a fraction of the iterations against the default agent
+   (colors alternate, the endgame solver is disabled for both).
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game_utils import PLAYER1, PLAYER2, GameState, initialize_game_state
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import generate_move_mcts, run_search
+from playout_policies import play_game
+
+
+def iterations_per_second(rave: bool, iterations: int = 4000) -> float:
+    """Returns the iterations per second of a search from the empty board."""
+    tree = SearchTree(initialize_game_state(), player=PLAYER2)
+    t0 = time.perf_counter()
+    run_search(tree, iterations, rave=rave)
+    return iterations / (time.perf_counter() - t0)
+
+
+def block_rate(rave: bool, iterations: int, num_trials: int = 20) -> float:
+    """Returns the share of searches that block the opponent's three in a column."""
+    board = initialize_game_state()
+    board[0:3, 3] = PLAYER1
+    board[0, 0] = board[0, 6] = PLAYER2  # PLAYER2 to move
+    blocks = 0
+    for _ in range(num_trials):
+        action, _ = generate_move_mcts(board, PLAYER2, None, iterations, solver_threshold=None, rave=rave)
+        blocks += action == 3
+    return blocks / num_trials
+
+
+def match(rave_iterations: int, default_iterations: int, num_games: int) -> tuple[int, int, int, float, float]:
+    """
+    Play a match of the RAVE agent against the default agent.
+    Returns wins, draws, losses of the RAVE agent and the mean move times of both agents.
+    """
+    rave = partial(generate_move_mcts, iterations=rave_iterations, solver_threshold=None, rave=True)
+    default = partial(generate_move_mcts, iterations=default_iterations, solver_threshold=None)
+    wins = draws = losses = 0
+    rave_times, default_times = [], []
+    for game in range(num_games):
+        rave_first = game % 2 == 0
+        end_state, last_player, move_times = play_game(*((rave, default) if rave_first else (default, rave)))
+        rave_player = PLAYER1 if rave_first else PLAYER2
+        rave_times.append(move_times[rave_player])
+        default_times.append(move_times[PLAYER2 if rave_first else PLAYER1])
+        if end_state == GameState.IS_DRAW:
+            draws += 1
+        elif last_player == rave_player:
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses, float(np.mean(rave_times)), float(np.mean(default_times))
+
+
+if __name__ == "__main__":
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    default_iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+
+    print("rave  | iterations/s")
+    for rave in (False, True):
+        print(f"{str(rave):5} | {iterations_per_second(rave):12.0f}")
+
+    print("\niterations | default block rate | rave block rate")
+    for iterations in (25, 50, 100, 200):
+        print(f"{iterations:10d} | {block_rate(False, iterations):18.2f} | {block_rate(True, iterations):15.2f}")
+
+    print(f"\nrave iterations vs. default {default_iterations} | wins draws losses | move time rave / default")
+    for fraction in (1 / 8, 1 / 4, 1 / 2):
+        rave_iterations = int(default_iterations * fraction)
+        wins, draws, losses, rave_time, default_time = match(rave_iterations, default_iterations, num_games)
+        print(f"{rave_iterations:>32d} | {wins:4d} {draws:5d} {losses:6d} | {rave_time:.3f}s / {default_time:.3f}s")
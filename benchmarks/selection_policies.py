@@ -0,0 +1,76 @@
+"""
+Benchmark of the selection policies (agents/agent_mcts/selection_policies.py): cost of
+the selection phase and strength of the search using them.
+
+Usage: python benchmarks/selection_policies.py [games per match] [iterations]
+
+1. Microseconds per selection (descent from the root to a node to expand) in a search
+   tree grown from the empty board, and iterations per second of a search.
+2. Matches: each policy against UCB1 with the same number of iterations
+   (colors alternate, the endgame solver is disabled for both).
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game_utils import PLAYER1, PLAYER2, GameState, initialize_game_state
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import generate_move_mcts, run_search, selection
+from agents.agent_mcts.selection_policies import SELECTION_POLICIES, UCB1_POLICY, make_selection_policy
+from playout_policies import play_game
+
+
+def selection_time(policy_name: str, tree_iterations: int = 20000, num_selections: int = 20000) -> float:
+    """Returns the microseconds per selection in a tree grown with the policy."""
+    tree = SearchTree(initialize_game_state(), player=PLAYER2)
+    run_search(tree, tree_iterations, selection_policy=policy_name)
+    policy = make_selection_policy(policy_name)
+    t0 = time.perf_counter()
+    for _ in range(num_selections):
+        selection(tree, tree.root, policy=policy)
+    return (time.perf_counter() - t0) / num_selections * 1e6
+
+
+def iterations_per_second(policy_name: str, iterations: int = 4000) -> float:
+    """Returns the iterations per second of a search from the empty board."""
+    tree = SearchTree(initialize_game_state(), player=PLAYER2)
+    t0 = time.perf_counter()
+    run_search(tree, iterations, selection_policy=policy_name)
+    return iterations / (time.perf_counter() - t0)
+
+
+def match(policy_name: str, iterations: int, num_games: int) -> tuple[int, int, int]:
+    """Play a match of the policy against UCB1. Returns wins, draws, losses of the policy."""
+    agent = partial(generate_move_mcts, iterations=iterations, solver_threshold=None, selection_policy=policy_name)
+    ucb1 = partial(generate_move_mcts, iterations=iterations, solver_threshold=None)
+    wins = draws = losses = 0
+    for game in range(num_games):
+        agent_first = game % 2 == 0
+        end_state, last_player, _ = play_game(*((agent, ucb1) if agent_first else (ucb1, agent)))
+        if end_state == GameState.IS_DRAW:
+            draws += 1
+        elif last_player == (PLAYER1 if agent_first else PLAYER2):
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses
+
+
+if __name__ == "__main__":
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print("policy     | us/selection | iterations/s")
+    for name in SELECTION_POLICIES:
+        print(f"{name:10} | {selection_time(name):12.1f} | {iterations_per_second(name):12.0f}")
+
+    print(f"\npolicy vs. ucb1 ({iterations} iterations) | wins draws losses")
+    for name in SELECTION_POLICIES:
+        if name != UCB1_POLICY:
+            wins, draws, losses = match(name, iterations, num_games)
+            print(f"{name:>32} | {wins:4d} {draws:5d} {losses:6d}")
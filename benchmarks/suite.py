@@ -0,0 +1,312 @@
+"""
+Benchmark suite of the hot paths, with baselines stored as JSON to catch performance
+regressions. Runs offline with the standard library and NumPy only.
+
+Usage: python benchmarks/suite.py [--save PATH] [--compare PATH] [--threshold T] [--quick] [--only NAME ...]
+
+Cases (fixed seeds and budgets, see CASES):
+- connected_four, get_all_valid_actions, generate_random_move: the board functions
+- simulation: a random playout from the empty board
+- generate_move_mcts[N]: a move with N iterations from the empty board and a middle game position
+- tree_memory: nodes and bytes of the search tree after a growing number of iterations
+
+Every timed case reports the operations per second (of the fastest sample), the percentiles
+of the time per operation (p50, p90, p99 over the samples) and the peak memory allocated by one operation
+(tracemalloc, measured after the timing). --save writes the results as JSON baseline,
+--compare reads a baseline and exits with code 1 if a metric regressed by more than its
+threshold (REGRESSION_THRESHOLDS, or --threshold for all metrics). Timings of
+different machines are not comparable, so keep one baseline per machine.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game_utils import PLAYER1, PLAYER2, Board, connected_four, initialize_game_state
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import (
+    generate_move_mcts, generate_random_move, get_all_valid_actions, run_search, simulation
+)
+
+SEED = 12345
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "baseline.json")
+TREE_MEMORY_ITERATIONS = (1000, 4000, 16000)
+MIDDLE_GAME_MOVES = (3, 3, 2, 4, 4, 2, 5, 1, 3, 6)  # moves of the middle game position (no immediate wins)
+# allowed relative change of each metric before it counts as a regression
+REGRESSION_THRESHOLDS = {
+    "ops_per_sec": 0.25,
+    "p50_us": 0.25,
+    "p90_us": 0.5,
+    "p99_us": 1.0,  # the tail of the samples is the noisiest
+    "peak_kib": 0.1,
+    "nodes": 0.1,
+    "kib": 0.1,
+}
+HIGHER_IS_BETTER = {"ops_per_sec"}
+
+# metric name -> value, e.g. {"ops_per_sec": 1e5, "p50_us": 9.8, ...}
+Metrics = dict[str, float]
+
+
+class BenchmarkCase(NamedTuple):
+    """
+    A timed benchmark: setup() prepares the state (seeded, outside the timing) and returns
+    the operation, which is called number times per sample for repeat samples.
+    """
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    number: int
+    repeat: int
+
+
+class Regression(NamedTuple):
+    """A metric of a case that is worse than in the baseline by more than the threshold."""
+    case: str
+    metric: str
+    baseline: float
+    current: float
+    threshold: float
+
+    def __str__(self) -> str:
+        change = self.current / self.baseline - 1 if self.baseline else float("inf")
+        return (f"{self.case} {self.metric}: {self.baseline:.4g} -> {self.current:.4g} "
+                f"({change:+.1%}, threshold {self.threshold:.0%})")
+
+
+def seed_all(seed: int = SEED) -> None:
+    """Seed the random streams used by the agents (random and NumPy)."""
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def middle_game_board() -> np.ndarray:
+    """Returns the board of the middle game position (MIDDLE_GAME_MOVES from the empty board)."""
+    board = Board()
+    for action in MIDDLE_GAME_MOVES:
+        board.play(action)
+    return board.to_array()
+
+
+def _setup_connected_four():
+    board = middle_game_board()
+    return lambda: connected_four(board, 3, PLAYER1)
+
+
+def _setup_get_all_valid_actions():
+    board = middle_game_board()
+    return lambda: get_all_valid_actions(board)
+
+
+def _setup_generate_random_move():
+    board = middle_game_board()
+    return lambda: generate_random_move(board, excluded_actions=[3])
+
+
+def _setup_simulation():
+    tree = SearchTree(initialize_game_state(), player=PLAYER2)
+    scratch_board = Board()
+    return lambda: simulation(tree, tree.root, board=scratch_board)
+
+
+def _setup_generate_move(board: np.ndarray, player, iterations: int):
+    def setup():
+        # early stop off, so every move runs the full budget
+        return lambda: generate_move_mcts(board, player, None, iterations, early_stop=False, solver_threshold=None)
+    return setup
+
+
+CASES = (
+    BenchmarkCase("connected_four", _setup_connected_four, number=2000, repeat=20),
+    BenchmarkCase("get_all_valid_actions", _setup_get_all_valid_actions, number=2000, repeat=20),
+    BenchmarkCase("generate_random_move", _setup_generate_random_move, number=2000, repeat=20),
+    BenchmarkCase("simulation", _setup_simulation, number=200, repeat=20),
+    BenchmarkCase("generate_move_mcts[1000]", _setup_generate_move(initialize_game_state(), PLAYER1, 1000),
+                  number=1, repeat=7),
+    BenchmarkCase("generate_move_mcts[1000] middle game", _setup_generate_move(middle_game_board(), PLAYER1, 1000),
+                  number=1, repeat=7),
+)
+
+
+def run_case(case: BenchmarkCase, scale: float = 1.0) -> Metrics:
+    """
+    Time a case and measure the peak memory of one operation. The number of calls per
+    sample is scaled by scale (at least one call and three samples).
+    """
+    number = max(1, round(case.number * scale))
+    repeat = max(3, round(case.repeat * scale))
+    seed_all()
+    operation = case.setup()
+    operation()  # warm up caches and lazily built tables
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()  # as timeit, so collections of earlier garbage do not land in random samples
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                operation()
+            samples.append((time.perf_counter() - t0) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    seed_all()
+    operation = case.setup()
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(samples, (50, 90, 99)).tolist()
+    return {
+        # of the fastest sample (as timeit), the other samples are slowed down by other processes
+        "ops_per_sec": 1 / min(samples),
+        "p50_us": p50 * 1e6,
+        "p90_us": p90 * 1e6,
+        "p99_us": p99 * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def tree_memory(iterations: tuple[int, ...] = TREE_MEMORY_ITERATIONS) -> Metrics:
+    """Returns the nodes and KiB (nodes@N, kib@N) of a search tree after N iterations from the empty board."""
+    seed_all()
+    tree = SearchTree(initialize_game_state(), player=PLAYER2)
+    metrics = {}
+    for num_iterations in iterations:
+        run_search(tree, num_iterations)
+        memory = tree.memory()
+        metrics[f"nodes@{num_iterations}"] = memory.num_nodes
+        metrics[f"kib@{num_iterations}"] = memory.num_bytes / 1024
+    return metrics
+
+
+def run_suite(only: Optional[list[str]] = None, scale: float = 1.0) -> dict[str, Metrics]:
+    """Run the cases (all, or those whose name starts with one of only) and return their metrics by case."""
+    selected = lambda name: only is None or any(name.startswith(prefix) for prefix in only)
+    results = {case.name: run_case(case, scale) for case in CASES if selected(case.name)}
+    if selected("tree_memory"):
+        iterations = tuple(max(100, round(n * scale)) for n in TREE_MEMORY_ITERATIONS)
+        results["tree_memory"] = tree_memory(iterations)
+    return results
+
+
+def environment() -> dict[str, str]:
+    """Returns the machine and versions the results were measured on."""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": str(os.cpu_count()),
+    }
+
+
+def save_baseline(path: str, results: dict[str, Metrics], scale: float = 1.0) -> None:
+    """Write the results with the environment and the scale of the run as JSON baseline."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "scale": scale,
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> dict:
+    """Read a JSON baseline written by save_baseline()."""
+    with open(path) as file:
+        return json.load(file)
+
+
+def metric_threshold(metric: str, threshold: Optional[float] = None) -> float:
+    """Returns the allowed relative change of a metric (nodes@N uses the threshold of nodes)."""
+    if threshold is not None:
+        return threshold
+    return REGRESSION_THRESHOLDS.get(metric.split("@")[0], REGRESSION_THRESHOLDS["p50_us"])
+
+
+def compare_results(baseline: dict[str, Metrics],
+                    current: dict[str, Metrics],
+                    threshold: Optional[float] = None) -> list[Regression]:
+    """
+    Returns the metrics of the current results that are worse than in the baseline by more
+    than their threshold (relative change). Cases and metrics missing on either side are skipped.
+    """
+    regressions = []
+    for case, metrics in current.items():
+        for metric, value in metrics.items():
+            if metric not in baseline.get(case, {}):
+                continue
+            reference = baseline[case][metric]
+            allowed = metric_threshold(metric, threshold)
+            if metric.split("@")[0] in HIGHER_IS_BETTER:
+                regressed = value < reference * (1 - allowed)
+            else:
+                regressed = value > reference * (1 + allowed)
+            if regressed:
+                regressions.append(Regression(case, metric, reference, value, allowed))
+    return regressions
+
+
+def format_results(results: dict[str, Metrics]) -> str:
+    """Returns a table of the timed cases followed by the memory metrics."""
+    lines = [f"{'case':38} | {'ops/s':>10} | {'p50 [us]':>10} | {'p90 [us]':>10} | {'p99 [us]':>10} | {'peak KiB':>9}"]
+    for case, metrics in results.items():
+        if "ops_per_sec" in metrics:
+            lines.append(f"{case:38} | {metrics['ops_per_sec']:10.1f} | {metrics['p50_us']:10.1f} | "
+                         f"{metrics['p90_us']:10.1f} | {metrics['p99_us']:10.1f} | {metrics['peak_kib']:9.1f}")
+        else:
+            lines.append(f"{case:38} | " + ", ".join(f"{metric} {value:.0f}" for metric, value in metrics.items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite of the hot paths.")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                        help=f"write the results as baseline (default path {DEFAULT_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                        help="compare with a baseline, exit code 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="allowed relative change of all metrics (default: per metric)")
+    parser.add_argument("--quick", action="store_true", help="run a tenth of the samples and iterations")
+    parser.add_argument("--only", nargs="+", default=None, metavar="NAME", help="run only cases starting with NAME")
+    args = parser.parse_args()
+
+    scale = 0.1 if args.quick else 1.0
+    baseline = None
+    if args.compare is not None:
+        baseline = load_baseline(args.compare)
+        if baseline.get("scale") != scale:
+            print(f"Baseline was run with scale {baseline.get('scale')}, this run with {scale}.")
+        if baseline.get("environment") != environment():
+            print("Baseline was measured in a different environment, timings may not be comparable.")
+
+    results = run_suite(args.only, scale)
+    print(format_results(results))
+    if args.save is not None:
+        save_baseline(args.save, results, scale)
+        print(f"\nSaved baseline to {args.save}")
+    if baseline is not None:
+        regressions = compare_results(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against {args.compare}:")
+            print("\n".join(str(regression) for regression in regressions))
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}.")
@@ -0,0 +1,66 @@
+"""
+Benchmark of the symmetry-aware search (generate_move_mcts(..., symmetry=True)): the
+nodes store canonical positions, so mirror images share their statistics and the
+mirrored children of symmetric positions are not searched twice.
+
+Usage: python benchmarks/symmetry.py [games per match] [iterations]
+
+1. Iterations per second and nodes of a search from the empty board with and without symmetry.
+2. Visits of the most visited child of the root after a search from the empty board
+   (the iterations are no longer split between mirrored children).
+3. Match: the search with symmetry against the search without, with the same number of
+   iterations (colors alternate, the endgame solver is disabled for both).
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game_utils import PLAYER1, PLAYER2, GameState, initialize_game_state
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import generate_move_mcts, run_search
+from playout_policies import play_game
+
+
+def search_statistics(symmetry: bool, iterations: int = 4000) -> tuple[float, int, int]:
+    """Returns the iterations per second, the number of nodes and the visits of the most visited root child."""
+    tree = SearchTree(initialize_game_state(), player=PLAYER2, symmetry=symmetry)
+    t0 = time.perf_counter()
+    run_search(tree, iterations)
+    elapsed = time.perf_counter() - t0
+    return iterations / elapsed, len(tree), int(tree.visits[tree.child_nodes(tree.root)].max())
+
+
+def match(iterations: int, num_games: int) -> tuple[int, int, int]:
+    """Play a match of the search with symmetry against the search without. Returns its wins, draws, losses."""
+    symmetric = partial(generate_move_mcts, iterations=iterations, solver_threshold=None, symmetry=True)
+    plain = partial(generate_move_mcts, iterations=iterations, solver_threshold=None, symmetry=False)
+    wins = draws = losses = 0
+    for game in range(num_games):
+        symmetric_first = game % 2 == 0
+        end_state, last_player, _ = play_game(*((symmetric, plain) if symmetric_first else (plain, symmetric)))
+        if end_state == GameState.IS_DRAW:
+            draws += 1
+        elif last_player == (PLAYER1 if symmetric_first else PLAYER2):
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses
+
+
+if __name__ == "__main__":
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print("symmetry | iterations/s | nodes | visits of best root child")
+    for symmetry in (False, True):
+        iterations_per_second, num_nodes, best_visits = search_statistics(symmetry)
+        print(f"{str(symmetry):8} | {iterations_per_second:12.0f} | {num_nodes:5d} | {best_visits:25d}")
+
+    wins, draws, losses = match(iterations, num_games)
+    print(f"\nsymmetry vs. no symmetry ({iterations} iterations) | wins draws losses")
+    print(f"{'':>48} | {wins:4d} {draws:5d} {losses:6d}")
@@ -0,0 +1,44 @@
+"""
+Benchmark of the multithreaded MCTS (agents/agent_mcts/threaded.py): iterations per
+second of a search from the empty board against the number of threads.
+
+Usage: python benchmarks/threaded_scaling.py [iterations] [max. number of threads]
+
+On standard CPython the threads share the GIL, so no speedup is expected. On 
+free-threaded (no-GIL) builds the iterations per second should grow with the
+number of threads (up to the number of CPU cores).
+"""
+
+import os
+import sys
+import time
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from game_utils import PLAYER1, initialize_game_state
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.threaded import run_threaded_search
+
+
+def benchmark_threads(iterations: int, num_threads: int) -> float:
+    """Returns the iterations per second of a search with the given number of threads."""
+    tree = SearchTree(initialize_game_state(), player=PLAYER1)
+    t0 = time.perf_counter()
+    run_threaded_search(tree, iterations, num_threads)
+    return iterations / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled else 'disabled'}, {os.cpu_count()} CPU cores")
+    print("threads | iterations/s | speedup")
+    base = None
+    num_threads = 1
+    while num_threads <= max_threads:
+        rate = benchmark_threads(iterations, num_threads)
+        base = base or rate
+        print(f"{num_threads:7d} | {rate:12.0f} | {rate / base:6.2f}x")
+        num_threads *= 2
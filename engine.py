@@ -0,0 +1,325 @@
+"""
+Text engine: the MCTS agent as a long-lived process speaking a line-based protocol in
+the style of UCI over stdin/stdout, for external tournament managers and load tests.
+
+Usage: python engine.py (then one command per line on stdin)
+
+Commands
+--------
+uci                                 answered by "id name ...", "option ..." lines and "uciok"
+isready                             answered by "readyok"
+setoption name NAME value VALUE     set an option of OPTIONS (used from the next search on)
+newgame (or ucinewgame)             empty board, the search tree is discarded
+position startpos [moves C1 C2 ...] the position after the given columns (0-6) from the empty board
+go [iterations N] [movetime MS] [infinite]
+                                    search the position in the background, answered by "bestmove C [ponder C]"
+                                    once N root visits are reached or MS milliseconds have passed (the
+                                    first of both, Iterations of OPTIONS if none is given), an infinite
+                                    search only answers after stop
+ponder                              search the position in the background until the next command, without
+                                    bestmove (e.g. after the engine's move while the opponent is thinking)
+stop                                stop the search (a go is answered by its bestmove)
+d                                   print the board
+quit                                stop the search and exit
+
+Commands that change the position or start a search wait for a go with limits to finish
+(so a harness can pipe its commands without waiting for bestmove), while a ponder or an
+infinite go is stopped by them.
+
+While searching, the engine sends "info depth D iterations I visits V nodes N nps X time MS
+value Q pv C1 C2 ..." every INFO_INTERVAL seconds and once at the end of the search: the
+iterations run by this search, the visits of the root (including the reused ones), the nodes
+of the tree, the iterations per second, the mean result of the best move for the player to
+move (game score: 1 win, 0.5 draw, 0 loss, see SearchTree.mean_result()) and the principal
+variation. Errors are reported by "info string ..." lines.
+
+The search tree persists between the commands like the saved state in main.play(): a
+position that continues the moves of the previous one moves the root of the tree along
+(SearchTree.advance()), so the visits of earlier searches and pondering are reused. Any
+other position starts a new tree. As in generate_move_mcts(), positions with at most
+SolverThreshold empty cells are solved exactly instead of searched.
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from game_utils import PLAYER1, PLAYER2, BOARD_CELLS, BOARD_COLS, Board, PlayerAction, GameState, pretty_print_board
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.mcts import run_search, get_best_child, get_principal_variation
+from agents.agent_mcts.solver import solve_position
+
+ENGINE_NAME = "Connect Four MCTS"
+ENGINE_AUTHOR = "Connect Four MCTS authors"
+INFO_INTERVAL = 0.5  # seconds between two info lines of a search
+SEARCH_CHUNK_ITERATIONS = 32  # iterations between two checks of the stop event and the limits
+# options of setoption with their defaults (the type of the default is the type of the option)
+OPTIONS = {
+    "Iterations": 4000,  # root visits of a go without limits
+    "SolverThreshold": 16,  # positions with at most this many empty cells are solved, -1 never solves
+    "PlayoutPolicy": "random",
+    "Rave": False,
+    "SelectionPolicy": "ucb1",
+    "Transpositions": True,  # used by the next new search tree
+    "Symmetry": True,  # used by the next new search tree
+}
+UCI_OPTION_TYPES = {bool: "check", int: "spin", str: "string"}
+
+
+def print_line(line: str) -> None:
+    """Write a line to stdout and flush it, so the other side of the pipe gets it at once."""
+    print(line, flush=True)
+
+
+def parse_option_value(name: str, value: str):
+    """Returns the value of an option of OPTIONS parsed to the type of its default, raises ValueError if invalid."""
+    option_type = type(OPTIONS[name])
+    if option_type is bool:
+        if value.lower() not in ("true", "false"):
+            raise ValueError(f"Option {name} has to be true or false, got {value!r}.")
+        return value.lower() == "true"
+    return option_type(value)
+
+
+class Engine:
+    """
+    State of the engine between commands: the options, the moves and board of the current
+    position, the search tree and the background search. Commands are passed line by line
+    to handle(), the answers are sent by output (also from the search thread, one line at a time).
+
+    The tree is owned by the search thread while it runs, every command that needs the tree
+    ends the search first (see finish_search() and stop_search()).
+    """
+    def __init__(self, output: Callable[[str], None] = print_line):
+        self.output = output
+        self.options = dict(OPTIONS)
+        self.moves: list[PlayerAction] = []
+        self.board = Board()
+        self.tree: Optional[SearchTree] = None
+        self._output_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._infinite = False
+
+    def send(self, line: str) -> None:
+        """Send a line of output (thread-safe)."""
+        with self._output_lock:
+            self.output(line)
+
+    @property
+    def searching(self) -> bool:
+        """True while a go or ponder is running (or waiting for stop)."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def handle(self, line: str) -> bool:
+        """Handle a command line. Returns False if the engine should exit (quit)."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "quit":
+            self.stop_search()
+            return False
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "stop":
+            self.stop_search()
+        elif command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            for name, default in OPTIONS.items():
+                default = str(default).lower() if isinstance(default, bool) else default
+                self.send(f"option name {name} type {UCI_OPTION_TYPES[type(OPTIONS[name])]} default {default}")
+            self.send("uciok")
+        elif command == "d":
+            self.send(pretty_print_board(self.board.to_array()))
+        elif command in ("newgame", "ucinewgame"):
+            self.finish_search()
+            self.moves, self.board, self.tree = [], Board(), None
+        elif command == "setoption":
+            self.setoption(args)
+        elif command == "position":
+            self.finish_search()
+            self.set_position(args)
+        elif command == "go":
+            self.finish_search()
+            self.go(args)
+        elif command == "ponder":
+            self.finish_search()
+            self.start_search(iterations=None, time_limit=None, infinite=True, bestmove=False)
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def setoption(self, args: list[str]) -> None:
+        """Handle "setoption name NAME value VALUE"."""
+        if len(args) != 4 or args[0] != "name" or args[2] != "value" or args[1] not in OPTIONS:
+            self.send(f"info string invalid setoption {' '.join(args)} (options: {', '.join(OPTIONS)})")
+            return
+        try:
+            self.options[args[1]] = parse_option_value(args[1], args[3])
+        except ValueError as error:
+            self.send(f"info string {error}")
+
+    def set_position(self, args: list[str]) -> None:
+        """
+        Handle "position startpos [moves C1 C2 ...]". If the moves continue the moves of the
+        current position, the root of the search tree is moved along, otherwise the tree is
+        discarded. An invalid position is reported and leaves the current position unchanged.
+        """
+        if not args or args[0] != "startpos" or len(args) > 1 and args[1] != "moves":
+            self.send(f"info string invalid position {' '.join(args)}")
+            return
+        board = Board()
+        moves = []
+        for token in args[2:]:
+            if not token.isdigit() or int(token) >= BOARD_COLS or not board.can_play(int(token)) or (
+                    board.check_end_state() != GameState.STILL_PLAYING):
+                self.send(f"info string illegal move {token} after {' '.join(map(str, moves)) or 'startpos'}")
+                return
+            moves.append(PlayerAction(int(token)))
+            board.play(moves[-1])
+
+        tree = self.tree
+        if tree is not None and moves[:len(self.moves)] == self.moves:
+            for action in moves[len(self.moves):]:
+                tree = tree.advance(action)
+                if tree is None:
+                    break
+        else:
+            tree = None
+        self.moves, self.board, self.tree = moves, board, tree
+
+    def go(self, args: list[str]) -> None:
+        """Handle "go [iterations N] [movetime MS] [infinite]"."""
+        iterations, time_limit, infinite = None, None, False
+        tokens = iter(args)
+        try:
+            for token in tokens:
+                if token == "infinite":
+                    infinite = True
+                elif token == "iterations":
+                    iterations = int(next(tokens))
+                elif token == "movetime":
+                    time_limit = int(next(tokens)) / 1000
+                else:
+                    raise ValueError(f"unknown parameter {token}")
+        except (ValueError, StopIteration) as error:
+            self.send(f"info string invalid go {' '.join(args)}: {error or 'missing value'}")
+            self.send("bestmove none")
+            return
+        if not infinite and iterations is None and time_limit is None:
+            iterations = self.options["Iterations"]
+        self.start_search(iterations, time_limit, infinite, bestmove=True)
+
+    def start_search(self,
+                     iterations: Optional[int],
+                     time_limit: Optional[float],
+                     infinite: bool,
+                     bestmove: bool) -> None:
+        """Start searching the current position in a background thread (see _search())."""
+        if self.tree is None:
+            # player of root is the player who made the last move
+            prev_player = PLAYER2 if self.board.player == PLAYER1 else PLAYER1
+            self.tree = SearchTree(bitboard=(self.board.position, self.board.mask), player=prev_player,
+                                   transpositions=self.options["Transpositions"], symmetry=self.options["Symmetry"])
+        self._stop_event.clear()
+        self._infinite = infinite
+        self._thread = threading.Thread(target=self._search, args=(iterations, time_limit, infinite, bestmove),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop_search(self) -> None:
+        """Stop the search, if any, and wait for the search thread to send its last lines."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def finish_search(self) -> None:
+        """Wait for a search with limits to end by itself, stop an infinite search or pondering."""
+        if self._thread is not None and not self._infinite:
+            self._thread.join()
+        self.stop_search()
+
+    def _search(self, iterations: Optional[int], time_limit: Optional[float], infinite: bool, bestmove: bool) -> None:
+        """
+        Main loop of the search thread: runs iterations in chunks until the stop event is set,
+        the root has the given visits, the time limit has passed or the root is proven. Sends
+        info lines every INFO_INTERVAL seconds and at the end, followed by the bestmove of a go.
+        An infinite search waits for the stop event before it ends.
+        """
+        tree, board = self.tree, self.board
+        start_time = time.perf_counter()
+        start_visits = int(tree.visits[tree.root])
+        solved_action = None
+        try:
+            empty_cells = BOARD_CELLS - board.ply
+            if bestmove and empty_cells <= self.options["SolverThreshold"] and board.valid_actions() and (
+                    board.check_end_state() == GameState.STILL_PLAYING):
+                result = solve_position(board.position, board.mask, board.player)
+                if result is not None and result.exact:
+                    solved_action = result.action
+                    self.send(f"info string solved with score {result.score} for the player to move")
+
+            next_info = start_time + INFO_INTERVAL
+            while solved_action is None and not self._stop_event.is_set():
+                target = int(tree.visits[tree.root]) + SEARCH_CHUNK_ITERATIONS
+                if iterations is not None:
+                    target = min(target, iterations)
+                num_iterations = run_search(tree, target, playout_policy=self.options["PlayoutPolicy"],
+                                            rave=self.options["Rave"],
+                                            selection_policy=self.options["SelectionPolicy"])
+                now = time.perf_counter()
+                if num_iterations == 0 or time_limit is not None and now - start_time >= time_limit:
+                    break  # reached the visits, the time limit or a proven root
+                if now >= next_info:
+                    self.send(self.info(start_visits, now - start_time))
+                    next_info = now + INFO_INTERVAL
+            if infinite:
+                self._stop_event.wait()
+        except Exception as error:
+            self.send(f"info string error {type(error).__name__}: {error}")
+        finally:
+            self.send(self.info(start_visits, time.perf_counter() - start_time))
+            if bestmove:
+                self.send(self.bestmove(solved_action))
+
+    def info(self, start_visits: int, elapsed: float) -> str:
+        """Returns the info line of the search so far."""
+        tree = self.tree
+        visits = int(tree.visits[tree.root])
+        num_iterations = visits - start_visits
+        variation = get_principal_variation(tree)
+        line = (f"info depth {len(variation)} iterations {num_iterations} visits {visits} nodes {len(tree)} "
+                f"nps {num_iterations / elapsed if elapsed > 0 else 0:.0f} time {elapsed * 1000:.0f}")
+        if variation:
+            _, child = get_best_child(tree, tree.root)
+            line += f" value {tree.mean_result(child):.3f} pv {' '.join(map(str, variation))}"
+        return line
+
+    def bestmove(self, solved_action: Optional[PlayerAction] = None) -> str:
+        """Returns the bestmove line of the search (or of the solver), "bestmove none" without valid moves."""
+        if solved_action is not None:
+            return f"bestmove {solved_action}"
+        variation = get_principal_variation(self.tree, max_length=2)
+        if not variation:
+            return "bestmove none"
+        if len(variation) == 1:
+            return f"bestmove {variation[0]}"
+        return f"bestmove {variation[0]} ponder {variation[1]}"
+
+
+def main() -> None:
+    """Read commands from stdin until quit or the end of the input."""
+    engine = Engine()
+    for line in iter(sys.stdin.readline, ""):
+        if not engine.handle(line):
+            break
+    engine.stop_search()
+
+
+if __name__ == "__main__":
+    main()
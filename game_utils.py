@@ -4,7 +4,7 @@ import numpy as np
 
 # avoid circular imports (only needed for type checking)
 if TYPE_CHECKING:
-    from agents.agent_mcts.tree import TreeNode
+    from agents.agent_mcts.tree import SearchTree
 
 # board dimensions
 BOARD_ROWS = 6
@@ -24,8 +24,8 @@ PLAYER2_PRINT = BoardPiecePrint('O')
 PlayerAction = np.int8  # column (=action) to be played
 
 # NOTE: maybe consider a class for this later to extend functionality?
-# for now: SavedState is just a TreeNode (for agent) or None (for human player)
-SavedState = Optional["TreeNode"]
+# SavedState is the search tree (root node and transposition table) for agents, or None (for human player)
+SavedState = Optional["SearchTree"]
 
 class GameState(Enum):
     IS_WIN = 1
@@ -362,24 +362,566 @@ def check_move_status(board: np.ndarray, action: PlayerAction) -> MoveStatus:
 
 
 
-def update_saved_state (saved_state: Optional["TreeNode"], action: PlayerAction):
+def update_saved_state (saved_state: SavedState, action: PlayerAction):
     """
-    Updates the saved_state (TreeNode) based on the given action, or returns None if no state is tracked.
+    Updates the saved_state (SearchTree) based on the given action, or returns None if no state is tracked.
     
     Parameters
     ----------
-    saved_state : Optional[TreeNode]
-        The current node of the search tree, if the player is an agent using a search tree.
+    saved_state : SavedState
+        The search tree, if the player is an agent using a search tree.
     action : PlayerAction
         The action that was just played.
     
     Returns
     -------
-    Optional[TreeNode]
-        The updated TreeNode corresponding to the played action,
-        or None if no search tree is used (e.g., human player).
-    """
-    if not saved_state: return None # saved state only for TreeNodes
-    for child in saved_state.children:
-        if child.previous_action == action:
-            return child
+    SavedState
+        The search tree rooted at the node corresponding to the played action,
+        or None if no search tree is used (e.g., human player) or the action was not expanded.
+    """
+    if not saved_state: return None # saved state only for search trees
+    return saved_state.advance(action)
+
+
+# --------------------------------------------------------------------------------------
+# bitboard representation
+# --------------------------------------------------------------------------------------
+# A board can also be stored as two python integers (position, mask):
+# - position: bits of the pieces of PLAYER1
+# - mask: bits of all pieces on the board (PLAYER2 pieces are position ^ mask)
+# Bits are laid out column by column, each column using BOARD_ROWS + 1 bits
+# (the extra sentinel bit on top is always empty and stops shifts from wrapping
+# into the next column):
+#
+#   6 13 20 27 34 41 48   <- sentinel row
+#   5 12 19 26 33 40 47
+#   4 11 18 25 32 39 46
+#   3 10 17 24 31 38 45
+#   2  9 16 23 30 37 44
+#   1  8 15 22 29 36 43
+#   0  7 14 21 28 35 42   <- row 0 (bottom)
+
+Bitboard = int  # bitboard (python int, fits into 64 bits)
+
+BITBOARD_HEIGHT = BOARD_ROWS + 1  # bits per column (including sentinel)
+BOTTOM_MASKS = tuple(1 << (col * BITBOARD_HEIGHT) for col in range(BOARD_COLS))
+TOP_MASKS = tuple(1 << (BOARD_ROWS - 1 + col * BITBOARD_HEIGHT) for col in range(BOARD_COLS))
+COLUMN_MASKS = tuple(((1 << BOARD_ROWS) - 1) << (col * BITBOARD_HEIGHT) for col in range(BOARD_COLS))
+BOTTOM_MASK = sum(BOTTOM_MASKS)  # bottom cell of every column
+BOARD_MASK = sum(COLUMN_MASKS)  # all playable cells
+_SHIFT_HORIZONTAL = BITBOARD_HEIGHT  # bit distance between neighbouring cells in a row
+_SHIFT_DIAGONAL = BITBOARD_HEIGHT + 1
+_SHIFT_ANTI_DIAGONAL = BITBOARD_HEIGHT - 1
+
+
+def board_to_bitboard(board: np.ndarray) -> tuple[Bitboard, Bitboard]:
+    """
+    Convert a game board (np.ndarray) into its bitboard representation.
+
+    Parameters
+    ----------
+    board : np.ndarray
+        The game board as a 2D array.
+
+    Returns
+    -------
+    tuple[Bitboard, Bitboard]
+        - position: bits of the pieces of PLAYER1.
+        - mask: bits of all pieces on the board.
+    """
+    position, mask = 0, 0
+    for row_idx, col_idx in zip(*np.nonzero(board)):
+        bit = 1 << (int(col_idx) * BITBOARD_HEIGHT + int(row_idx))
+        mask |= bit
+        if board[row_idx, col_idx] == PLAYER1:
+            position |= bit
+    return position, mask
+
+
+def bitboard_to_board(position: Bitboard, mask: Bitboard) -> np.ndarray:
+    """
+    Convert a bitboard (position, mask) back into a game board (np.ndarray).
+
+    Parameters
+    ----------
+    position : Bitboard
+        Bits of the pieces of PLAYER1.
+    mask : Bitboard
+        Bits of all pieces on the board.
+
+    Returns
+    -------
+    np.ndarray
+        The game board as a 2D array.
+    """
+    board = initialize_game_state()
+    for col_idx in range(BOARD_COLS):
+        for row_idx in range(BOARD_ROWS):
+            bit = 1 << (col_idx * BITBOARD_HEIGHT + row_idx)
+            if not mask & bit:
+                break  # pieces are stacked, rest of column is empty
+            board[row_idx, col_idx] = PLAYER1 if position & bit else PLAYER2
+    return board
+
+
+def bitboard_player_pieces(position: Bitboard, mask: Bitboard, player: BoardPiece) -> Bitboard:
+    """Returns the bits of the pieces of the given player."""
+    return position if player == PLAYER1 else position ^ mask
+
+
+def bitboard_apply_action(
+    position: Bitboard,
+    mask: Bitboard,
+    action: PlayerAction,
+    player: BoardPiece
+) -> tuple[Bitboard, Bitboard]:
+    """
+    Apply a player's action to a bitboard by placing their piece in the lowest empty 
+    row of the specified column.
+
+    Parameters
+    ----------
+    position : Bitboard
+        Bits of the pieces of PLAYER1.
+    mask : Bitboard
+        Bits of all pieces on the board.
+    action : PlayerAction
+        The column index where the player wants to place their piece.
+    player : BoardPiece
+        The player’s piece identifier.
+
+    Returns
+    -------
+    tuple[Bitboard, Bitboard]
+        The new (position, mask) after the action.
+
+    Notes
+    -----
+    Bitboards are immutable integers, so (unlike apply_player_action) a new 
+    bitboard is returned. The column must not be full.
+    """
+    new_mask = mask | (mask + BOTTOM_MASKS[action])
+    if player == PLAYER1:
+        position |= new_mask ^ mask
+    return position, new_mask
+
+
+def bitboard_connected_four(pieces: Bitboard) -> bool:
+    """
+    Returns True if the given pieces (of a single player) contain four connected 
+    pieces in a row, column, or diagonal. Otherwise, returns False.
+    """
+    # unrolled, as this is called after every move of a simulation
+    pairs = pieces & (pieces >> 1) # vertical
+    if pairs & (pairs >> 2): return True
+    pairs = pieces & (pieces >> _SHIFT_HORIZONTAL) # horizontal
+    if pairs & (pairs >> 2 * _SHIFT_HORIZONTAL): return True
+    pairs = pieces & (pieces >> _SHIFT_DIAGONAL) # diagonal
+    if pairs & (pairs >> 2 * _SHIFT_DIAGONAL): return True
+    pairs = pieces & (pieces >> _SHIFT_ANTI_DIAGONAL) # anti-diagonal
+    if pairs & (pairs >> 2 * _SHIFT_ANTI_DIAGONAL): return True
+    return False
+
+
+def bitboard_winning_cells(pieces: Bitboard, mask: Bitboard) -> Bitboard:
+    """
+    Returns the empty cells that would complete four connected pieces for the given pieces 
+    (threat mask), whether they can be played right away or not.
+    """
+    # vertical: three pieces below the cell
+    cells = (pieces << 1) & (pieces << 2) & (pieces << 3)
+    for shift in (_SHIFT_HORIZONTAL, _SHIFT_DIAGONAL, _SHIFT_ANTI_DIAGONAL):
+        pair = (pieces << shift) & (pieces << 2 * shift)
+        cells |= pair & (pieces << 3 * shift)  # cell right of three pieces
+        cells |= pair & (pieces >> shift)  # cell in a gap, two pieces left and one right
+        pair = (pieces >> shift) & (pieces >> 2 * shift)
+        cells |= pair & (pieces << shift)  # cell in a gap, one piece left and two right
+        cells |= pair & (pieces >> 3 * shift)  # cell left of three pieces
+    return cells & (BOARD_MASK ^ mask)
+
+
+def bitboard_valid_actions_mask(mask: Bitboard) -> Bitboard:
+    """Returns the bits of the cells where a piece can be placed (lowest empty cell of each non-full column)."""
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def bitboard_valid_actions(mask: Bitboard) -> list[PlayerAction]:
+    """Returns all valid actions (columns that are not yet full) of the given bitboard."""
+    return [col for col in range(BOARD_COLS) if not mask & TOP_MASKS[col]]
+
+
+def bitboard_is_full(mask: Bitboard) -> bool:
+    """Returns True if the given bitboard is fully occupied, otherwise returns False."""
+    return mask == BOARD_MASK
+
+
+def bitboard_check_end_state(position: Bitboard, mask: Bitboard, player: BoardPiece) -> GameState:
+    """
+    Determines the current game state of a bitboard after the given player's last action.
+
+    Parameters
+    ----------
+    position : Bitboard
+        Bits of the pieces of PLAYER1.
+    mask : Bitboard
+        Bits of all pieces on the board.
+    player : BoardPiece
+        The player who made the last action.
+
+    Returns
+    -------
+    GameState
+        - GameState.IS_WIN if the player has connected four,
+        - GameState.IS_DRAW if the board is full,
+        - GameState.STILL_PLAYING otherwise.
+    """
+    if bitboard_connected_four(bitboard_player_pieces(position, mask, player)): return GameState.IS_WIN
+    elif bitboard_is_full(mask): return GameState.IS_DRAW
+    return GameState.STILL_PLAYING
+
+
+
+_COLUMN_BITS = (1 << BITBOARD_HEIGHT) - 1  # all bits of column 0 (including sentinel)
+
+
+def bitboard_mirror(bits: Bitboard) -> Bitboard:
+    """
+    Returns the bitboard mirrored at the center column (column c becomes column
+    BOARD_COLS - 1 - c). Works for positions, masks and keys (see bitboard_key()).
+    """
+    mirrored = 0
+    for col in range(BOARD_COLS):
+        column = (bits >> (col * BITBOARD_HEIGHT)) & _COLUMN_BITS
+        mirrored |= column << ((BOARD_COLS - 1 - col) * BITBOARD_HEIGHT)
+    return mirrored
+
+
+def bitboard_key(position: Bitboard, mask: Bitboard) -> int:
+    """
+    Returns a unique key of a bitboard (fits into 49 bits, unlike a hash without collisions).
+
+    In each column, position + mask maps the h pieces of the column to the range
+    [2^h - 1, 2^(h+1) - 2], so different columns never overlap and the column
+    never carries over into the next one (the sentinel bit absorbs the largest value).
+    The player to move follows from the number of pieces, so it is part of the key.
+    """
+    return position + mask
+
+
+def bitboard_canonical_key(position: Bitboard, mask: Bitboard) -> tuple[int, bool]:
+    """
+    Returns the key shared by a position and its mirror image (the smaller of both keys)
+    and whether it is the key of the mirror image, i.e. whether the actions stored
+    for the key have to be mirrored (action -> BOARD_COLS - 1 - action).
+    """
+    key = bitboard_key(position, mask)
+    mirrored_key = bitboard_mirror(key)
+    return (mirrored_key, True) if mirrored_key < key else (key, False)
+
+
+def bitboard_canonical(position: Bitboard, mask: Bitboard) -> tuple[Bitboard, Bitboard, bool]:
+    """
+    Returns the canonical form of a bitboard: the bitboard itself or its mirror image,
+    whichever has the smaller key (see bitboard_canonical_key()), and whether it is the
+    mirror image. A position and its mirror image share the same canonical form, and
+    actions of the canonical form are translated back with mirror_action() if mirrored.
+    """
+    _, mirrored = bitboard_canonical_key(position, mask)
+    if mirrored:
+        return bitboard_mirror(position), bitboard_mirror(mask), True
+    return position, mask, False
+
+
+def bitboard_is_symmetric(position: Bitboard, mask: Bitboard) -> bool:
+    """Returns True if the bitboard is its own mirror image (e.g. the empty board)."""
+    key = bitboard_key(position, mask)
+    return bitboard_mirror(key) == key
+
+
+def canonical_board(board: np.ndarray) -> tuple[np.ndarray, bool]:
+    """
+    Returns the canonical form of a board (see bitboard_canonical()) and whether it is
+    the mirror image of the board (a copy with the columns reversed).
+    """
+    _, mirrored = bitboard_canonical_key(*board_to_bitboard(board))
+    return (board[:, ::-1].copy(), True) if mirrored else (board, False)
+
+
+def mirror_action(action: PlayerAction) -> PlayerAction:
+    """Returns the action (column) mirrored at the center column."""
+    return PlayerAction(BOARD_COLS - 1 - action)
+
+
+# the actions of a symmetric bitboard that are mirror images of the other actions
+MIRRORED_ACTIONS = tuple(range(BOARD_COLS // 2 + 1, BOARD_COLS))
+CANONICAL_ACTIONS_MASK = BOARD_MASK ^ sum(COLUMN_MASKS[action] for action in MIRRORED_ACTIONS)
+
+
+def create_zobrist_keys(seed: int = 4) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    Create the random 64-bit Zobrist keys of both players for every bit of the bitboard.
+    The keys are fixed by the seed, so hashes are identical between runs and processes.
+    """
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(0, 2**64, size=(2, BOARD_COLS * BITBOARD_HEIGHT), dtype=np.uint64)
+    return tuple(int(key) for key in keys[0]), tuple(int(key) for key in keys[1])
+
+
+ZOBRIST_KEYS = create_zobrist_keys()  # ZOBRIST_KEYS[player - 1][bit index]
+
+
+def zobrist_hash(position: Bitboard, mask: Bitboard) -> int:
+    """
+    Returns the Zobrist hash of a bitboard: the XOR of the keys of all pieces.
+    Use zobrist_update() to update the hash incrementally after a move.
+    """
+    hash_value = 0
+    pieces = mask
+    while pieces:
+        bit = pieces & -pieces  # lowest remaining piece
+        player_idx = 0 if position & bit else 1
+        hash_value ^= ZOBRIST_KEYS[player_idx][bit.bit_length() - 1]
+        pieces ^= bit
+    return hash_value
+
+
+def zobrist_update(hash_value: int, bit: Bitboard, player: BoardPiece) -> int:
+    """
+    Returns the Zobrist hash after adding (or removing) the piece of the given player
+    at the given bit (bitboard with a single bit set, e.g. new_mask ^ mask).
+    """
+    return hash_value ^ ZOBRIST_KEYS[player - 1][bit.bit_length() - 1]
+
+
+BOARD_CELLS = BOARD_ROWS * BOARD_COLS  # number of pieces on a full board
+
+
+class Board:
+    """
+    Mutable game board on top of the bitboard representation, supporting moves 
+    and their undoing in place (make/unmake).
+
+    All checks (valid action, full board, win, draw) are O(1), as the board keeps 
+    track of the height of each column and the number of pieces played.
+
+    Attributes
+    ----------
+    position : Bitboard
+        Bits of the pieces of PLAYER1.
+    mask : Bitboard
+        Bits of all pieces on the board.
+    heights : list[int]
+        Number of pieces in each column (= lowest empty row of the column).
+    ply : int
+        Number of pieces on the board.
+    history : list[PlayerAction]
+        Actions played on this board (since its creation or last set_bitboard()), used by undo().
+    player : BoardPiece
+        The player whose turn it is.
+    hash : int
+        Zobrist hash of the board, updated incrementally by play() and undo().
+    """
+    __slots__ = ("position", "mask", "heights", "ply", "history", "player", "hash")
+
+    def __init__(self, board: Optional[np.ndarray] = None, player: BoardPiece = PLAYER1):
+        position, mask = (0, 0) if board is None else board_to_bitboard(board)
+        self.set_bitboard(position, mask, player)
+
+    @classmethod
+    def from_bitboard(cls, position: Bitboard, mask: Bitboard, player: BoardPiece) -> "Board":
+        """Create a board from a bitboard and the player whose turn it is."""
+        board = cls.__new__(cls)
+        board.set_bitboard(position, mask, player)
+        return board
+
+    def set_bitboard(self, 
+                     position: Bitboard, 
+                     mask: Bitboard, 
+                     player: BoardPiece, 
+                     hash_value: Optional[int] = None) -> None:
+        """
+        Reset the board (in place) to the given bitboard and player whose turn it is.
+        The Zobrist hash is computed if not given.
+        """
+        self.position = position
+        self.mask = mask
+        self.heights = [(mask & column_mask).bit_count() for column_mask in COLUMN_MASKS]
+        self.ply = mask.bit_count()
+        self.history = []
+        self.player = player
+        self.hash = zobrist_hash(position, mask) if hash_value is None else hash_value
+
+    def to_array(self) -> np.ndarray:
+        """Returns the board as np.ndarray."""
+        return bitboard_to_board(self.position, self.mask)
+
+    def can_play(self, action: PlayerAction) -> bool:
+        """Returns True if a piece can be placed in the given column."""
+        return self.heights[action] < BOARD_ROWS
+
+    def valid_actions(self) -> list[PlayerAction]:
+        """Returns all valid actions, i.e. columns that are not yet full."""
+        return [col for col, height in enumerate(self.heights) if height < BOARD_ROWS]
+
+    def play(self, action: PlayerAction) -> None:
+        """Place a piece of the player whose turn it is in the given (non-full) column."""
+        bit = BOTTOM_MASKS[action] << self.heights[action]
+        self.mask |= bit
+        if self.player == PLAYER1:
+            self.position |= bit
+            self.hash ^= ZOBRIST_KEYS[0][bit.bit_length() - 1]
+            self.player = PLAYER2
+        else:
+            self.hash ^= ZOBRIST_KEYS[1][bit.bit_length() - 1]
+            self.player = PLAYER1
+        self.heights[action] += 1
+        self.ply += 1
+        self.history.append(action)
+
+    def undo(self) -> PlayerAction:
+        """Take back the last played action and return it."""
+        action = self.history.pop()
+        self.heights[action] -= 1
+        bit = BOTTOM_MASKS[action] << self.heights[action]
+        self.mask ^= bit
+        self.position &= ~bit
+        self.player = PLAYER2 if self.player == PLAYER1 else PLAYER1
+        self.hash ^= ZOBRIST_KEYS[self.player - 1][bit.bit_length() - 1]
+        self.ply -= 1
+        return action
+
+    def is_full(self) -> bool:
+        """Returns True if the board is fully occupied."""
+        return self.ply == BOARD_CELLS
+
+    def is_win(self) -> bool:
+        """Returns True if the player who made the last move has connected four."""
+        # the player whose turn it is did not make the last move
+        pieces = self.position ^ self.mask if self.player == PLAYER1 else self.position
+        return bitboard_connected_four(pieces)
+
+    def is_draw(self) -> bool:
+        """Returns True if the board is full without the last move winning the game."""
+        return self.ply == BOARD_CELLS and not self.is_win()
+
+    def check_end_state(self) -> GameState:
+        """Determines the current game state after the last move (see check_end_state())."""
+        if self.is_win(): return GameState.IS_WIN
+        elif self.is_full(): return GameState.IS_DRAW
+        return GameState.STILL_PLAYING
+
+
+# --------------------------------------------------------------------------------------
+# batch checks over stacks of boards (N, BOARD_ROWS, BOARD_COLS)
+# --------------------------------------------------------------------------------------
+
+def create_four_in_a_row_windows() -> np.ndarray:
+    """
+    Returns all windows of four connected cells (horizontal, vertical, diagonal, 
+    anti-diagonal) of the board as flat cell indices (row_idx * BOARD_COLS + col_idx),
+    shape (number of windows, 4).
+    """
+    windows = []
+    for row_idx in range(BOARD_ROWS):
+        for col_idx in range(BOARD_COLS):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row, end_col = row_idx + 3 * d_row, col_idx + 3 * d_col
+                if 0 <= end_row < BOARD_ROWS and 0 <= end_col < BOARD_COLS:
+                    windows.append([(row_idx + i * d_row) * BOARD_COLS + col_idx + i * d_col for i in range(4)])
+    return np.array(windows, dtype=np.intp)
+
+
+def create_cell_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    Returns for each cell (flat index) the indices of the windows containing the cell, 
+    shape (BOARD_CELLS, max. number of windows per cell). Rows are padded with 
+    len(windows), which refers to an empty padding window (see _PADDED_WINDOWS).
+    """
+    windows_per_cell = [np.flatnonzero(np.any(windows == cell, axis=1)) for cell in range(BOARD_CELLS)]
+    max_windows = max(len(cell_windows) for cell_windows in windows_per_cell)
+    cell_windows = np.full((BOARD_CELLS, max_windows), len(windows), dtype=np.intp)
+    for cell, window_indices in enumerate(windows_per_cell):
+        cell_windows[cell, :len(window_indices)] = window_indices
+    return cell_windows
+
+
+WINDOWS = create_four_in_a_row_windows()  # all 69 windows of four cells
+CELL_WINDOWS = create_cell_windows(WINDOWS)  # windows through each cell
+# padding window pointing to an extra (always empty) cell behind the last cell of the board
+_PADDED_WINDOWS = np.vstack([WINDOWS, np.full((1, 4), BOARD_CELLS, dtype=np.intp)])
+_CELL_WINDOW_CELLS = _PADDED_WINDOWS[CELL_WINDOWS]  # cells of the windows through each cell
+
+
+def connected_four_batch(
+    boards: np.ndarray, 
+    player: BoardPiece | np.ndarray, 
+    last_actions: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Check for each board of a stack of boards whether the given player has four 
+    connected pieces in a row, column, or diagonal.
+
+    Parameters
+    ----------
+    boards : np.ndarray
+        Stack of boards of shape (N, BOARD_ROWS, BOARD_COLS).
+    player : BoardPiece or np.ndarray
+        The player to check, either the same for all boards or one per board (shape (N,)).
+    last_actions : np.ndarray, optional
+        The column of the last move of each board (shape (N,)). If given, only the 
+        windows through the last placed piece of each board are checked.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array of shape (N,), True if the player has four connected pieces.
+    """
+    num_boards = boards.shape[0]
+    player = np.asarray(player).reshape(-1, 1)
+    if last_actions is None:
+        pieces = boards.reshape(num_boards, BOARD_CELLS) == player
+        return pieces[:, WINDOWS].all(axis=2).any(axis=1)
+
+    board_idx = np.arange(num_boards)
+    last_actions = np.asarray(last_actions)
+    # row of the last placed piece: highest occupied row of the column
+    last_rows = np.count_nonzero(boards[board_idx, :, last_actions], axis=1) - 1
+    windows = _CELL_WINDOW_CELLS[last_rows * BOARD_COLS + last_actions]  # (N, windows per cell, 4)
+    pieces = np.zeros((num_boards, BOARD_CELLS + 1), dtype=bool)  # extra cell for padding window
+    pieces[:, :BOARD_CELLS] = boards.reshape(num_boards, BOARD_CELLS) == player
+    # gather from the flattened stack (a single 1D take is much faster than 3D fancy indexing)
+    windows += (board_idx * (BOARD_CELLS + 1))[:, None, None]
+    return pieces.ravel()[windows].all(axis=2).any(axis=1)
+
+
+def check_end_state_batch(
+    boards: np.ndarray, 
+    player: BoardPiece | np.ndarray, 
+    last_actions: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Determines the game state of each board of a stack of boards after the given 
+    player's last action (see check_end_state()).
+
+    Parameters
+    ----------
+    boards : np.ndarray
+        Stack of boards of shape (N, BOARD_ROWS, BOARD_COLS).
+    player : BoardPiece or np.ndarray
+        The player who made the last action, either the same for all boards or one per board.
+    last_actions : np.ndarray, optional
+        The column of the last move of each board. If given, only the windows through 
+        the last placed piece are checked for a win.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (N,) with the GameState values (IS_WIN.value, IS_DRAW.value, 
+        or STILL_PLAYING.value) of the boards.
+    """
+    won = connected_four_batch(boards, player, last_actions)
+    full = np.all(boards != NO_PLAYER, axis=(1, 2))
+    return np.where(
+        won, GameState.IS_WIN.value, 
+        np.where(full, GameState.IS_DRAW.value, GameState.STILL_PLAYING.value)
+    ).astype(np.int8)
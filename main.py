@@ -1,5 +1,7 @@
-from typing import Callable
+from typing import Callable, Optional
+import inspect
 import time
+import numpy as np
 
 from game_utils import (
     PLAYER1, PLAYER2, PLAYER1_PRINT, PLAYER2_PRINT, GameState, MoveStatus, GenMove,
@@ -7,7 +9,11 @@ from game_utils import (
 )
 from agents.agent_human_user import user_move
 from agents.agent_random import generate_move_random
-from agents.agent_mcts import generate_move_mcts
+from agents.agent_mcts import generate_move_mcts, generate_move_mcts_parallel
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.time_manager import TimeManager, position_uncertainty
+from agents.agent_mcts.ponder import Ponderer, search_kwargs
+from agents.agent_mcts.stats import SearchStats
 
 def play(
     mode = None,
@@ -17,6 +23,14 @@ def play(
     args_2: tuple = (),
     init_1: Callable = lambda board, player: None,
     init_2: Callable = lambda board, player: None,
+    move_time_1: Optional[float] = None,
+    move_time_2: Optional[float] = None,
+    game_time_1: Optional[float] = None,
+    game_time_2: Optional[float] = None,
+    ponder_1: bool = False,
+    ponder_2: bool = False,
+    stats_1: bool = False,
+    stats_2: bool = False,
 ):
     """
     Start and control a game of Connect Four between two players.
@@ -37,6 +51,21 @@ def play(
         Function to initialize player 1's state.
     init_2 : Callable
         Function to initialize player 2's state.
+    move_time_1, move_time_2 : float, optional
+        Time budget per move in seconds of player 1 and 2, passed to the move generator 
+        as time_limit (only for move generators accepting it, e.g. generate_move_mcts).
+    game_time_1, game_time_2 : float, optional
+        Time budget per game in seconds of player 1 and 2. The budget of each move is 
+        computed by a TimeManager and passed as time_limit (overrides the budget per move).
+    ponder_1, ponder_2 : bool, optional
+        If True, the search tree (saved state) of player 1 and 2 keeps growing in a background 
+        thread during the opponent's turn (only for agents whose saved state is a SearchTree), 
+        with the search settings of the move generator and its arguments (see ponder.search_kwargs()).
+    stats_1, stats_2 : bool, optional
+        If True, a SearchStats record is passed as stats to the move generator of player 1 
+        and 2 and logged after each move (only for move generators accepting it, e.g. 
+        generate_move_mcts): time per search phase, iterations per second, tree size and 
+        the visits of the root children.
 
     Returns
     -------
@@ -44,7 +73,7 @@ def play(
         The function runs until the game is over, with no explicit return value.
     """
     if mode == None:
-        mode = int(input("Select mode:  \n 0 = player vs. player \n 1 = player vs. agent \n 2 = agent vs. agent \n 3 = agent vs. random agent \n"))
+        mode = int(input("Select mode:  \n 0 = player vs. player \n 1 = player vs. agent \n 2 = agent vs. agent \n 3 = agent vs. random agent \n 4 = agent vs. parallel agent \n"))
     
     if mode == 0: # player vs. player
         generate_move_1: GenMove = user_move
@@ -58,8 +87,11 @@ def play(
     elif mode == 3: # agent vs. random_agent
         generate_move_1: GenMove = generate_move_mcts
         generate_move_2: GenMove = generate_move_random
+    elif mode == 4: # agent vs. parallel agent (root-parallel MCTS on all CPU cores)
+        generate_move_1: GenMove = generate_move_mcts
+        generate_move_2: GenMove = generate_move_mcts_parallel
     else:
-        raise ValueError("Incorret mode selected. Please select valid mode (0, 1, 2, or 3)")
+        raise ValueError("Incorret mode selected. Please select valid mode (0, 1, 2, 3, or 4)")
         
     players = (PLAYER1, PLAYER2)
     for play_first in (1, -1):
@@ -71,13 +103,24 @@ def play(
         gen_moves = (generate_move_1, generate_move_2)[::play_first]
         player_names = (player_1, player_2)[::play_first]
         gen_args = (args_1, args_2)[::play_first]
+        move_times = (move_time_1, move_time_2)[::play_first]
+        time_managers = [
+            None if game_time is None else TimeManager(game_time) 
+            for game_time in (game_time_1, game_time_2)[::play_first]
+        ]
+        # pondering grows the tree with the search settings of the agent's own search
+        ponderers = [
+            Ponderer(**search_kwargs(gen_move, args)) if ponder else None
+            for ponder, gen_move, args in zip((ponder_1, ponder_2)[::play_first], gen_moves, gen_args)
+        ]
+        log_stats = (stats_1, stats_2)[::play_first]
 
         playing = True
         action = None
 
         while playing:
-            for player, player_name, gen_move, args in zip(
-                players, player_names, gen_moves, gen_args,
+            for player, player_name, gen_move, args, move_time, time_manager, ponderer, log_stat in zip(
+                players, player_names, gen_moves, gen_args, move_times, time_managers, ponderers, log_stats,
             ):
                 t0 = time.time()
                 print(pretty_print_board(board))
@@ -85,18 +128,40 @@ def play(
                     f'{player_name} you are playing with {PLAYER1_PRINT if player == PLAYER1 else PLAYER2_PRINT}'
                 )
 
+                # the saved state must not be used while it is pondered on
+                if ponderer is not None and ponderer.stop() is not None:
+                    print(f'Pondered {ponderer.iterations} iterations during the opponent\'s turn')
+
                 # update saved state of player with previous action of opponent
                 if saved_state[player]:
                     saved_state[player] = update_saved_state(saved_state[player], action)
 
+                kwargs = {}
+                if time_manager is not None:
+                    ply = np.count_nonzero(board)
+                    move_time = time_manager.move_time(ply, position_uncertainty(saved_state[player]))
+                if move_time is not None and accepts_argument(gen_move, "time_limit"):
+                    kwargs["time_limit"] = move_time
+                if log_stat and accepts_argument(gen_move, "stats"):
+                    kwargs["stats"] = SearchStats()
+
+                t_move = time.time()
                 action, saved_state[player] = gen_move(
                     board.copy(),  # copy board to be safe, even though agents shouldn't modify it
                     player, 
                     saved_state[player], 
-                    *args
+                    *args,
+                    **kwargs
                 )
 
                 print(f'Move time: {time.time() - t0:.3f}s')
+                if "stats" in kwargs:
+                    print(kwargs["stats"].summary())
+                if time_manager is not None:
+                    time_manager.update(time.time() - t_move)
+                    print(f'Time left: {time_manager.remaining_time:.3f}s')
+                if isinstance(saved_state[player], SearchTree):
+                    print_tree_memory(saved_state[player])
 
                 move_status = check_move_status(board, action)
                 if move_status != MoveStatus.IS_VALID:
@@ -119,6 +184,33 @@ def play(
                     playing = False
                     break
 
+                if ponderer is not None and isinstance(saved_state[player], SearchTree):
+                    ponderer.start(saved_state[player])
+
+        for ponderer in ponderers:
+            if ponderer is not None:
+                ponderer.stop()
+
+
+def accepts_argument(gen_move: GenMove, name: str) -> bool:
+    """Returns True if the move generator has a parameter of the given name (or takes any keyword arguments)."""
+    parameters = inspect.signature(gen_move).parameters
+    return name in parameters or any(
+        parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()
+    )
+
+
+def print_tree_memory(tree: SearchTree) -> None:
+    """Print the size of the search tree and the nodes freed when it was moved to the current game state."""
+    memory = tree.memory()
+    message = f'Search tree: {memory.num_nodes} nodes, {memory.num_bytes / 1024:.0f} KiB'
+    if tree.last_reroot is not None:
+        report = tree.last_reroot
+        message += f' (reused {report.retained_nodes} nodes, freed {report.freed_nodes} nodes / {report.freed_bytes / 1024:.0f} KiB)'
+    if memory.num_evictions:
+        message += f', {memory.num_evictions} nodes evicted'
+    print(message)
+
 
 if __name__ == "__main__":
     play()
@@ -0,0 +1,129 @@
+import sys
+import os
+import math
+from functools import partial
+
+import pytest
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+import arena
+from agents.agent_mcts import generate_move_mcts, generate_move_mcts_leaf_parallel
+from agents.agent_random import generate_move_random
+
+
+def generate_move_illegal(board, player, saved_state):
+    """Agent that always plays the first column, even when it is full."""
+    return gu.PlayerAction(0), saved_state
+
+
+def test_elo_of_scores():
+    """Test the conversion between Elo differences and expected scores."""
+    assert arena.score_to_elo(0.5) == 0 and arena.elo_to_score(0) == 0.5, "Equal scores should be 0 Elo."
+    assert math.isclose(arena.score_to_elo(arena.elo_to_score(120)), 120), "Elo and score are not inverse."
+    assert arena.score_to_elo(1) == math.inf and arena.score_to_elo(0) == -math.inf, (
+        "Perfect scores should be infinite Elo differences.")
+
+
+def test_elo_estimate_interval_narrows_with_games():
+    """Test that the confidence interval contains the estimate and narrows with more games."""
+    few = arena.elo_estimate(6, 2, 4)
+    many = arena.elo_estimate(60, 20, 40)
+    assert few.lower < few.elo < few.upper and math.isclose(few.elo, many.elo), (
+        "Estimate is not inside its confidence interval.")
+    assert many.upper - many.lower < few.upper - few.lower, "Interval does not narrow with more games."
+
+
+def test_elo_estimate_of_perfect_scores_is_finite():
+    """Test that all wins, all losses and all draws give a finite estimate with a finite bound."""
+    wins, losses = arena.elo_estimate(20, 0, 0), arena.elo_estimate(0, 0, 20)
+    assert 0 < wins.lower < wins.elo < math.inf == wins.upper, "All wins do not give a finite lower bound."
+    assert -math.inf == losses.lower < losses.elo < losses.upper < 0, "All losses do not give a finite upper bound."
+    assert math.isclose(wins.elo, -losses.elo) and math.isclose(wins.lower, -losses.upper), (
+        "Estimates of all wins and all losses are not symmetric.")
+    draws = arena.elo_estimate(0, 20, 0)
+    assert draws.elo == 0 and -math.inf < draws.lower < 0 < draws.upper < math.inf, (
+        "All draws do not give a finite interval around 0.")
+    assert arena.SPRT().decision(0, 20, 0) is None, "SPRT decided after even draws."
+
+
+def test_sprt_accepts_hypotheses():
+    """Test that the SPRT accepts H1 for a clearly stronger agent, H0 for a weaker one, and waits in between."""
+    sprt = arena.SPRT(elo0=0, elo1=50)
+    lower, upper = sprt.bounds()
+    assert lower < 0 < upper, "SPRT bounds should enclose 0."
+    assert sprt.decision(80, 10, 10) == arena.ACCEPT_H1, "SPRT did not accept H1 for a much stronger agent."
+    assert sprt.decision(10, 10, 80) == arena.ACCEPT_H0, "SPRT did not accept H0 for a much weaker agent."
+    assert sprt.decision(3, 2, 3) is None, "SPRT decided after a few even games."
+    assert sprt.decision(8, 0, 0) == arena.ACCEPT_H1, "SPRT did not decide when all games were won."
+
+
+def test_latency_percentiles():
+    """Test that the percentiles of the move times are ordered and the maximum is the largest time."""
+    latencies = arena.latency_percentiles([0.1, 0.2, 0.3, 0.4, 1.0])
+    assert list(latencies) == list(arena.LATENCY_PERCENTILES), "Percentiles are missing."
+    assert latencies[50] == 0.3 and latencies[100] == 1.0, "Median or maximum move time is wrong."
+
+
+def test_play_game_scores_first_agent():
+    """Test that a game is played to its end and scored from the first agent's perspective."""
+    score, num_moves, illegal_move, move_times = arena.play_game(
+        partial(generate_move_mcts, iterations=200), generate_move_random)
+    assert score in (0, 0.5, 1) and not illegal_move, "Game did not end with a valid score."
+    assert len(move_times[0]) + len(move_times[1]) == num_moves and len(move_times[0]) - len(move_times[1]) in (0, 1), (
+        "Move times were not recorded for every move.")
+
+
+def test_illegal_move_loses():
+    """Test that an agent playing into a full column loses the game."""
+    score, num_moves, illegal_move, _ = arena.play_game(generate_move_illegal, generate_move_illegal)
+    assert illegal_move and num_moves == gu.BOARD_ROWS and score == 0, (
+        "Illegal move of the first agent did not lose the game.")
+
+
+def test_match_alternates_first_agent():
+    """Test that the agents alternate who moves first and the results count all games."""
+    records = list(arena.play_games(generate_move_random, generate_move_random, 6, num_workers=1, seed=3))
+    assert [record.agent_1_first for record in records] == [True, False] * 3, "Agents do not alternate."
+    result = arena.run_match(generate_move_random, generate_move_random, 6, num_workers=1, seed=3)
+    assert result.num_games == 6 and result.llr is None and result.decision is None, (
+        "Match without SPRT did not play all games.")
+
+
+def test_match_in_worker_processes():
+    """Test that a match in a pool of worker processes plays all games and reports the latencies of both agents."""
+    result = arena.run_match(partial(generate_move_mcts, iterations=20), generate_move_random, 4, num_workers=2, seed=1)
+    assert result.num_games == 4, "Not all games of the match were played."
+    assert all(latencies[100] >= latencies[50] > 0 for latencies in result.latencies), (
+        "Latencies of the agents are missing.")
+
+
+def test_sprt_stops_match_early():
+    """Test that the SPRT stops a match against a much weaker agent before all games are played."""
+    result = arena.run_match(partial(generate_move_mcts, iterations=200), generate_move_random, 100,
+                             num_workers=1, sprt=arena.SPRT(0, 100), seed=0)
+    assert result.decision == arena.ACCEPT_H1 and result.num_games < 100, "SPRT did not stop the match early."
+
+
+def test_parse_agent():
+    """Test that agents are parsed from their name and keyword arguments."""
+    agent = arena.parse_agent("mcts:iterations=500,rave=True,playout_policy=heavy")
+    assert agent.func is generate_move_mcts and agent.keywords == {
+        "iterations": 500, "rave": True, "playout_policy": "heavy"}, "Keyword arguments were not parsed."
+    assert arena.parse_agent("random") is generate_move_random, "Agent without arguments is not the move generator."
+    with pytest.raises(ValueError):
+        arena.parse_agent("unknown")
+    with pytest.raises(ValueError):
+        arena.parse_agent("mcts:iterations")
+
+
+def test_process_parallel_agents_play_in_this_process():
+    """Test that agents starting their own processes are rejected by a pool and play in this process by default."""
+    agent = partial(generate_move_mcts_leaf_parallel, iterations=20, playouts_per_leaf=2, num_workers=2)
+    with pytest.raises(ValueError, match="workers"):
+        arena.run_match(agent, generate_move_random, 2, num_workers=2)
+    assert arena.match_workers(agent, generate_move_random, 2) == 1, "Match of a parallel agent uses a pool."
+    result = arena.run_match(agent, generate_move_random, 2, seed=0)
+    assert result.num_games == 2, "Match of a process-parallel agent was not played."
@@ -0,0 +1,36 @@
+import sys
+import os
+
+# add parent directory and benchmarks to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+import suite
+
+
+def test_compare_results_finds_regressions_beyond_threshold():
+    """Test that only metrics worse than the baseline by more than the threshold are regressions."""
+    baseline = {"case": {"ops_per_sec": 1000.0, "p50_us": 10.0, "peak_kib": 100.0}, "tree_memory": {"nodes@1000": 800}}
+    current = {"case": {"ops_per_sec": 700.0, "p50_us": 11.0, "peak_kib": 80.0}, "tree_memory": {"nodes@1000": 1000},
+               "new case": {"ops_per_sec": 1.0}}
+    regressions = suite.compare_results(baseline, current)
+    assert {(regression.case, regression.metric) for regression in regressions} == {
+        ("case", "ops_per_sec"), ("tree_memory", "nodes@1000")}, (
+        "Regressions do not match the metrics beyond their thresholds.")
+    assert suite.compare_results(baseline, current, threshold=0.5) == [], (
+        "A larger threshold should accept the changes.")
+
+
+def test_run_case_reports_metrics_and_baseline_round_trip(tmp_path):
+    """Test that a case reports all metrics and that a saved baseline compares without regressions to itself."""
+    results = suite.run_suite(only=["get_all_valid_actions", "tree_memory"], scale=0.01)
+    metrics = results["get_all_valid_actions"]
+    assert set(metrics) == {"ops_per_sec", "p50_us", "p90_us", "p99_us", "peak_kib"}, "Metrics are missing."
+    assert metrics["ops_per_sec"] > 0 and metrics["p50_us"] <= metrics["p90_us"] <= metrics["p99_us"], (
+        "Metrics of the timed case are not consistent.")
+    assert results["tree_memory"]["nodes@100"] > 0, "Tree memory was not measured."
+    path = str(tmp_path / "baseline.json")
+    suite.save_baseline(path, results, scale=0.01)
+    baseline = suite.load_baseline(path)
+    assert baseline["scale"] == 0.01 and suite.compare_results(baseline["results"], results) == [], (
+        "Saved baseline does not match the results.")
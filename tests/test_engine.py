@@ -0,0 +1,136 @@
+import sys
+import os
+import queue
+import subprocess
+import threading
+import time
+
+import pytest
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+
+ENGINE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'engine.py'))
+TIMEOUT = 30  # seconds to wait for an answer of the engine
+
+
+class EngineProcess:
+    """Runs engine.py as subprocess, the lines it sends are collected by a reader thread."""
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, ENGINE_PATH], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1, cwd=os.path.dirname(ENGINE_PATH))
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.lines.put(line.rstrip("\n"))
+
+    def send(self, *commands):
+        for command in commands:
+            self.process.stdin.write(command + "\n")
+        self.process.stdin.flush()
+
+    def read_until(self, prefix):
+        """Returns the lines sent up to and including the first line starting with prefix."""
+        lines = []
+        while not lines or not lines[-1].startswith(prefix):
+            lines.append(self.lines.get(timeout=TIMEOUT))
+        return lines
+
+    def close(self):
+        self.send("quit")
+        self.process.wait(timeout=TIMEOUT)
+
+
+@pytest.fixture
+def engine():
+    engine = EngineProcess()
+    yield engine
+    if engine.process.poll() is None:
+        engine.process.kill()
+
+
+def parse_info(line):
+    """Returns the values of an info line by name, the pv as list of columns."""
+    tokens = line.split()
+    pv_start = tokens.index("pv") if "pv" in tokens else len(tokens)
+    info = dict(zip(tokens[1:pv_start:2], tokens[2:pv_start:2]))
+    info["pv"] = [int(token) for token in tokens[pv_start + 1:]]
+    return info
+
+
+def test_handshake_and_quit(engine):
+    """Test that the engine identifies itself, lists its options, answers isready and exits on quit."""
+    engine.send("uci")
+    lines = engine.read_until("uciok")
+    assert lines[0].startswith("id name") and any(line.startswith("option name Iterations") for line in lines), (
+        "Engine did not identify itself or list its options.")
+    engine.send("foo", "isready")
+    assert engine.read_until("readyok") == ["info string unknown command foo", "readyok"], (
+        "Unknown command was not reported.")
+    engine.close()
+    assert engine.process.returncode == 0, "Engine did not exit on quit."
+
+
+def test_go_iterations_streams_info_and_blocks_win(engine):
+    """Test that a search reports iterations, nodes, nps and a pv, and the bestmove blocks the opponent."""
+    engine.send("position startpos moves 0 6 0 6 0", "go iterations 1000")
+    lines = engine.read_until("bestmove")
+    info = parse_info(lines[-2])
+    assert lines[-2].startswith("info") and int(info["iterations"]) == int(info["visits"]) == 1000, (
+        "Final info line does not report the iterations of the search.")
+    assert int(info["nodes"]) > 0 and int(info["nps"]) > 0 and len(info["pv"]) == int(info["depth"]) >= 1, (
+        "Info line is incomplete.")
+    assert lines[-1].split()[1] == "0" == str(info["pv"][0]), "Engine did not block the win in column 0."
+
+
+def test_value_is_mean_result(engine):
+    """Test that the value of the info line is the mean result, so a drawn last move has value 0.5."""
+    moves = "4 3 6 0 1 4 5 5 1 1 5 0 1 6 0 1 5 5 1 0 4 6 3 2 6 6 0 4 6 5 2 0 4 2 4 2 2 2 3 3 3"
+    engine.send("setoption name SolverThreshold value -1", f"position startpos moves {moves}", "go iterations 10")
+    lines = engine.read_until("bestmove")
+    assert float(parse_info(lines[-2])["value"]) == 0.5 and lines[-1] == "bestmove 3", (
+        "Value of the drawn last move is not the mean result 0.5.")
+
+
+def test_tree_is_reused_between_positions(engine):
+    """Test that a position continuing the previous one reuses the visits of the earlier search."""
+    engine.send("position startpos moves 3", "go iterations 2000")
+    best_move, ponder_move = engine.read_until("bestmove")[-1].split()[1::2]
+    engine.send(f"position startpos moves 3 {best_move} {ponder_move}", "go iterations 2000")
+    info = parse_info(engine.read_until("bestmove")[-2])
+    assert int(info["visits"]) == 2000 and int(info["iterations"]) < 2000, "Visits of the saved tree were not reused."
+    engine.send("newgame", "position startpos moves 3", "go iterations 500")
+    info = parse_info(engine.read_until("bestmove")[-2])
+    assert int(info["iterations"]) == 500, "Tree was not discarded by newgame."
+
+
+def test_infinite_search_and_ponder_until_stopped(engine):
+    """Test that infinite searches and pondering run until stopped, and only go answers with a bestmove."""
+    engine.send("go infinite", "isready")
+    engine.read_until("readyok")
+    engine.send("stop")
+    move = int(engine.read_until("bestmove")[-1].split()[1])
+    assert 0 <= move < gu.BOARD_COLS, "Stopped infinite search did not send a valid move."
+
+    engine.send("position startpos moves 3", "ponder", "isready")
+    engine.read_until("readyok")
+    time.sleep(0.5)
+    engine.send("stop", "position startpos moves 3 3", "go iterations 100")
+    lines = engine.read_until("bestmove")
+    assert sum(line.startswith("bestmove") for line in lines) == 1, "Pondering sent a bestmove."
+    assert int(parse_info(lines[-2])["iterations"]) < 100, "Visits of pondering were not reused."
+
+
+def test_invalid_commands_and_solved_position(engine):
+    """Test that illegal positions and options are reported, and that small endgames are solved."""
+    engine.send("position startpos moves 0 0 0 0 0 0 0", "setoption name Rave value maybe", "isready")
+    lines = engine.read_until("readyok")
+    assert lines[0].startswith("info string illegal move 0") and lines[1].startswith("info string"), (
+        "Illegal move or invalid option was not reported.")
+    engine.send("setoption name SolverThreshold value 42", "position startpos moves 0 1 0 1 0 1", "go")
+    lines = engine.read_until("bestmove")
+    assert lines[0].startswith("info string solved") and lines[-1] == "bestmove 0", "Won position was not solved."
@@ -0,0 +1,103 @@
+import sys
+import os
+import random
+
+import numpy as np
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import mcts
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.evaluation import evaluate_batch, evaluate_bitboard
+
+
+def random_boards(num_boards: int) -> np.ndarray:
+    """Returns boards after a random number of random moves (games end with a win or a full board)."""
+    boards = []
+    for _ in range(num_boards):
+        board = gu.Board()
+        for _ in range(random.randint(0, gu.BOARD_CELLS)):
+            if board.is_full() or board.is_win():
+                break
+            board.play(random.choice(board.valid_actions()))
+        boards.append(board.to_array())
+    return np.array(boards)
+
+
+def test_evaluation_of_won_positions():
+    """Test that a won position evaluates to 1 for the winner and -1 for the opponent."""
+    board = gu.initialize_game_state()
+    board[0, 0:4] = gu.PLAYER2
+    board[1, 0:3] = gu.PLAYER1
+    position, mask = gu.board_to_bitboard(board)
+    assert evaluate_bitboard(position, mask, gu.PLAYER2) == 1.0, "Win should evaluate to 1."
+    assert evaluate_bitboard(position, mask, gu.PLAYER1) == -1.0, "Loss should evaluate to -1."
+    assert evaluate_bitboard(0, 0, gu.PLAYER1) == 0.0, "Empty board should evaluate to 0."
+
+
+def test_evaluation_prefers_center_and_threats():
+    """Test that a center piece and a threat on a row of the own parity are evaluated as advantages."""
+    board = gu.initialize_game_state()
+    board[0, 3] = gu.PLAYER1
+    board[0, 0] = gu.PLAYER2
+    position, mask = gu.board_to_bitboard(board)
+    center_value = evaluate_bitboard(position, mask, gu.PLAYER1)
+    assert 0 < center_value < 1, "Center piece should be evaluated as an advantage."
+
+    # PLAYER1 threatens to connect four on the 3rd row (odd row, own parity)
+    board = gu.initialize_game_state()
+    board[0:2, 0:3] = [[gu.PLAYER2, gu.PLAYER1, gu.PLAYER2], [gu.PLAYER2, gu.PLAYER1, gu.PLAYER2]]
+    board[0:3, 4] = [gu.PLAYER1, gu.PLAYER2, gu.PLAYER1]
+    board[2, 1:3] = gu.PLAYER1
+    board[0:2, 6] = [gu.PLAYER2, gu.PLAYER1]
+    board[0:2, 5] = [gu.PLAYER1, gu.PLAYER2]
+    position, mask = gu.board_to_bitboard(board)
+    assert gu.bitboard_winning_cells(gu.bitboard_player_pieces(position, mask, gu.PLAYER1), mask), (
+        "Test position should contain a threat of PLAYER1."
+    )
+    assert evaluate_bitboard(position, mask, gu.PLAYER1) > center_value, (
+        "Threat on the own parity row should be evaluated as a larger advantage than a center piece."
+    )
+
+
+def test_evaluation_is_antisymmetric_and_batch_matches_single():
+    """Test that the evaluation of both players sums to 0 and the batch evaluation matches the single one."""
+    boards = random_boards(100)
+    for player in (gu.PLAYER1, gu.PLAYER2):
+        single = np.array([evaluate_bitboard(*gu.board_to_bitboard(board), player) for board in boards])
+        opponent = np.array([evaluate_bitboard(*gu.board_to_bitboard(board), 3 - player) for board in boards])
+        assert np.all(np.abs(single) <= 1), "Evaluation should be in [-1, 1]."
+        assert np.allclose(single, -opponent), "Evaluation should be antisymmetric."
+        assert np.allclose(evaluate_batch(boards, player), single), "Batch evaluation should match single evaluation."
+
+
+def test_depth_limited_simulation_returns_evaluation():
+    """Test that a simulation stopped by the depth limit returns the evaluation of the position instead of a draw."""
+    board = gu.initialize_game_state()
+    board[0, 3] = gu.PLAYER1
+    tree = SearchTree(board, player=gu.PLAYER1)
+    position, mask = tree.bitboard(tree.root)
+    win_value, move_count = mcts.simulation(tree, tree.root, max_simulation_depth=0)
+    assert (win_value, move_count) == (evaluate_bitboard(position, mask, gu.PLAYER1), 0), (
+        "Stopped simulation should return the evaluation of its last position."
+    )
+    _, _, results = mcts.simulation_batch(board[None], gu.PLAYER2, max_simulation_depth=0, evaluate=True)
+    assert np.isclose(results[0], -win_value), "Stopped batch simulation should return the evaluation for the player to move."
+
+
+def test_backpropagation_of_fractional_result():
+    """Test that a fractional result adds its positive part to the wins of each node on the path."""
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2)
+    root = tree.root
+    child = mcts.expansion(tree, root)
+    mcts.backpropagation(tree, child, 0.25)
+    assert (tree.visits[child], tree.wins[child], tree.value[child]) == (1, 0.25, 0.25), (
+        "Child should get the fractional result as win share."
+    )
+    assert (tree.visits[root], tree.wins[root], tree.value[root]) == (1, 0, -0.25), (
+        "Root should get the negated result and no win share."
+    )
+    wins, draws, losses = mcts.split_results(np.array([0.25, -0.5, 1.0, 0.0]))
+    assert (wins, draws, losses) == (1.25, 2.25, 0.5), "Results should be split into wins, draws, and losses."
@@ -180,3 +180,234 @@ def test_wrong_type():
     assert gu.check_move_status(board, col_idx) == gu.MoveStatus.WRONG_TYPE, (
         "MoveStatus for incorrect column data type is note WRONG_TYPE."
     )
+
+
+def test_board_to_bitboard_and_back():
+    """Test reconstruction (transformation to bitboard and then back to np.ndarray) of a played board."""
+    board = gu.initialize_game_state()
+    for col_idx, player in [(3, gu.PLAYER1), (3, gu.PLAYER2), (0, gu.PLAYER1), (6, gu.PLAYER2), (3, gu.PLAYER1)]:
+        gu.apply_player_action(board, col_idx, player)
+    position, mask = gu.board_to_bitboard(board)
+    reconstructed_board = gu.bitboard_to_board(position, mask)
+    assert np.all(board == reconstructed_board), (
+        "Bitboard reconstruction is not identical to original board.")
+
+
+def test_bitboard_apply_action_matches_board():
+    """Test that actions applied to a bitboard result in the same board as actions applied to the np.ndarray."""
+    board = gu.initialize_game_state()
+    position, mask = gu.board_to_bitboard(board)
+    for col_idx, player in [(2, gu.PLAYER1), (2, gu.PLAYER2), (5, gu.PLAYER1), (2, gu.PLAYER2)]:
+        gu.apply_player_action(board, col_idx, player)
+        position, mask = gu.bitboard_apply_action(position, mask, col_idx, player)
+    assert np.all(gu.bitboard_to_board(position, mask) == board), (
+        "Bitboard after actions does not match board after actions.")
+
+
+def test_bitboard_connected_four_in_all_directions():
+    """Test that four connected pieces are detected on bitboards horizontally, vertically and diagonally."""
+    bool_res = []
+    boards = [gu.initialize_game_state() for _ in range(5)]
+    boards[0][0, 1:5] = gu.PLAYER1  # horizontal
+    boards[1][2:6, 6] = gu.PLAYER1  # vertical
+    for idx in range(4):
+        boards[2][idx + 1, idx + 2] = gu.PLAYER1  # diagonal
+        boards[3][idx + 2, 5 - idx] = gu.PLAYER1  # anti-diagonal
+    boards[4][0, 0:3] = gu.PLAYER1  # only three connected
+    boards[4][0, 3] = gu.PLAYER2
+    for board in boards:
+        position, mask = gu.board_to_bitboard(board)
+        bool_res.append(gu.bitboard_connected_four(gu.bitboard_player_pieces(position, mask, gu.PLAYER1)))
+    assert bool_res == [True, True, True, True, False], (
+        "At least one check of four connected pieces on a bitboard does not match expected outcomes.")
+
+
+def test_bitboard_valid_actions_exclude_full_column():
+    """Test that the valid actions of a bitboard do not contain full columns."""
+    board = gu.initialize_game_state()
+    board[:, 4] = np.array([1, 2, 1, 2, 1, 2])
+    _, mask = gu.board_to_bitboard(board)
+    assert gu.bitboard_valid_actions(mask) == [0, 1, 2, 3, 5, 6], (
+        "Valid actions of bitboard do not match non-full columns.")
+
+
+def test_board_play_and_undo_restores_board():
+    """Test that undoing all played moves restores the initial Board (bitboard, heights, ply and player)."""
+    board = gu.Board()
+    for col_idx in [3, 3, 2, 4, 3, 0]:
+        board.play(col_idx)
+    assert board.heights[3] == 3 and board.ply == 6, (
+        "Heights or ply of Board not updated by played moves.")
+    for _ in range(6):
+        board.undo()
+    assert (board.position, board.mask, board.ply, board.player) == (0, 0, 0, gu.PLAYER1), (
+        "Undoing all moves did not restore the empty Board.")
+    assert board.heights == [0] * gu.BOARD_COLS, (
+        "Undoing all moves did not restore the column heights.")
+
+
+
+def test_board_hash_is_updated_incrementally():
+    """Test that the Zobrist hash of a Board after play and undo equals the hash computed from scratch."""
+    board = gu.Board()
+    for col_idx in [3, 3, 2, 4, 3, 0]:
+        board.play(col_idx)
+        assert board.hash == gu.zobrist_hash(board.position, board.mask), (
+            "Incremental Zobrist hash differs from the recomputed hash.")
+    for _ in range(6):
+        board.undo()
+    assert board.hash == 0, (
+        "Undoing all moves did not restore the hash of the empty Board.")
+
+
+def test_zobrist_hash_is_equal_for_transpositions():
+    """Test that the same position reached by different move orders has the same hash."""
+    board_1, board_2 = gu.Board(), gu.Board()
+    for col_idx in [3, 2, 4, 5]:
+        board_1.play(col_idx)
+    for col_idx in [4, 5, 3, 2]:
+        board_2.play(col_idx)
+    assert board_1.hash == board_2.hash, (
+        "Transposed positions have different hashes.")
+
+
+def test_board_matches_array_board():
+    """Test that a Board created from an np.ndarray plays the same moves as apply_player_action."""
+    array_board = gu.initialize_game_state()
+    array_board[:, 1] = np.array([1, 2, 1, 0, 0, 0])
+    board = gu.Board(array_board, player=gu.PLAYER2)
+    board.play(1)
+    gu.apply_player_action(array_board, 1, gu.PLAYER2)
+    assert np.all(board.to_array() == array_board), (
+        "Board does not match the np.ndarray board after the same move.")
+
+
+def test_board_detects_win_and_full_column():
+    """Test that a Board detects a vertical win and a full column."""
+    board = gu.Board()
+    for col_idx in [0, 1, 0, 1, 0, 1]:
+        board.play(col_idx)
+    assert not board.is_win() and board.check_end_state() == gu.GameState.STILL_PLAYING, (
+        "Win detected although nobody connected four.")
+    board.play(0)
+    assert board.is_win() and board.check_end_state() == gu.GameState.IS_WIN, (
+        "Vertical win of Board not detected.")
+    board.play(0)
+    board.play(0)
+    assert not board.can_play(0) and 0 not in board.valid_actions(), (
+        "Full column of Board is still playable.")
+
+
+def test_board_detects_draw():
+    """Test that a full Board without four connected pieces is detected as draw."""
+    board = gu.Board()
+    # columns filled in pairs with shifted order, so that no four pieces are connected
+    for col_pair in [(0, 1), (2, 3), (4, 5)]:
+        for _ in range(3):
+            board.play(col_pair[0])
+            board.play(col_pair[1])
+        for _ in range(3):
+            board.play(col_pair[1])
+            board.play(col_pair[0])
+    for _ in range(gu.BOARD_ROWS):
+        board.play(6)
+    assert board.is_full() and board.is_draw(), (
+        "Full board without four connected pieces not detected as draw.")
+
+
+def test_four_in_a_row_window_tables():
+    """Test that all 69 windows of four cells are found and that each cell knows the windows through it."""
+    assert gu.WINDOWS.shape == (69, 4), (
+        "Number of windows of four cells is not 69.")
+    # bottom left corner: one horizontal, one vertical, and one diagonal window
+    corner_windows = gu.CELL_WINDOWS[0][gu.CELL_WINDOWS[0] < len(gu.WINDOWS)]
+    assert len(corner_windows) == 3 and np.all(np.any(gu.WINDOWS[corner_windows] == 0, axis=1)), (
+        "Windows through the corner cell are not correct.")
+
+
+def test_connected_four_batch_matches_single_board_check():
+    """Test that the batch win detection matches the bitboard check of each single board."""
+    boards = np.stack([gu.create_random_game_state() for _ in range(100)])
+    expected = []
+    for board in boards:
+        position, mask = gu.board_to_bitboard(board)
+        expected.append(gu.bitboard_connected_four(gu.bitboard_player_pieces(position, mask, gu.PLAYER2)))
+    assert np.all(gu.connected_four_batch(boards, gu.PLAYER2) == np.array(expected)), (
+        "Batch win detection does not match single board win detection.")
+
+
+def test_connected_four_batch_with_last_actions():
+    """Test that the batch win detection limited to the last actions only finds wins through the last pieces."""
+    boards = np.stack([gu.initialize_game_state() for _ in range(3)])
+    boards[:, 0, 0:4] = gu.PLAYER1  # horizontal win in all boards
+    boards[2, 0:2, 6] = gu.PLAYER1
+    last_actions = np.array([2, 6, 3])  # only boards 0 and 2 have their last piece in the winning row
+    won = gu.connected_four_batch(boards, gu.PLAYER1, last_actions=last_actions)
+    assert list(won) == [True, False, True], (
+        "Batch win detection through the last actions does not match expected outcomes.")
+
+
+def test_check_end_state_batch():
+    """Test that the batch end state check returns win, draw, and still playing states."""
+    win_board = gu.initialize_game_state()
+    win_board[0:4, 2] = gu.PLAYER2
+    draw_board = gu.Board()
+    for col_pair in [(0, 1), (2, 3), (4, 5)]:
+        for _ in range(3):
+            draw_board.play(col_pair[0])
+            draw_board.play(col_pair[1])
+        for _ in range(3):
+            draw_board.play(col_pair[1])
+            draw_board.play(col_pair[0])
+    for _ in range(gu.BOARD_ROWS):
+        draw_board.play(6)
+    boards = np.stack([win_board, draw_board.to_array(), gu.initialize_game_state()])
+    players = np.array([gu.PLAYER2, gu.PLAYER1, gu.PLAYER1])
+    states = gu.check_end_state_batch(boards, players)
+    expected = [gu.GameState.IS_WIN.value, gu.GameState.IS_DRAW.value, gu.GameState.STILL_PLAYING.value]
+    assert list(states) == expected, (
+        "Batch end states do not match expected game states.")
+
+
+def test_bitboard_mirror_and_canonical_key():
+    """Test that mirroring a bitboard mirrors the board and that a position and its mirror image share the canonical key."""
+    board = gu.create_random_game_state()
+    position, mask = gu.board_to_bitboard(board)
+    mirrored = (gu.bitboard_mirror(position), gu.bitboard_mirror(mask))
+    assert np.array_equal(gu.bitboard_to_board(*mirrored), np.fliplr(gu.bitboard_to_board(position, mask))), (
+        "Mirrored bitboard does not match the mirrored board.")
+    key, is_mirrored = gu.bitboard_canonical_key(position, mask)
+    mirrored_key, is_mirrored_mirror = gu.bitboard_canonical_key(*mirrored)
+    assert key == mirrored_key == min(gu.bitboard_key(position, mask), gu.bitboard_key(*mirrored)), (
+        "Position and mirror image do not share the smaller key as canonical key.")
+    assert is_mirrored != is_mirrored_mirror or position == mirrored[0] and mask == mirrored[1], (
+        "Exactly one of position and mirror image should be flagged as mirrored.")
+
+
+def test_canonical_board_is_shared_by_mirror_images():
+    """Test that a board and its mirror image have the same canonical form and that actions are mirrored back."""
+    board = gu.create_random_game_state()
+    canonical, is_mirrored = gu.canonical_board(board)
+    mirrored_canonical, is_mirrored_mirror = gu.canonical_board(np.fliplr(board))
+    assert np.array_equal(canonical, mirrored_canonical), "Board and mirror image have different canonical forms."
+    assert np.array_equal(np.fliplr(canonical) if is_mirrored else canonical, board), (
+        "Canonical form is not the board or its mirror image.")
+    position, mask, bitboard_is_mirrored = gu.bitboard_canonical(*gu.board_to_bitboard(board))
+    assert (position, mask) == gu.board_to_bitboard(canonical) and bitboard_is_mirrored == is_mirrored, (
+        "Canonical bitboard does not match the canonical board.")
+    assert gu.bitboard_is_symmetric(*gu.board_to_bitboard(board)) == (is_mirrored == is_mirrored_mirror), (
+        "Only a symmetric board is flagged the same way as its mirror image.")
+    assert [gu.mirror_action(action) for action in range(gu.BOARD_COLS)] == list(range(gu.BOARD_COLS))[::-1], (
+        "Actions are not mirrored at the center column.")
+
+
+def test_bitboard_key_is_unique():
+    """Test that different positions of random games have different keys."""
+    positions = set()
+    for _ in range(2000):
+        board = gu.Board()
+        for _ in range(np.random.randint(0, 12)):
+            board.play(int(np.random.choice(gu.bitboard_valid_actions(board.mask))))
+        positions.add((board.position, board.mask))
+    keys = {gu.bitboard_key(position, mask) for position, mask in positions}
+    assert len(keys) == len(positions), "Different positions share a key."
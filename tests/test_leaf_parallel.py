@@ -0,0 +1,81 @@
+import sys
+import os
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import leaf_parallel
+from agents.agent_mcts.tree import SearchTree
+
+
+def test_pool_returns_counts_of_all_simulations():
+    """
+    Test that the workers run the requested number of simulations for every submitted leaf
+    and that the slots of the ring buffer are freed again.
+    """
+    pool = leaf_parallel.LeafParallelPool(num_workers=2, num_slots=3)
+    try:
+        bitboard = gu.board_to_bitboard(gu.initialize_game_state())
+        submitted = [pool.submit(bitboard, gu.PLAYER1, num_simulations=10) for _ in range(3)]
+        assert not pool.has_free_slot(), (
+            "Ring buffer should be full after submitting a leaf to every slot."
+        )
+        results = dict(pool.get_result() for _ in range(3))
+        assert sorted(results) == sorted(submitted) and all(sum(counts) == 10 for counts in results.values()), (
+            "Results do not contain the counts of all simulations of all submitted leaves."
+        )
+        assert pool.has_free_slot(), (
+            "Slots were not freed after their results were read."
+        )
+    finally:
+        pool.close()
+
+
+def test_pool_returns_win_for_terminal_leaf():
+    """
+    Test that a leaf whose move already won the game is counted as a win for all simulations.
+    """
+    pool = leaf_parallel.LeafParallelPool(num_workers=1, num_slots=1)
+    try:
+        board = gu.initialize_game_state()
+        board[0:4, 0] = gu.PLAYER2
+        board[0:3, 1] = gu.PLAYER1
+        slot = pool.submit(gu.board_to_bitboard(board), gu.PLAYER2, num_simulations=5)
+        assert pool.slots["hashes"][slot] == gu.zobrist_hash(*gu.board_to_bitboard(board)), (
+            "Zobrist hash of the leaf was not written into its slot."
+        )
+        _, counts = pool.get_result()
+        assert counts == (5, 0, 0), (
+            "Terminal leaf was not counted as win for all simulations."
+        )
+    finally:
+        pool.close()
+
+
+def test_leaf_parallel_search_removes_virtual_losses():
+    """
+    Test that the leaf-parallel search runs all iterations and removes all virtual losses.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2)
+    pool = leaf_parallel.get_leaf_parallel_pool(num_workers=2)
+    leaf_parallel.run_leaf_parallel_search(tree, 100, pool, playouts_per_leaf=4)
+    assert tree.visits[tree.root] == 400, (
+        "Leaf-parallel search did not backpropagate all simulations."
+    )
+    assert not tree.virtual_loss[:len(tree)].any(), (
+        "Virtual losses were not removed after the leaf-parallel search."
+    )
+
+
+def test_leaf_parallel_agent_achieves_certain_victory():
+    """
+    Test that the leaf-parallel MCTS agent attains certain victory (vertically).
+    """
+    board = gu.initialize_game_state()
+    player = gu.PLAYER1
+    board[:, 3] = [1,1,1,0,0,0]
+    action, _ = leaf_parallel.generate_move_mcts_leaf_parallel(board, player, None, iterations=300, num_workers=2)
+    assert action == 3, (
+        "Certain victory (vertically) not attained by leaf-parallel MCTS agent."
+    )
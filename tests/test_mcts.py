@@ -1,4 +1,6 @@
 import numpy as np
+import pytest
+import time
 import sys
 import os
 
@@ -7,7 +9,23 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import game_utils as gu
 from agents.agent_mcts import mcts as mcts
-from agents.agent_mcts.tree import TreeNode
+from agents.agent_mcts.tree import (
+    SearchTree, NO_NODE, NODE_FIELDS, NOT_PROVEN, PROVEN_WIN, PROVEN_DRAW, PROVEN_LOSS
+)
+
+
+def create_tree_with_children(num_children, player=gu.PLAYER1):
+    """
+    Returns a search tree (without transpositions) on the empty board whose root has the 
+    given number of children (with the same board), and the list of the children.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=player, transpositions=False)
+    children = []
+    for action in range(num_children):
+        child = tree.add_node(*tree.bitboard(tree.root), 0, tree.root, gu.BoardPiece(3 - player), action)
+        tree.add_child(tree.root, action, child)
+        children.append(child)
+    return tree, children
 
 
 def test_many_simulation_runs():
@@ -28,8 +46,8 @@ def test_many_simulation_runs():
             player = gu.PLAYER2            
             win_multiplier = -1
         board = gu.initialize_game_state()
-        board_node = TreeNode(board, player=player)
-        win_value, _ = mcts.simulation(board_node, player)
+        tree = SearchTree(board, player=player)
+        win_value, _ = mcts.simulation(tree, tree.root)
         total_win_count += win_value*win_multiplier
 
     # expected value: 0, accepted deviation: 3 * std (~99%)
@@ -92,17 +110,13 @@ def test_returns_unvisited_child_immediately():
     """
     Test that the UCT selection function prioritizes unvisited child.
     """
-    board = gu.initialize_game_state()
-    parent = TreeNode(board=board)
-    child1 = TreeNode(board=board, parent=parent)
-    child2 = TreeNode(board=board, parent=parent)
+    tree, (child1, child2) = create_tree_with_children(2)
     # artificially set parameter of children nodes
-    child1.visits = 5
-    child1.wins = 3
-    child2.visits = 0  # unvisited child, should be selected
-    parent.children = [child1, child2]
+    tree.visits[child1] = 5
+    tree.wins[child1] = 3
+    tree.visits[child2] = 0  # unvisited child, should be selected
 
-    result = mcts.get_child_node_with_highest_UCT(parent)
+    result = mcts.get_child_node_with_highest_UCT(tree, tree.root)
     assert result == child2, (
         "Unvisited child was not selected."
     )
@@ -112,30 +126,26 @@ def test_returns_child_with_highest_uct_value():
     """
     Test that the UCT selection function correctly returns the child with the highest UCT score.
     """
-    board = gu.initialize_game_state()
-    parent = TreeNode(board=board)
-    child1 = TreeNode(board=board, parent=parent)
-    child2 = TreeNode(board=board, parent=parent)
+    tree, (child1, child2) = create_tree_with_children(2)
     # both children visited
-    child1.visits = 10
-    child1.wins = 5
-    child2.visits = 10
-    child2.wins = 6
-    parent.children = [child1, child2]
-    parent.visits = 20
-
-    result = mcts.get_child_node_with_highest_UCT(parent)
+    tree.visits[child1] = 10
+    tree.wins[child1] = 5
+    tree.visits[child2] = 10
+    tree.wins[child2] = 6
+    tree.visits[tree.root] = 20
+
+    result = mcts.get_child_node_with_highest_UCT(tree, tree.root)
     # calculate UCT manually to verify expected best child
-    exploit1 = child1.wins / child1.visits  # 0.5
-    explore1 = np.sqrt(2) * np.sqrt(np.log(parent.visits) / child1.visits)
+    exploit1 = tree.wins[child1] / tree.visits[child1]  # 0.5
+    explore1 = np.sqrt(2) * np.sqrt(np.log(tree.visits[tree.root]) / tree.visits[child1])
     uct1 = exploit1 + explore1
 
-    exploit2 = child2.wins / child2.visits  # 0.6
-    explore2 = np.sqrt(2) * np.sqrt(np.log(parent.visits) / child2.visits)
+    exploit2 = tree.wins[child2] / tree.visits[child2]  # 0.6
+    explore2 = np.sqrt(2) * np.sqrt(np.log(tree.visits[tree.root]) / tree.visits[child2])
     uct2 = exploit2 + explore2
 
     expected = child1 if uct1 > uct2 else child2
-    assert result is expected, (
+    assert result == expected, (
         "Did not return child node with highest UCT score."
     )
 
@@ -145,9 +155,9 @@ def test_expansion_adds_child_to_parent():
     Test that expansion adds a new child to the parent (root) node.
     """
     board = gu.initialize_game_state()
-    root_node = TreeNode(board, player=gu.PLAYER1)
-    child_node = mcts.expansion(root_node)
-    assert child_node in root_node.children, (
+    tree = SearchTree(board, player=gu.PLAYER1)
+    child_node = mcts.expansion(tree, tree.root)
+    assert child_node in tree.child_nodes(tree.root), (
         "Expansion did not add child to root node."
     )
 
@@ -157,9 +167,9 @@ def test_expansion_records_action_in_expanded_actions():
     Test that expansion records the new action in the parent's expanded actions.
     """
     board = gu.initialize_game_state()
-    root_node = TreeNode(board, player=gu.PLAYER1)
-    child_node = mcts.expansion(root_node)
-    assert child_node.previous_action in root_node.expanded_actions, (
+    tree = SearchTree(board, player=gu.PLAYER1)
+    child_node = mcts.expansion(tree, tree.root)
+    assert tree.previous_action[child_node] in tree.expanded_actions(tree.root), (
         "Action is not recored in root's expanded actions."
     )
 
@@ -169,10 +179,10 @@ def test_expansion_child_player_is_opponent():
     Test that expansion assigns the correct player (opponent) to the child node.
     """
     board = gu.initialize_game_state()
-    root_node = TreeNode(board, player=gu.PLAYER1)
-    child_node = mcts.expansion(root_node)
-    expected_player = gu.BoardPiece(3 - root_node.player)
-    assert child_node.player == expected_player, (
+    tree = SearchTree(board, player=gu.PLAYER1)
+    child_node = mcts.expansion(tree, tree.root)
+    expected_player = gu.BoardPiece(3 - tree.player[tree.root])
+    assert tree.player[child_node] == expected_player, (
         "Incorrect player assigned to child node during expansion."
     )
 
@@ -182,11 +192,11 @@ def test_expansion_grand_child_player_is_org_player():
     Test that expansion assigns the correct player (same as root player) to the grandchild node.
     """
     board = gu.initialize_game_state()
-    root_node = TreeNode(board, player=gu.PLAYER1)
-    child_node = mcts.expansion(root_node)
-    grandchild_node = mcts.expansion(child_node) 
-    expected_player = root_node.player
-    assert grandchild_node.player == expected_player, (
+    tree = SearchTree(board, player=gu.PLAYER1)
+    child_node = mcts.expansion(tree, tree.root)
+    grandchild_node = mcts.expansion(tree, child_node) 
+    expected_player = tree.player[tree.root]
+    assert tree.player[grandchild_node] == expected_player, (
         "Incorrect player assigned to grandchild node during expansion."
     )
 
@@ -196,11 +206,11 @@ def test_expansion_board_reflects_action():
     Test that the child node's board accurately reflects the action taken during expansion.
     """
     board = gu.initialize_game_state()
-    root_node = TreeNode(board, player=gu.PLAYER2)
-    child_node = mcts.expansion(root_node)
-    parent_board = root_node.board
-    child_board = child_node.board
-    action_col = child_node.previous_action
+    tree = SearchTree(board, player=gu.PLAYER2)
+    child_node = mcts.expansion(tree, tree.root)
+    parent_board = tree.board(tree.root)
+    child_board = tree.board(child_node)
+    action_col = tree.previous_action[child_node]
     col_diff = child_board[:, action_col] != parent_board[:, action_col]
     # exactly one element has changes
     assert np.sum(col_diff) == 1, (
@@ -213,8 +223,8 @@ def test_simulation_win_value_is_valid():
     Test that the simulation returns a valid win value: 1 (win), -1 (loss), or 0 (draw).
     """
     board = gu.initialize_game_state()
-    node = TreeNode(board, player=gu.PLAYER1)
-    win_value, _ = mcts.simulation(node)
+    tree = SearchTree(board, player=gu.PLAYER1)
+    win_value, _ = mcts.simulation(tree, tree.root)
     assert win_value in (-1, 0, 1), (
         "Win value should be one of -1, 0, or 1"
     )
@@ -225,9 +235,9 @@ def test_simulation_respects_max_simulation_depth():
     Test that the simulation follows the imposed maximum depth limit.
     """
     board = gu.initialize_game_state()
-    node = TreeNode(board, player=gu.PLAYER1)
+    tree = SearchTree(board, player=gu.PLAYER1)
     max_depth = 5
-    _, move_count = mcts.simulation(node, max_simulation_depth=max_depth)
+    _, move_count = mcts.simulation(tree, tree.root, max_simulation_depth=max_depth)
     assert move_count <= max_depth, (
         "Simulation move count should not exceed max_simulation_depth"
     )
@@ -237,10 +247,10 @@ def test_backpropagation_increments_visits_value_and_wins():
     """
     Test that backpropagation increments the visits, value, and wins for the root node.
     """
-    board = gu.initialize_game_state()
-    root = TreeNode(board=board)
-    mcts.backpropagation(root, simulation_result=1)
-    assert root.visits == root.value == root.wins == 1, (
+    tree, _ = create_tree_with_children(0)
+    mcts.backpropagation(tree, tree.root, simulation_result=1)
+    root = tree.root
+    assert tree.visits[root] == tree.value[root] == tree.wins[root] == 1, (
         "Incorrect value results from backpropagation."
     )
 
@@ -249,10 +259,9 @@ def test_backpropagation_does_not_increment_wins_on_draw():
     """
     Test that backpropagation does not increment the win count when the simulation result is a draw.
     """
-    board = gu.initialize_game_state()
-    root = TreeNode(board=board)    
-    mcts.backpropagation(root, simulation_result=0)
-    assert root.wins == 0, (
+    tree, _ = create_tree_with_children(0)
+    mcts.backpropagation(tree, tree.root, simulation_result=0)
+    assert tree.wins[tree.root] == 0, (
         "Wins incremented even though no win occured."
     )
 
@@ -262,11 +271,10 @@ def test_backpropagation_flips_result_and_updates_parent_and_child():
     Test that backpropagation flips the simulation result when moving up 
     the tree and updates the parent and child correctly.
     """
-    board = gu.initialize_game_state()
-    root = TreeNode(board=board)
-    child = TreeNode(board=board, parent=root)
-    mcts.backpropagation(child, simulation_result=1)
-    assert (root.visits == 1 and root.value == -1 and root.wins == 0), (
+    tree, (child,) = create_tree_with_children(1)
+    mcts.backpropagation(tree, child, simulation_result=1)
+    root = tree.root
+    assert (tree.visits[root] == 1 and tree.value[root] == -1 and tree.wins[root] == 0), (
         "Backpropagation did not correctly update parent node with simulation results."
     )
 
@@ -281,4 +289,492 @@ def test_get_all_valid_actions_returns_only_non_full_columns():
     valid_actions = mcts.get_all_valid_actions(board)
     assert col_idx not in valid_actions, (
         "Index of full column not removed from valid actions."
-    )
\ No newline at end of file
+    )
+
+def test_simulation_of_terminal_node_returns_win():
+    """
+    Test that the simulation of a node whose move already won the game returns a win 
+    without playing any further moves.
+    """
+    board = gu.initialize_game_state()
+    board[0, 0:4] = gu.PLAYER1
+    board[1, 0:3] = gu.PLAYER2
+    tree = SearchTree(board, player=gu.PLAYER1)
+    win_value, move_count = mcts.simulation(tree, tree.root)
+    assert (win_value, move_count) == (1, 0), (
+        "Simulation of terminal node did not return an immediate win."
+    )
+
+
+def test_simulation_batch_returns_valid_winners_and_move_counts():
+    """
+    Test that the batch simulation returns a valid winner and a plausible move count for every game.
+    """
+    N = 200
+    boards = np.zeros((N, *gu.BOARD_SHAPE), dtype=gu.BoardPiece)
+    winners, move_counts = mcts.simulation_batch(boards, gu.PLAYER1)
+    assert winners.shape == move_counts.shape == (N,), (
+        "Batch simulation did not return one result per game."
+    )
+    assert np.all(np.isin(winners, (gu.NO_PLAYER, gu.PLAYER1, gu.PLAYER2))), (
+        "Winners should be NO_PLAYER, PLAYER1, or PLAYER2."
+    )
+    # a game can not be won before the 7th move and can not last longer than the board size
+    assert np.all((move_counts >= 7) & (move_counts <= gu.BOARD_CELLS)), (
+        "Move counts of batch simulation out of plausible range."
+    )
+
+
+def test_simulation_batch_respects_max_simulation_depth():
+    """
+    Test that the batch simulation follows the imposed maximum depth limit.
+    """
+    boards = np.zeros((50, *gu.BOARD_SHAPE), dtype=gu.BoardPiece)
+    max_depth = 5
+    winners, move_counts = mcts.simulation_batch(boards, gu.PLAYER2, max_simulation_depth=max_depth)
+    assert np.all(move_counts == max_depth) and np.all(winners == gu.NO_PLAYER), (
+        "Batch simulation should stop all games after max_simulation_depth moves without winner."
+    )
+
+
+def test_simulation_batch_finds_forced_result():
+    """
+    Test that the batch simulation detects the win of the only possible move.
+    """
+    board = gu.initialize_game_state()
+    # columns 0-5 are full without four connected pieces, column 6 is the only valid action
+    board[:, 0:6] = [[1, 2, 1, 2, 1, 2],
+                     [1, 2, 1, 2, 1, 2],
+                     [2, 1, 2, 1, 2, 1],
+                     [2, 1, 2, 1, 2, 1],
+                     [1, 2, 1, 2, 1, 2],
+                     [1, 2, 1, 2, 1, 2]]
+    board[:, 6] = [1, 1, 1, 0, 0, 0]
+    boards = np.stack([board] * 10)
+    winners, move_counts = mcts.simulation_batch(boards, gu.PLAYER1, max_simulation_depth=1)
+    assert np.all(winners == gu.PLAYER1) and np.all(move_counts == 1), (
+        "Batch simulation did not detect the forced win."
+    )
+
+
+def test_backpropagation_batch_flips_wins_and_losses():
+    """
+    Test that batch backpropagation adds all simulations to the visits and flips wins 
+    and losses when updating the parent.
+    """
+    tree, (child,) = create_tree_with_children(1)
+    mcts.backpropagation_batch(tree, child, wins=5, draws=2, losses=3)
+    assert (tree.visits[child], tree.wins[child], tree.value[child]) == (10, 5, 2), (
+        "Batch backpropagation did not correctly update the node."
+    )
+    root = tree.root
+    assert (tree.visits[root], tree.wins[root], tree.value[root]) == (10, 3, -2), (
+        "Batch backpropagation did not correctly update the parent node."
+    )
+
+
+def test_achieve_certain_victory_with_batched_playouts():
+    """
+    Test that the MCTS agent attains certain victory when running several 
+    batched playouts per expanded leaf.
+    """
+    board = gu.initialize_game_state()
+    player = gu.PLAYER1
+    board[0, :] = [1,1,0,1,0,0,0]
+    action, _ = mcts.generate_move_mcts(board, player, saved_state=None, iterations=300, playouts_per_leaf=16)
+    gu.apply_player_action(board, action, player)
+    assert gu.check_end_state(board, player, action), (
+        "Certain victory (horizontally) not attained with batched playouts."
+    )
+
+
+def test_expansion_links_transposed_position_to_existing_node():
+    """
+    Test that expansion with a transposition table links a position reached by a 
+    different move order to the existing node instead of creating a new one.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2)
+    # expand the first three moves completely
+    nodes = [tree.root]
+    for _ in range(3):
+        nodes = [mcts.expansion(tree, node) for node in nodes for _ in range(gu.BOARD_COLS)]
+    # moves (0, 3, 6) and (6, 3, 0) reach the same position
+    first = tree.get_child(tree.get_child(tree.get_child(tree.root, 0), 3), 6)
+    second = tree.get_child(tree.get_child(tree.get_child(tree.root, 6), 3), 0)
+    assert first == second != NO_NODE, (
+        "Expansion did not link the transposed position to the existing node."
+    )
+    assert len(tree) == len(tree.table) < 1 + 7 + 7**2 + 7**3, (
+        "Transposition table stores a node for every move order."
+    )
+
+
+def test_backpropagation_updates_nodes_of_path():
+    """
+    Test that backpropagation along a path updates the nodes of the path, not the 
+    parents of the node.
+    """
+    tree, (first_parent, second_parent) = create_tree_with_children(2)
+    shared = tree.add_node(*tree.bitboard(tree.root), 0, first_parent, gu.PLAYER1, 0)
+    root = tree.root
+    mcts.backpropagation(tree, shared, 1, path=[root, second_parent, shared])
+    assert (tree.visits[shared], tree.visits[second_parent], tree.visits[root]) == (1, 1, 1), (
+        "Backpropagation did not update the nodes of the path."
+    )
+    assert tree.visits[first_parent] == 0, (
+        "Backpropagation updated a parent that is not on the path."
+    )
+    assert (tree.wins[shared], tree.wins[second_parent], tree.wins[root]) == (1, 0, 1), (
+        "Backpropagation along the path did not alternate the player perspective."
+    )
+
+
+def test_saved_state_is_advanced_to_played_action():
+    """
+    Test that the search tree returned as saved state can be advanced by the action of 
+    the opponent and reused for the next move.
+    """
+    board = gu.initialize_game_state()
+    action, saved_state = mcts.generate_move_mcts(board, gu.PLAYER1, saved_state=None, iterations=200)
+    assert isinstance(saved_state, SearchTree) and saved_state.player[saved_state.root] == gu.PLAYER1, (
+        "Saved state is not the search tree rooted at the chosen move."
+    )
+    gu.apply_player_action(board, action, gu.PLAYER1)
+    # the root may store the mirror image of the board (symmetry)
+    opponent_action = saved_state.root_action(saved_state.expanded_actions(saved_state.root)[0])
+    gu.apply_player_action(board, opponent_action, gu.PLAYER2)
+    saved_state = gu.update_saved_state(saved_state, opponent_action)
+    root_board = saved_state.board(saved_state.root)
+    assert np.all((np.fliplr(root_board) if saved_state.root_mirrored else root_board) == board), (
+        "Root of the advanced search tree does not match the board."
+    )
+    mcts.generate_move_mcts(board, gu.PLAYER1, saved_state, iterations=200)
+
+
+def test_search_tree_grows_and_keeps_nodes():
+    """
+    Test that the node arrays of the search tree grow when they are full and keep 
+    the statistics and children of the existing nodes.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, capacity=4)
+    mcts.run_search(tree, iterations=50)
+    assert tree.capacity >= len(tree) > 4 and tree.visits[tree.root] == 50, (
+        "Search tree did not grow to hold all nodes."
+    )
+    children = tree.child_nodes(tree.root)
+    assert tree.visits[children].sum() == 50 and np.all(tree.parent[children] == tree.root), (
+        "Statistics or children of the nodes were lost when the search tree grew."
+    )
+
+
+def test_reroot_releases_discarded_branches():
+    """
+    Test that moving the root to a child keeps exactly the subtree of the child 
+    (with its statistics) and releases all other nodes.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2)
+    mcts.run_search(tree, iterations=500)
+    action = tree.expanded_actions(tree.root)[0]
+    child = tree.get_child(tree.root, action)
+    grandchild_visits = {a: tree.visits[tree.get_child(child, a)] for a in tree.expanded_actions(child)}
+    num_nodes = len(tree)
+
+    report = tree.advance(action).last_reroot
+    assert tree.parent[tree.root] == NO_NODE and tree.previous_action[tree.root] == action, (
+        "Root was not moved to the child and detached from its parent."
+    )
+    assert {a: tree.visits[tree.get_child(tree.root, a)] for a in tree.expanded_actions(tree.root)} == grandchild_visits, (
+        "Children or statistics of the new root changed when re-rooting."
+    )
+    assert report.retained_nodes == len(tree) and report.retained_nodes + report.freed_nodes == num_nodes, (
+        "Re-rooting report does not add up to the number of nodes before re-rooting."
+    )
+    assert all(tree.lookup(*(int(field[node]) for field in (tree.hash, tree.position, tree.mask))) == node 
+               for node in range(len(tree))), (
+        "Transposition table does not map the retained positions to their new nodes."
+    )
+    mcts.run_search(tree, iterations=600)
+
+
+def test_tree_memory_counts_nodes_and_bytes():
+    """
+    Test that the memory report of the search tree counts the nodes and the bytes 
+    of the node arrays and the transposition table.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, transpositions=False)
+    mcts.run_search(tree, iterations=100)
+    memory = tree.memory()
+    assert memory.num_nodes == len(tree) == 101 and memory.num_bytes == tree.nbytes, (
+        "Memory report does not match the nodes and arrays of the search tree."
+    )
+    assert tree.nbytes == sum(getattr(tree, name).nbytes for name, _, _ in NODE_FIELDS), (
+        "Allocated bytes do not match the size of the node arrays."
+    )
+
+
+def test_search_with_node_budget_evicts_leaves():
+    """
+    Test that a search with a node budget never allocates more nodes than the budget, 
+    evicts nodes instead, and keeps the child tables consistent.
+    """
+    max_nodes = 200
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, max_nodes=max_nodes)
+    mcts.run_search(tree, iterations=2000)
+    assert tree.capacity == max_nodes and tree.num_evictions > 0 and tree.visits[tree.root] == 2000, (
+        "Search with node budget did not evict nodes or allocated more nodes than the budget."
+    )
+    children = tree.children[:tree.size]
+    assert np.all(tree.num_children[:tree.size] == (children != NO_NODE).sum(axis=1)), (
+        "Number of children does not match the child table after evictions."
+    )
+    assert not np.isin(children, tree.free_nodes).any(), (
+        "Evicted node is still linked as a child."
+    )
+    assert all(tree.hash[node] == hash_value for hash_value, node in tree.table.items()), (
+        "Transposition table refers to a reused node of a different position."
+    )
+
+
+def test_node_budget_has_lower_limit():
+    """
+    Test that a node budget too small to always have a leaf to evict is rejected.
+    """
+    with pytest.raises(ValueError):
+        SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, max_nodes=10)
+
+
+def test_time_limited_search_stops_at_deadline():
+    """
+    Test that a search with a time limit runs iterations until the time is up.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2)
+    t0 = time.perf_counter()
+    num_iterations = mcts.run_search(tree, iterations=0, time_limit=0.2)
+    elapsed = time.perf_counter() - t0
+    assert 0.2 <= elapsed < 0.3 and num_iterations == tree.visits[tree.root] > 0, (
+        "Time-limited search did not run iterations until the deadline."
+    )
+
+
+def test_early_stop_when_lead_can_not_be_overtaken():
+    """
+    Test that the search stops early if the most visited child of the root can not be 
+    overtaken in the remaining iterations, and that a single valid action always leads.
+    """
+    board = gu.initialize_game_state()
+    tree = SearchTree(board, player=gu.PLAYER2)
+    mcts.run_search(tree, iterations=100)
+    tree.visits[tree.get_child(tree.root, 3)] += 10000
+    iterations = int(tree.visits[tree.root]) + 1000
+    assert mcts.run_search(tree, iterations=iterations, early_stop=True) == mcts.EARLY_STOP_INTERVAL, (
+        "Search did not stop early although the lead can not be overtaken."
+    )
+    board[:, :6] = [[1, 2, 1, 2, 1, 2]] * 3 + [[2, 1, 2, 1, 2, 1]] * 3
+    assert mcts.get_root_lead(SearchTree(board, player=gu.PLAYER2)) == np.inf, (
+        "A single valid action should have an infinite lead."
+    )
+
+
+def test_expansion_of_terminal_node_returns_node():
+    """
+    Test that a terminal node (won or full board) is proven when it is added and that 
+    its expansion returns the node itself instead of playing on a finished game.
+    """
+    board = gu.initialize_game_state()
+    board[0:4, 0] = gu.PLAYER1
+    tree = SearchTree(board, player=gu.PLAYER1)
+    assert tree.proven[tree.root] == PROVEN_WIN, "Won position was not proven when added."
+    assert mcts.expansion(tree, tree.root) == tree.root and tree.num_children[tree.root] == 0, (
+        "Terminal node was expanded."
+    )
+    full_board = np.array([[1, 2, 1, 2, 1, 2, 1]] * 3 + [[2, 1, 2, 1, 2, 1, 2]] * 3, dtype=gu.BoardPiece)
+    tree = SearchTree(full_board, player=gu.PLAYER2)
+    assert tree.proven[tree.root] == PROVEN_DRAW and mcts.simulation(tree, tree.root)[0] == 0, (
+        "Full board was not proven as draw."
+    )
+
+
+def test_update_proof_from_children():
+    """
+    Test that a node is a proven loss if any child is a proven win, a proven win if all 
+    children are proven losses, and unproven while a child is unproven or not expanded.
+    """
+    tree, children = create_tree_with_children(num_children=gu.BOARD_COLS, player=gu.PLAYER1)
+    tree.proven[children] = PROVEN_LOSS
+    tree.proven[children[0]] = NOT_PROVEN
+    assert not mcts.update_proof(tree, tree.root), "Node with an unproven child was proven."
+    tree.proven[children[0]] = PROVEN_LOSS
+    assert mcts.update_proof(tree, tree.root) and tree.proven[tree.root] == PROVEN_WIN, (
+        "Node with only proven losses as children was not proven as win."
+    )
+    tree, children = create_tree_with_children(num_children=2, player=gu.PLAYER1)
+    tree.proven[children[1]] = PROVEN_WIN
+    assert mcts.update_proof(tree, tree.root) and tree.proven[tree.root] == PROVEN_LOSS, (
+        "Node with a proven win as child was not proven as loss."
+    )
+
+
+def test_search_ends_when_root_is_proven():
+    """
+    Test that the search stops as soon as the root is proven, here by an immediate win, 
+    and that a proven loss is never chosen.
+    """
+    board = gu.initialize_game_state()
+    board[0:3, 3] = gu.PLAYER1
+    board[0:3, 4] = gu.PLAYER2
+    tree = SearchTree(board, player=gu.PLAYER2)
+    num_iterations = mcts.run_search(tree, iterations=1000)
+    assert num_iterations < 1000 and tree.proven[tree.root] == PROVEN_LOSS, (
+        "Search did not stop after the root was proven."
+    )
+    action, child = mcts.get_best_child(tree, tree.root)
+    assert action == 3 and tree.proven[child] == PROVEN_WIN, "Proven win was not chosen."
+
+
+def expand_all_actions(tree, node):
+    """Add the children of all valid actions of the node and return them (indexed by action)."""
+    position, mask = tree.bitboard(node)
+    child_player = gu.BoardPiece(3 - tree.player[node])
+    children = {}
+    for action in gu.bitboard_valid_actions(mask):
+        child_position, child_mask = gu.bitboard_apply_action(position, mask, action, child_player)
+        child = tree.add_node(child_position, child_mask, 0, node, child_player, action)
+        tree.add_child(node, action, child)
+        children[action] = child
+    return children
+
+
+def test_amaf_updates_children_of_actions_played_later():
+    """
+    Test that the AMAF statistics of a child are updated if its player put a piece on the cell
+    of its move anywhere after the node, in the tree or in the simulation, from the child's perspective.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, transpositions=False)
+    root_children = expand_all_actions(tree, tree.root)  # moves of PLAYER1
+    grand_children = expand_all_actions(tree, root_children[3])  # moves of PLAYER2
+    path = [tree.root, root_children[3], grand_children[0]]
+    # simulation: PLAYER1 plays column 5, PLAYER2 column 1, PLAYER1 wins (loss for PLAYER2)
+    mcts.update_amaf(tree, path, [5, 1], -1)
+
+    updated = {action for action, child in root_children.items() if tree.amaf_visits[child] == 1}
+    assert updated == {3, 5}, "AMAF visits of the root's children should follow the columns of PLAYER1."
+    assert tree.amaf_wins[root_children[5]] == 1, "AMAF wins should count the win of PLAYER1."
+    updated = {action for action, child in grand_children.items() if tree.amaf_visits[child] == 1}
+    assert updated == {0, 1}, "AMAF visits of the grandchildren should follow the columns of PLAYER2."
+    assert tree.amaf_wins[grand_children[1]] == 0, "AMAF wins should not count the loss of PLAYER2."
+
+
+def test_rave_selection_blends_amaf_value():
+    """Test that the AMAF values decide between children with equal UCT scores."""
+    tree, (child1, child2) = create_tree_with_children(2)
+    tree.visits[[child1, child2]] = 10
+    tree.wins[[child1, child2]] = 5
+    tree.visits[tree.root] = 20
+    tree.amaf_visits[[child1, child2]] = 50
+    tree.amaf_wins[child1] = 10
+    tree.amaf_wins[child2] = 40
+    assert mcts.get_child_node_with_highest_UCT(tree, tree.root, rave_equivalence=mcts.RAVE_EQUIVALENCE) == child2, (
+        "Child with the higher AMAF value was not selected."
+    )
+
+
+def test_rave_search_avoids_certain_defeat():
+    """Test that a search with RAVE blocks a three in a column and rejects batched playouts."""
+    board = gu.initialize_game_state()
+    board[0:3, 3] = gu.PLAYER1
+    board[0, [0, 6]] = gu.PLAYER2
+    action, tree = mcts.generate_move_mcts(board, gu.PLAYER2, None, iterations=300, solver_threshold=None, rave=True)
+    assert action == 3, "Search with RAVE did not block the three in a column."
+    with pytest.raises(ValueError):
+        mcts.generate_move_mcts(board, gu.PLAYER2, None, iterations=10, playouts_per_leaf=2, rave=True)
+
+
+def test_symmetric_tree_stores_canonical_positions():
+    """
+    Test that a tree with symmetry stores the canonical form of the root and translates
+    actions between the board and the mirrored root.
+    """
+    board = gu.initialize_game_state()
+    board[0, 6] = gu.PLAYER1
+    board[0, 5] = gu.PLAYER2
+    canonical, mirrored = gu.canonical_board(board)
+    tree = SearchTree(board, player=gu.PLAYER2, symmetry=True)
+    assert mirrored and tree.root_mirrored and np.all(tree.board(tree.root) == canonical), (
+        "Root does not store the canonical form of the board."
+    )
+    assert tree.root_action(6) == 0 and tree.root_action(tree.root_action(2)) == 2, (
+        "Actions are not mirrored between the board and the mirrored root."
+    )
+    child = mcts.expansion(tree, tree.root)
+    assert not gu.bitboard_canonical(*tree.bitboard(child))[2], "Child is not stored in canonical form."
+
+
+def test_symmetric_root_collapses_mirrored_children():
+    """
+    Test that a symmetric root is only expanded with the actions that are not mirror
+    images of others and that a mirrored action of the game is advanced to the mirror image.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, symmetry=True)
+    mcts.run_search(tree, iterations=100)
+    assert tree.expanded_actions(tree.root) == [0, 1, 2, 3], (
+        "Symmetric root was expanded with mirrored actions."
+    )
+    assert tree.visits[tree.child_nodes(tree.root)].sum() == 100, "Iterations were lost on the symmetric root."
+    tree.advance(5)
+    board = gu.initialize_game_state()
+    gu.apply_player_action(board, 5, gu.PLAYER1)
+    assert tree.root_mirrored and np.all(np.fliplr(tree.board(tree.root)) == board), (
+        "Advancing by a mirrored action did not reach the mirror image of the board."
+    )
+
+
+def test_mirror_positions_share_nodes():
+    """Test that a search with symmetry stores a position and its mirror image in a single node."""
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, symmetry=True)
+    mcts.run_search(tree, iterations=300)
+    keys = [gu.bitboard_canonical_key(*tree.bitboard(node))[0] for node in range(len(tree))]
+    assert len(set(keys)) == len(keys), "Mirror images are stored in separate nodes."
+    assert all(gu.bitboard_key(*tree.bitboard(node)) == key for node, key in enumerate(keys)), (
+        "Nodes do not store the canonical form of their positions."
+    )
+
+
+@pytest.mark.parametrize("column", [1, 5])
+def test_symmetric_search_blocks_mirrored_threat(column):
+    """Test that the search with symmetry plays the move of the board, not of its mirror image."""
+    board = gu.initialize_game_state()
+    board[0:3, column] = gu.PLAYER1
+    board[0, 3] = gu.PLAYER2
+    board[1, 3] = gu.PLAYER2  # PLAYER2 to move
+    action, tree = mcts.generate_move_mcts(board, gu.PLAYER2, None, iterations=300, solver_threshold=None)
+    assert action == column, "Search with symmetry did not block the three in a column."
+
+
+@pytest.mark.parametrize("column", [1, 5])
+def test_principal_variation_is_played_on_the_board(column):
+    """Test that the principal variation starts with the best move and is playable on the board (not its mirror image)."""
+    board = gu.initialize_game_state()
+    board[0:3, column] = gu.PLAYER1
+    board[0:2, 3] = gu.PLAYER2
+    tree = SearchTree(board, player=gu.PLAYER1, symmetry=True)
+    mcts.run_search(tree, 500)
+    variation = mcts.get_principal_variation(tree)
+    assert variation[0] == column == tree.root_action(mcts.get_best_child(tree, tree.root)[0]), (
+        "Principal variation does not start with the move blocking the three in a column.")
+    game_board = gu.Board(board, player=gu.PLAYER2)
+    for action in variation:
+        assert game_board.can_play(action) and game_board.check_end_state() == gu.GameState.STILL_PLAYING, (
+            "Principal variation contains an invalid move.")
+        game_board.play(action)
+    assert len(mcts.get_principal_variation(tree, max_length=1)) == 1, "Principal variation is not limited."
+
+
+@pytest.mark.parametrize("time_limit", [0, 1e-6])
+def test_search_without_time_left_returns_valid_move(time_limit):
+    """Test that a search with no time left still expands the root and returns a valid move."""
+    board = gu.initialize_game_state()
+    tree = SearchTree(board, player=gu.PLAYER2, symmetry=False)
+    mcts.run_search(tree, 0, time_limit=time_limit)
+    assert len(tree.child_nodes(tree.root)) == gu.BOARD_COLS, "Root was not fully expanded."
+    action, _ = mcts.generate_move_mcts(board, gu.PLAYER1, None, time_limit=time_limit)
+    assert 0 <= action < gu.BOARD_COLS, "Search without time left did not return a valid move."
@@ -0,0 +1,78 @@
+import sys
+import os
+
+import numpy as np
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import generate_move_mcts
+from agents.agent_mcts.opening_book import OpeningBook
+from agents.agent_mcts.build_opening_book import build_opening_book, enumerate_book_positions
+
+
+def leftmost_analysis(position, mask):
+    """Fast stand-in for the search: the leftmost valid action and its column as value."""
+    action = gu.bitboard_valid_actions(mask)[0]
+    return action, float(action)
+
+
+def test_book_positions_are_unique_up_to_mirroring():
+    """
+    Test that the book contains every position of the first plies once, mirror images 
+    only once: 1 empty board, 4 positions with one piece, 25 with two pieces.
+    """
+    positions = enumerate_book_positions(3)
+    assert len(positions) == 1 + 4 + 25, (
+        "Number of book positions does not match the number of positions up to mirroring."
+    )
+    for key, (position, mask) in positions.items():
+        assert gu.bitboard_key(position, mask) == key, (
+            "Book positions are not stored in their canonical orientation."
+        )
+
+
+def test_opening_book_lookup_mirrors_moves(tmp_path):
+    """
+    Test that the book answers positions of the first plies (mirror images with the 
+    mirrored move) and no positions beyond them.
+    """
+    path = str(tmp_path / "book.npy")
+    table = build_opening_book(path, plies=2, analysis=leftmost_analysis)
+    book = OpeningBook(path)
+    assert len(book) == len(table) == 5 and np.all(np.diff(book.keys.astype(np.int64)) > 0), (
+        "Book table is not sorted by key."
+    )
+
+    board = gu.initialize_game_state()
+    gu.apply_player_action(board, 1, gu.PLAYER1)  # canonical position, key smaller than its mirror image
+    assert book.lookup(*gu.board_to_bitboard(board)).action == 0, (
+        "Book move of the canonical position does not match the analysis."
+    )
+    assert book.lookup(*gu.board_to_bitboard(np.fliplr(board))).action == gu.BOARD_COLS - 1, (
+        "Book move of the mirror image was not mirrored."
+    )
+    gu.apply_player_action(board, 1, gu.PLAYER2)
+    assert book.lookup(*gu.board_to_bitboard(board)) is None, (
+        "Book answered a position beyond its plies."
+    )
+
+
+def test_generate_move_mcts_uses_opening_book(tmp_path):
+    """
+    Test that the agent plays the book move without a search while the position is in 
+    the book and searches afterwards.
+    """
+    path = str(tmp_path / "book.npy")
+    build_opening_book(path, plies=1, analysis=leftmost_analysis)
+    board = gu.initialize_game_state()
+    action, saved_state = generate_move_mcts(board, gu.PLAYER1, None, iterations=50, opening_book=path)
+    assert action == 0 and saved_state is None, (
+        "Agent did not play the book move without a search."
+    )
+    gu.apply_player_action(board, action, gu.PLAYER1)
+    action, saved_state = generate_move_mcts(board, gu.PLAYER2, None, iterations=50, opening_book=path)
+    assert saved_state is not None and saved_state.visits.sum() > 0, (
+        "Agent did not search after the book."
+    )
@@ -0,0 +1,90 @@
+import sys
+import os
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import parallel
+from agents.agent_mcts.tree import NOT_PROVEN, PROVEN_WIN, PROVEN_LOSS
+
+
+def test_merge_root_statistics_sums_visits_and_wins():
+    """
+    Test that the root statistics of several workers are summed per action and that
+    a child proven by one worker is proven.
+    """
+    merged = parallel.merge_root_statistics([
+        {0: (3, 1, NOT_PROVEN), 3: (10, 6, NOT_PROVEN)}, {3: (8, 5, PROVEN_WIN), 4: (2, 0, NOT_PROVEN)}
+    ])
+    assert merged == {0: (3, 1, NOT_PROVEN), 3: (18, 11, PROVEN_WIN), 4: (2, 0, NOT_PROVEN)}, (
+        "Merged root statistics do not match the summed statistics of the workers."
+    )
+
+
+def test_select_action_from_statistics_prefers_certain_victory():
+    """
+    Test that an action leading to certain victory is selected even if another action has more visits.
+    """
+    board = gu.initialize_game_state()
+    board[0:3, 5] = gu.PLAYER2
+    statistics = {2: (100, 60, NOT_PROVEN), 5: (1, 1, NOT_PROVEN)}
+    action = parallel.select_action_from_statistics(gu.board_to_bitboard(board), gu.PLAYER2, statistics)
+    assert action == 5, (
+        "Action leading to certain victory was not selected."
+    )
+
+
+def test_select_action_from_statistics_prefers_proven_win_and_avoids_proven_loss():
+    """
+    Test that a child proven to win is selected even with few visits, and that a child
+    proven to lose is not selected even with the most visits.
+    """
+    bitboard = gu.board_to_bitboard(gu.initialize_game_state())
+    statistics = {0: (100, 60, NOT_PROVEN), 1: (5, 5, PROVEN_WIN), 2: (500, 0, PROVEN_LOSS)}
+    assert parallel.select_action_from_statistics(bitboard, gu.PLAYER1, statistics) == 1, (
+        "Proven win was not selected."
+    )
+    del statistics[1]
+    assert parallel.select_action_from_statistics(bitboard, gu.PLAYER1, statistics) == 0, (
+        "Proven loss was selected."
+    )
+
+
+def test_parallel_agent_plays_proven_win():
+    """
+    Test that the root-parallel MCTS agent plays a forced win (open three in the bottom row)
+    that its workers prove, reported with the statistics of the root children.
+    """
+    board = gu.initialize_game_state()
+    board[0, 2:4] = gu.PLAYER1
+    board[1, 2:4] = gu.PLAYER2
+    pool = parallel.get_root_parallel_pool(num_workers=2)
+    statistics = pool.search(board, gu.PLAYER1, 1000)
+    assert any(proof == PROVEN_WIN for _, _, proof in statistics.values()), "Workers did not report the proven win."
+    for _ in range(3):
+        action, _ = parallel.generate_move_mcts_parallel(board, gu.PLAYER1, None, iterations=300, num_workers=2)
+        assert action in (1, 4), "Root-parallel MCTS agent did not play the forced win."
+
+
+def test_parallel_agent_achieves_certain_victory_and_keeps_pool():
+    """
+    Test that the root-parallel MCTS agent attains certain victory and that its 
+    worker processes stay alive for the next move.
+    """
+    board = gu.initialize_game_state()
+    player = gu.PLAYER1
+    board[0, :] = [2,2,0,1,1,1,0]
+    board[1, 3] = gu.PLAYER2
+    action, _ = parallel.generate_move_mcts_parallel(board, player, None, iterations=300, num_workers=2)
+    pool = parallel.get_root_parallel_pool(num_workers=2)
+    assert action in (2, 6), (
+        "Certain victory (horizontally) not attained by root-parallel MCTS agent."
+    )
+    assert all(process.is_alive() for process in pool.processes), (
+        "Worker processes did not stay alive after the move."
+    )
+    parallel.generate_move_mcts_parallel(board, player, None, iterations=100, num_workers=2)
+    assert parallel.get_root_parallel_pool(num_workers=2) is pool, (
+        "Pool of worker processes was not reused for the next move."
+    )
@@ -0,0 +1,74 @@
+import sys
+import os
+
+import pytest
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import mcts
+from agents.agent_mcts.playout import HEAVY_POLICY, heavy_policy_moves, simulation_heavy
+
+
+def test_winning_cells_of_threats():
+    """Test that the threat mask contains the open ends of three in a row, column and gaps."""
+    board = gu.initialize_game_state()
+    board[0, 0:3] = gu.PLAYER1  # horizontal three, open at column 3
+    board[0:3, 6] = gu.PLAYER1  # vertical three, open at row 3
+    board[1, [0, 1, 3]] = gu.PLAYER1  # gap at column 2 of row 1
+    position, mask = gu.board_to_bitboard(board)
+    cells = gu.bitboard_winning_cells(position, mask)
+    expected = [(0, 3), (3, 6), (1, 2)]
+    expected_cells = sum(1 << (col * gu.BITBOARD_HEIGHT + row) for row, col in expected)
+    assert cells & expected_cells == expected_cells, "Threat mask misses a winning cell."
+    assert gu.bitboard_winning_cells(position ^ mask, mask) == 0, "Opponent without pieces has threats."
+
+
+def test_heavy_playout_takes_immediate_win():
+    """Test that the heavy playout always wins if the player to move can connect four."""
+    board = gu.initialize_game_state()
+    board[0:3, 2] = gu.PLAYER1
+    board[0, [0, 5, 6]] = gu.PLAYER2
+    position, mask = gu.board_to_bitboard(board)
+    # PLAYER2 made the last move, PLAYER1 wins with the first move of every playout
+    results = {simulation_heavy(position, mask, gu.PLAYER2) for _ in range(50)}
+    assert results == {(-1, 0)}, "Heavy playout did not take the immediate win."
+
+
+def test_heavy_policy_blocks_and_avoids_cells_below_threats():
+    """
+    Test that the heavy policy blocks an immediate win of the opponent and otherwise 
+    does not play directly below a winning cell of the opponent.
+    """
+    board = gu.initialize_game_state()
+    board[0:3, 3] = gu.PLAYER1
+    position, mask = gu.board_to_bitboard(board)
+    current = position ^ mask  # PLAYER2 to move
+    moves = heavy_policy_moves(current, mask, gu.bitboard_winning_cells(position, mask))
+    assert moves == 1 << (3 * gu.BITBOARD_HEIGHT + 3), "Heavy policy did not block the vertical three."
+
+    board = gu.initialize_game_state()
+    board[1, 0:3] = gu.PLAYER1  # winning cell (1, 3) above the empty cell (0, 3)
+    board[0, 0:3] = gu.PLAYER2
+    board[0, 6] = gu.PLAYER1
+    position, mask = gu.board_to_bitboard(board)
+    current = position ^ mask  # PLAYER2 to move
+    moves = heavy_policy_moves(current, mask, gu.bitboard_winning_cells(position, mask))
+    assert not moves & gu.COLUMN_MASKS[3] and moves, "Heavy policy plays below a winning cell of the opponent."
+
+
+def test_heavy_policy_search_blocks_with_few_iterations():
+    """Test that a search with heavy playouts blocks a three in a column with a few iterations."""
+    board = gu.initialize_game_state()
+    board[0:3, 3] = gu.PLAYER1
+    board[0, [0, 6]] = gu.PLAYER2
+    action, _ = mcts.generate_move_mcts(board, gu.PLAYER2, None, iterations=200, 
+                                        solver_threshold=None, playout_policy=HEAVY_POLICY)
+    assert action == 3, "Search with heavy playouts did not block the three in a column."
+
+
+def test_unknown_playout_policy_raises():
+    """Test that an unknown playout policy is rejected."""
+    with pytest.raises(ValueError):
+        mcts.generate_move_mcts(gu.initialize_game_state(), gu.PLAYER1, None, iterations=10, playout_policy="greedy")
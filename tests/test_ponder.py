@@ -0,0 +1,76 @@
+import sys
+import os
+import time
+from functools import partial
+
+import pytest
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import generate_move_mcts, generate_move_mcts_leaf_parallel
+from agents.agent_mcts.ponder import Ponderer, search_kwargs
+
+
+def test_pondering_grows_tree_until_stopped():
+    """
+    Test that pondering adds visits to the tree of the agent during the opponent's turn, 
+    that stop() returns the tree and ends the thread, and that the tree can be moved to 
+    the opponent's move afterwards.
+    """
+    board = gu.initialize_game_state()
+    action, tree = generate_move_mcts(board, gu.PLAYER1, None, iterations=100)
+    visits = int(tree.visits[tree.root])
+
+    ponderer = Ponderer()
+    ponderer.start(tree)
+    assert ponderer.pondering, "Ponderer did not start pondering."
+    time.sleep(0.2)
+    assert ponderer.stop() is tree and not ponderer.pondering, (
+        "Ponderer did not return the tree when stopped."
+    )
+    assert int(tree.visits[tree.root]) == visits + ponderer.iterations > visits, (
+        "Pondering did not add visits to the root of the tree."
+    )
+    assert ponderer.stop() is None, "Stopping a stopped ponderer should return None."
+
+    tree = gu.update_saved_state(tree, 3)
+    assert tree is not None and tree.visits[tree.root] > 0, (
+        "Tree could not be moved to the opponent's move after pondering."
+    )
+
+
+def test_pondering_twice_raises_and_max_iterations_stops():
+    """
+    Test that a ponderer can only ponder on one tree at a time and that it stops by 
+    itself at max_iterations.
+    """
+    _, tree = generate_move_mcts(gu.initialize_game_state(), gu.PLAYER1, None, iterations=10)
+    ponderer = Ponderer(max_iterations=100)
+    ponderer.start(tree)
+    with pytest.raises(RuntimeError):
+        ponderer.start(tree)
+    ponderer._thread.join(timeout=10)
+    ponderer.stop()
+    assert tree.visits[tree.root] == 100, (
+        "Pondering did not stop at max_iterations."
+    )
+
+
+def test_pondering_uses_search_settings_of_the_agent():
+    """Test that the search settings are taken from the arguments of the agent and used while pondering."""
+    kwargs = search_kwargs(partial(generate_move_mcts, rave=True), (4000, 12))
+    assert kwargs == {"max_depth": 12, "playouts_per_leaf": 1, "playout_policy": "random", "rave": True,
+                      "selection_policy": "ucb1", "exploration": None}, "Search settings of the agent are wrong."
+    assert search_kwargs(generate_move_mcts_leaf_parallel)["playouts_per_leaf"] == 8, (
+        "Defaults of the move generator were not used.")
+
+    _, tree = generate_move_mcts(gu.initialize_game_state(), gu.PLAYER1, None, iterations=10, rave=True)
+    amaf_visits = int(tree.amaf_visits[:tree.size].sum())
+    ponderer = Ponderer(max_iterations=200, **search_kwargs(generate_move_mcts, kwargs={"rave": True}))
+    ponderer.start(tree)
+    ponderer._thread.join(timeout=10)
+    ponderer.stop()
+    assert tree.visits[tree.root] == 200 and tree.amaf_visits[:tree.size].sum() > amaf_visits, (
+        "Pondering of a RAVE agent did not update the AMAF statistics.")
@@ -0,0 +1,100 @@
+import sys
+import os
+import math
+
+import numpy as np
+import pytest
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import mcts
+from agents.agent_mcts.tree import SearchTree, PROVEN_LOSS
+from agents.agent_mcts.selection_policies import (
+    SELECTION_POLICIES, TABLE_SIZE, PUCT, UCB1, UCB1Tuned, SelectionPolicy, make_selection_policy, sqrt_log,
+    window_priors
+)
+
+
+def create_tree_with_children(num_children):
+    """Returns a search tree on the empty board whose root has children for the first actions, and the children."""
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, transpositions=False)
+    children = []
+    for action in range(num_children):
+        child = tree.add_node(*tree.bitboard(tree.root), 0, tree.root, gu.PLAYER1, action)
+        tree.add_child(tree.root, action, child)
+        children.append(child)
+    return tree, children
+
+
+def test_lookup_tables_match_functions():
+    """Test that the table lookups match sqrt(log(n)) inside and outside of the tables."""
+    for visits in (1, 2, 1000, TABLE_SIZE - 1, TABLE_SIZE, 10 * TABLE_SIZE):
+        assert math.isclose(sqrt_log(visits), math.sqrt(math.log(visits))), f"sqrt_log({visits}) is wrong."
+
+
+def test_ucb1_and_ucb1_tuned_scores():
+    """Test that UCB1 and UCB1-Tuned select the child with the highest score computed by hand."""
+    tree, children = create_tree_with_children(3)
+    tree.visits[children] = [10, 40, 50]
+    tree.wins[children] = [6, 28, 30]
+    tree.visits[tree.root] = 100
+    log_n = math.log(100)
+    means = np.array([0.6, 0.7, 0.6])
+    visits = np.array([10, 40, 50])
+    ucb1 = means + math.sqrt(2) * np.sqrt(log_n / visits)
+    assert UCB1().select(tree, tree.root) == children[int(ucb1.argmax())], "UCB1 did not select the highest score."
+    variance_bound = means - means**2 + np.sqrt(2 * log_n / visits)
+    tuned = means + np.sqrt(log_n / visits * np.minimum(0.25, variance_bound))
+    assert UCB1Tuned().select(tree, tree.root) == children[int(tuned.argmax())], (
+        "UCB1-Tuned did not select the highest score."
+    )
+    assert UCB1(exploration=0).select(tree, tree.root) == children[1], "Without exploration the best mean should be selected."
+
+
+def test_puct_prefers_moves_with_higher_prior():
+    """Test that the window priors favour the center and PUCT selects the center among equal children."""
+    priors = window_priors(0)
+    assert math.isclose(sum(priors), 1) and priors.index(max(priors)) == 3, "Center column should have the highest prior."
+    board = gu.initialize_game_state()
+    board[:, 0] = [gu.PLAYER1, gu.PLAYER2] * 3
+    assert window_priors(gu.board_to_bitboard(board)[1])[0] == 0, "Full column should have prior 0."
+
+    tree, children = create_tree_with_children(gu.BOARD_COLS)
+    tree.visits[children] = 10
+    tree.wins[children] = 5
+    tree.visits[tree.root] = 70
+    assert PUCT().select(tree, tree.root) == children[3], "PUCT did not select the center among equal children."
+    tree.proven[children[3]] = PROVEN_LOSS
+    assert PUCT().select(tree, tree.root) in (children[2], children[4]), "PUCT selected a proven loss."
+
+
+def test_make_selection_policy():
+    """Test that the policies are created by name with their exploration constant and unknown names are rejected."""
+    for name, policy_class in SELECTION_POLICIES.items():
+        policy = make_selection_policy(name, exploration=0.5)
+        assert isinstance(policy, policy_class) and policy.exploration == 0.5, f"Policy {name} was not created."
+    assert make_selection_policy().exploration == math.sqrt(2), "Default policy should be UCB1 with c = sqrt(2)."
+    with pytest.raises(ValueError):
+        make_selection_policy("ucb2")
+
+
+def test_policy_without_score_can_not_be_created():
+    """Test that a policy that does not implement score() fails when it is created, not during a search."""
+    class NoScore(SelectionPolicy):
+        name = "no-score"
+
+    with pytest.raises(TypeError):
+        NoScore()
+
+
+@pytest.mark.parametrize("name", list(SELECTION_POLICIES))
+def test_search_with_selection_policy_avoids_certain_defeat(name):
+    """Test that a search with each selection policy blocks a three in a column."""
+    board = gu.initialize_game_state()
+    board[0:3, 3] = gu.PLAYER1
+    board[0, [0, 6]] = gu.PLAYER2
+    action, _ = mcts.generate_move_mcts(board, gu.PLAYER2, None, iterations=500, solver_threshold=None,
+                                        selection_policy=name)
+    assert action == 3, f"Search with selection policy {name} did not block the three in a column."
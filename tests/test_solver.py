@@ -0,0 +1,101 @@
+import sys
+import os
+import random
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import generate_move_mcts
+from agents.agent_mcts.solver import Solver, TranspositionTable
+
+
+def minimax_result(board: gu.Board) -> int:
+    """Game result (1 win, 0 draw, -1 loss) of the player to move by plain minimax."""
+    best = -1
+    for action in board.valid_actions():
+        board.play(action)
+        if board.is_win(): result = 1
+        elif board.is_full(): result = 0
+        else: result = -minimax_result(board)
+        board.undo()
+        best = max(best, result)
+        if best == 1:
+            break
+    return best
+
+
+def random_late_position(empty_cells: int) -> gu.Board:
+    """Random position with the given number of empty cells in which the game is still going on."""
+    while True:
+        board = gu.Board()
+        while gu.BOARD_CELLS - board.ply > empty_cells and not board.is_win():
+            board.play(random.choice(board.valid_actions()))
+        if not board.is_win():
+            return board
+
+
+def test_solver_matches_minimax():
+    """Test that the solver proves the same result as minimax and that its move keeps that result."""
+    random.seed(0)
+    solver = Solver(table_size=1009)  # small table, so entries are replaced
+    for _ in range(30):
+        board = random_late_position(random.randint(2, 9))
+        result = solver.solve(board.position, board.mask, board.player)
+        expected = minimax_result(board)
+        assert result.exact and (result.score > 0) - (result.score < 0) == expected, (
+            "Solver result does not match minimax."
+        )
+        board.play(result.action)
+        result_after_move = 1 if board.is_win() else 0 if board.is_full() else -minimax_result(board)
+        assert result_after_move == expected, "Solver move does not keep the proven result."
+
+
+def test_solver_plays_fastest_win_and_blocks():
+    """
+    Test that the solver takes an immediate win and otherwise blocks the opponent's win 
+    (already in a depth limited search, the position is too large to be solved).
+    """
+    board = gu.initialize_game_state()
+    board[0, 0:3] = gu.PLAYER1
+    board[0:3, 6] = gu.PLAYER2
+    position, mask = gu.board_to_bitboard(board)
+    result = Solver().solve(position, mask, gu.PLAYER2)
+    assert result.action == 6 and result.score > 0, "Solver did not take the immediate win."
+    board[0:3, 6] = [gu.PLAYER2, gu.PLAYER1, gu.PLAYER2]
+    board[0, 4] = gu.PLAYER2
+    position, mask = gu.board_to_bitboard(board)
+    assert Solver().solve(position, mask, gu.PLAYER2, max_depth=4).action == 3, (
+        "Solver did not block the opponent's win."
+    )
+
+
+def test_solver_time_limit_returns_unproven_result():
+    """Test that a solve stopped by its time limit does not claim an exact result."""
+    result = Solver().solve(0, 0, gu.PLAYER1, time_limit=0.05)
+    assert result is None or not result.exact, (
+        "Solve of the empty board claims an exact result within the time limit."
+    )
+
+
+def test_transposition_table_is_bounded():
+    """Test that the table keeps a fixed number of slots and a new entry replaces the old one of its slot."""
+    table = TranspositionTable(size=11)
+    table.put(3, 1, 0, 5, 2)
+    table.put(14, 2, 1, -1, 4)  # same slot as key 3
+    assert len(table.slots) == 11 and table.get(3) is None and table.get(14) == (14, 2, 1, -1, 4), (
+        "Transposition table did not replace the entry of the slot."
+    )
+
+
+def test_generate_move_mcts_solves_late_positions():
+    """Test that the agent solves positions below the solver threshold without a search."""
+    random.seed(1)
+    board = random_late_position(8)
+    action, saved_state = generate_move_mcts(board.to_array(), board.player, None, solver_threshold=10)
+    expected = minimax_result(board)
+    board.play(action)
+    result_after_move = 1 if board.is_win() else 0 if board.is_full() else -minimax_result(board)
+    assert saved_state is None and result_after_move == expected, (
+        "Agent did not play the solved move below the solver threshold."
+    )
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import mcts
+from agents.agent_mcts.stats import PHASES, SOURCE_SEARCH, SOURCE_SOLVER, SearchStats
+from agents.agent_mcts.tree import SearchTree
+
+
+def test_search_stats_of_a_move():
+    """Test that the statistics of a searched move cover all phases, iterations and the root children."""
+    stats = SearchStats()
+    action, tree = mcts.generate_move_mcts(gu.initialize_game_state(), gu.PLAYER1, None, iterations=300,
+                                           early_stop=False, stats=stats)
+    assert stats.source == SOURCE_SEARCH and stats.action == action, "Played action was not recorded."
+    assert stats.iterations == stats.playouts == 300 and stats.iterations_per_second > 0, (
+        "Iterations or playouts were not counted.")
+    assert all(stats.phase_times[phase] > 0 for phase in PHASES), "A phase was not timed."
+    assert sum(stats.phase_times.values()) <= stats.search_time <= stats.move_time, (
+        "Phase times exceed the time of the search or move.")
+    assert 1 <= stats.mean_depth <= stats.max_depth, "Depths of the iterations are inconsistent."
+    assert sum(stats.root_visits.values()) == 300 and max(stats.root_visits, key=stats.root_visits.get) == action, (
+        "Visits of the root children do not match the search.")
+    assert all(0 <= value <= 1 for value in stats.root_values.values()), "Mean results are not in [0, 1]."
+    assert stats.num_nodes == len(tree) and stats.reused_visits == 0, "Tree size or reused visits are wrong."
+    assert "iterations" in stats.summary(), "Summary does not report the search."
+
+
+def test_search_stats_count_reused_visits():
+    """Test that the visits of a reused root are reported as reused."""
+    board = gu.initialize_game_state()
+    action, saved_state = mcts.generate_move_mcts(board, gu.PLAYER1, None, iterations=300)
+    gu.apply_player_action(board, action, gu.PLAYER1)
+    opponent_action = saved_state.root_action(saved_state.expanded_actions(saved_state.root)[0])
+    gu.apply_player_action(board, opponent_action, gu.PLAYER2)
+    saved_state = gu.update_saved_state(saved_state, opponent_action)
+    reused = int(saved_state.visits[saved_state.root])
+    stats = SearchStats()
+    mcts.generate_move_mcts(board, gu.PLAYER1, saved_state, iterations=300, stats=stats)
+    assert reused > 0 and stats.reused_visits == reused, "Reused visits of the saved state were not reported."
+
+
+def test_search_stats_of_a_solved_move():
+    """Test that a move found by the endgame solver is reported as such, without search statistics."""
+    board = gu.initialize_game_state()
+    board[0:3, 0] = gu.PLAYER1
+    board[0:3, 1] = gu.PLAYER2
+    stats = SearchStats()
+    action, _ = mcts.generate_move_mcts(board, gu.PLAYER1, None, iterations=100, solver_threshold=gu.BOARD_CELLS,
+                                        stats=stats)
+    assert stats.source == SOURCE_SOLVER and stats.action == action == 0 and stats.iterations == 0, (
+        "Solved move was not reported as found by the solver.")
+
+
+def test_root_values_count_draws_as_half():
+    """Test that the values of the root children are mean results (draws count half), not win rates."""
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, symmetry=False)
+    child = mcts.expansion(tree, tree.root)
+    action = tree.expanded_actions(tree.root)[0]
+    for result in (0.0, 0.0, 1.0, -1.0):  # two draws, a win and a loss of the player to move at the root
+        mcts.backpropagation(tree, child, result)
+    stats = SearchStats()
+    stats.record_tree(tree)
+    assert stats.root_visits[action] == 4 and stats.root_values[action] == 0.5 == tree.mean_result(child), (
+        "Mean result of the root child does not count draws as half a win.")
@@ -0,0 +1,73 @@
+import sys
+import os
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import mcts
+from agents.agent_mcts import threaded
+from agents.agent_mcts.tree import SearchTree
+
+
+def test_threaded_search_visits_and_virtual_losses():
+    """
+    Test that the threaded search runs exactly the requested iterations, creates one 
+    node per iteration and removes all virtual losses afterwards.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, transpositions=False)
+    threaded.run_threaded_search(tree, iterations=500, num_threads=4)
+    assert tree.visits[tree.root] == 500 and len(tree) == 501, (
+        "Threaded search did not run the requested number of iterations."
+    )
+    assert not tree.virtual_loss[:len(tree)].any(), (
+        "Virtual losses were not removed after the threaded search."
+    )
+
+
+def test_threaded_search_on_symmetric_tree():
+    """
+    Test that the threaded search continues a tree with symmetry, whose symmetric nodes
+    are fully expanded with the actions of one half of the board.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2, symmetry=True)
+    mcts.run_search(tree, 50)
+    threaded.run_threaded_search(tree, iterations=500, num_threads=4)
+    assert tree.visits[tree.root] == 500 and len(tree.child_nodes(tree.root)) == 4, (
+        "Threaded search did not continue the tree with symmetry."
+    )
+    assert not tree.virtual_loss[:tree.size].any(), (
+        "Virtual losses were not removed after the threaded search."
+    )
+
+
+def test_virtual_loss_steers_selection_to_other_child():
+    """
+    Test that a virtual loss on the best child makes the UCT selection choose another child.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER1, transpositions=False)
+    child1, child2 = (mcts.expansion(tree, tree.root) for _ in range(2))
+    tree.visits[[child1, child2]] = 10
+    tree.wins[[child1, child2]] = 6, 5
+    tree.visits[tree.root] = 20
+    assert mcts.get_child_node_with_highest_UCT(tree, tree.root) == child1, (
+        "Child with highest UCT score was not selected without virtual loss."
+    )
+    tree.virtual_loss[child1] = 3
+    assert mcts.get_child_node_with_highest_UCT(tree, tree.root) == child2, (
+        "Virtual loss did not steer the selection to the other child."
+    )
+
+
+def test_threaded_agent_avoids_certain_defeat():
+    """
+    Test that the multithreaded MCTS agent avoids a certain defeat.
+    """
+    board = gu.initialize_game_state()
+    player = gu.PLAYER2
+    col_idx = 3
+    board[:, col_idx] = [1,1,1,0,0,0]
+    action, _ = threaded.generate_move_mcts_threaded(board, player, None, num_threads=3)
+    assert action == col_idx, (
+        "Certain defeat not averted by multithreaded MCTS agent, possibly (but unprobable) due to chance."
+    )
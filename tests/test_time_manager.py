@@ -0,0 +1,64 @@
+import sys
+import os
+
+# add parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import game_utils as gu
+from agents.agent_mcts import mcts
+from agents.agent_mcts.tree import SearchTree
+from agents.agent_mcts.time_manager import TimeManager, position_uncertainty
+
+
+def test_move_time_grows_with_uncertainty_and_stays_within_remaining_time():
+    """
+    Test that uncertain positions get more time than clear ones and that a move never 
+    gets more than the maximum share of the remaining time.
+    """
+    time_manager = TimeManager(total_time=60)
+    clear, uncertain = time_manager.move_time(ply=10, uncertainty=0), time_manager.move_time(ply=10, uncertainty=1)
+    assert clear < uncertain, (
+        "Uncertain position did not get more time than a clear position."
+    )
+    assert time_manager.move_time(ply=41, uncertainty=1) <= time_manager.max_share * 60, (
+        "Move time exceeds the maximum share of the remaining time."
+    )
+
+
+def test_time_manager_spends_at_most_total_time():
+    """
+    Test that the move times of a whole game add up to at most the total time.
+    """
+    time_manager = TimeManager(total_time=10)
+    for ply in range(0, gu.BOARD_CELLS, 2):
+        time_manager.update(time_manager.move_time(ply))
+    assert time_manager.remaining_time >= 0, (
+        "Time manager planned more time than the total time of the game."
+    )
+
+
+def test_position_uncertainty_of_search_tree():
+    """
+    Test that the uncertainty is 0 if all visits went to one child, 1 if the visits are 
+    spread evenly, and 0.5 without statistics.
+    """
+    tree = SearchTree(gu.initialize_game_state(), player=gu.PLAYER2)
+    assert position_uncertainty(None) == position_uncertainty(tree) == 0.5, (
+        "Uncertainty without statistics should be 0.5."
+    )
+    children = [mcts.expansion(tree, tree.root) for _ in range(gu.BOARD_COLS)]
+    tree.visits[children] = 10
+    assert position_uncertainty(tree) == 1, (
+        "Uncertainty of evenly spread visits should be 1."
+    )
+    tree.visits[children[1:]] = 0
+    assert position_uncertainty(tree) == 0, (
+        "Uncertainty of visits of a single child should be 0."
+    )
+
+
+def test_move_time_is_positive_when_clock_is_spent():
+    """Test that a move still gets a small positive time budget once the clock is spent."""
+    time_manager = TimeManager(total_time=1)
+    time_manager.update(2)
+    assert 0 < time_manager.move_time(ply=20) <= 0.01, "Spent clock did not give a small positive move time."